@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'poshmark.loaders.BatchLoaderMiddleware',
 ]
 
 ROOT_URLCONF = 'PoshBot.urls'
@@ -177,6 +178,97 @@ LOGIN_URL = 'login'
 # Redis Settings
 REDIS_HOST = 'redis'
 REDIS_PORT = 6379
+REDIS_MAX_CONNECTIONS = 50  # Per process, per redis db
+REDIS_POOL_TIMEOUT = 20  # Seconds to wait for a free pooled connection before erroring
+
+# Seconds a running campaign trusts its local snapshot of the campaign and posh user before reading redis again
+CAMPAIGN_STATE_REFRESH_INTERVAL = 15
+# Updates are pushed to campaigns that listen on their update channels, they only re-read redis as a safety net
+CAMPAIGN_STATE_LISTENING_REFRESH_INTERVAL = 300
+
+REDIS_CLEANER_BATCH_SIZE = 500  # Redis objects checked against the database per query
+REDIS_HELPER_KEY_TTL = 60 * 60 * 24 * 2  # Seconds helper keys such as a listing's photos list are kept
+LISTING_CACHE_TTL = 60 * 60 * 24 * 7  # Seconds a posh user's cached listing urls are kept after their last closet scan
+CLOSET_LOAD_TIMEOUT = 15  # Seconds a closet scan waits for the first listing card to render
+
+# Redis stream that carries instance updates to the database
+INSTANCE_UPDATES_STREAM_MAXLEN = 100000  # Approximate cap, entries are acknowledged long before this is reached
+INSTANCE_UPDATES_BATCH_SIZE = 500
+STREAM_BLOCK_MILLISECONDS = 5000
+
+# Redis stream that carries log messages to the database
+LOG_STREAM_MAXLEN = 1000000
+LOG_BATCH_SIZE = 1000
+
+# Live log tail served to the action log page
+LOG_TAIL_MAXLEN = 1000
+LOG_TAIL_TTL = 60 * 60 * 24 * 2  # Seconds an idle logger's tail is kept
+LOG_TAIL_CONNECTION_SECONDS = 60  # Browsers reconnect with their cursor after this, freeing the worker thread
+LOG_TAIL_KEEPALIVE_SECONDS = 15
+LOG_ENTRIES_PAGE_SIZE = 200  # Entries per page of the action log page, older pages are loaded on demand
+ACTION_LOG_GROUP_PAGE_SIZE = 12  # Logs listed per page when a group on the action logs page is opened
+
+# Log retention, enforced periodically by trim_log_entries
+LOG_ENTRIES_PER_LOGGER = 1000
+LOG_ENTRY_MAX_AGE_DAYS = None  # Also drop entries older than this many days when set
+LOG_TRIM_BATCH_SIZE = 200  # Loggers trimmed per DELETE
+
+# Nightly log cleanup, removes the logs of idle campaigns once they are this old
+LOG_CLEANUP_AGE_DAYS = 2
+LOG_CLEANUP_LOGS_PER_BATCH = 100
+LOG_CLEANUP_ENTRIES_PER_BATCH = 5000  # Upper bound on the rows deleted per transaction
+
+# Proxy slots are handed out as leases, a lease that isn't given back frees its slot once it expires
+PROXY_LEASE_TTL = 60 * 15  # Seconds a granted campaign has to start its task and send the first heartbeat
+PROXY_LEASE_HEARTBEAT_TTL = 90  # Seconds a lease lives past its last heartbeat
+PROXY_LEASE_HEARTBEAT_INTERVAL = 30
+# Campaigns holding a proxy longer than this are treated as stuck and restarted. Campaigns give their proxy back while
+# they wait for their window, so only time spent working on the proxy counts.
+PROXY_LEASE_MAX_SECONDS = 60 * 60
+
+# Campaigns outside of their hours wait on a redis timer instead of holding a worker and a browser
+CAMPAIGN_TIMER_BATCH_SIZE = 500  # Timers claimed per dispatcher run
+# Runs basic sharing and aging campaigns as one short task per action, re-enqueued after the campaign's delay, so
+# workers are only busy while an action runs.
+CAMPAIGN_STEP_TASKS = False
+# Clients of campaigns run in steps kept open per worker process between steps, a step landing on the process that ran
+# its campaign's last step keeps the browser, login and closet snapshot. 0 closes the client after every step.
+CAMPAIGN_STEP_PARKED_CLIENTS = 2
+CAMPAIGN_STEP_CLIENT_IDLE_SECONDS = 60 * 10  # Parked clients not taken back within this are closed
+
+# Browsers kept per worker process for clients without a proxy, so a task doesn't wait on chrome starting up. The
+# pool fills as clients hand their browsers back, a process that never runs a campaign never launches one.
+CHROME_POOL_SIZE = 1  # 0 turns the pool off
+CHROME_POOL_MAX_USES = 20  # Checkouts before a browser is replaced with a fresh one
+
+# Chrome resource profiles, a client's profile decides what its browser loads and how much memory it may use
+CHROME_PROFILES = {
+    # Everything enabled, for the flows that upload photos and need their previews to render
+    'full': {
+        'window_size': (1920, 1080),
+        'block_images': False,
+        'blocked_urls': [],
+        'renderer_process_limit': None,
+        'disk_cache_mb': None,
+    },
+    # No images, fonts or media and a single renderer, for sharing and browsing
+    'lean': {
+        'window_size': (1280, 800),
+        'block_images': True,
+        'blocked_urls': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm', '*.m3u8'],
+        'renderer_process_limit': 1,
+        'disk_cache_mb': 32,
+    },
+}
+CHROME_DEFAULT_PROFILE = 'full'
+# Profiles of the clients that share and browse per campaign mode, registering and listing always use the default
+CHROME_PROFILE_BY_MODE = {
+    '0': 'lean',  # Basic sharing
+    '1': 'lean',  # Advanced sharing, once the account is registered and the item listed
+    '4': 'lean',  # Aging
+}
+# /dev/shm is mounted from the host, turn this on if it's too small for every browser and chrome should use /tmp
+CHROME_DISABLE_DEV_SHM = False
 
 # Celery Settings
 CELERY_BROKER_URL = f'{REDIS_HOST}://{REDIS_HOST}:{REDIS_PORT}'
@@ -186,10 +278,15 @@ CELERY_TASK_ROUTES = {
     'poshmark.tasks.basic_sharing': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.advanced_sharing': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.start_campaign': {'queue': 'no_concurrency', 'routing_key': 'no_concurrency'},
+    'poshmark.tasks.requeue_campaign': {'queue': 'concurrency', 'routing_key': 'concurrency'},
+    'poshmark.tasks.allocate_proxies': {'queue': 'no_concurrency', 'routing_key': 'no_concurrency'},
+    'poshmark.tasks.reclaim_proxy_leases': {'queue': 'no_concurrency', 'routing_key': 'no_concurrency'},
+    'poshmark.tasks.dispatch_campaign_timers': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.restart_task': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.redis_log_reader': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.redis_instance_reader': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.log_cleanup': {'queue': 'concurrency', 'routing_key': 'concurrency'},
+    'poshmark.tasks.trim_log_entries': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.redis_cleaner': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.posh_user_balancer': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.register_gmail': {'queue': 'gmail_registration', 'routing_key': 'gmail_registration'},
@@ -200,6 +297,8 @@ CELERY_TASK_ROUTES = {
     'poshmark.tasks.assign_posh_users': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.list_item': {'queue': 'concurrency', 'routing_key': 'concurrency'},
     'poshmark.tasks.aging': {'queue': 'concurrency', 'routing_key': 'concurrency'},
+    'poshmark.tasks.basic_sharing_step': {'queue': 'concurrency', 'routing_key': 'concurrency'},
+    'poshmark.tasks.aging_step': {'queue': 'concurrency', 'routing_key': 'concurrency'},
 }
 
 # Periodic Tasks
@@ -209,9 +308,24 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(minute=0, hour=0),
         'options': {'queue': 'concurrency'}
     },
+    'trim_log_entries': {
+        'task': 'poshmark.tasks.trim_log_entries',
+        'schedule': crontab(minute='*/5'),
+        'options': {'queue': 'concurrency'}
+    },
     'redis_cleaner': {
         'task': 'poshmark.tasks.redis_cleaner',
         'schedule': crontab(minute='*/10'),
         'options': {'queue': 'concurrency'}
     },
+    'dispatch_campaign_timers': {
+        'task': 'poshmark.tasks.dispatch_campaign_timers',
+        'schedule': crontab(minute='*'),
+        'options': {'queue': 'concurrency'}
+    },
+    'reclaim_proxy_leases': {
+        'task': 'poshmark.tasks.reclaim_proxy_leases',
+        'schedule': crontab(minute='*'),
+        'options': {'queue': 'no_concurrency'}
+    },
 }
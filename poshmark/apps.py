@@ -6,3 +6,7 @@ class PoshmarkConfig(AppConfig):
 
     def ready(self):
         import poshmark.signals
+        from poshmark import serializers
+
+        for model_name in ('PoshUser', 'Campaign', 'Listing', 'PoshProxy'):
+            serializers.compile_plan(self.get_model(model_name))
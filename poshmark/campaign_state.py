@@ -0,0 +1,188 @@
+import logging
+import time
+
+import redis
+from django.conf import settings
+
+from . import redis_store, scheduler
+from .models import PoshUser
+
+
+class CampaignState:
+    """A local snapshot of the redis hashes a running campaign keeps checking (the campaign and its posh user). All the
+    fields are fetched together with one pipelined HMGET and served from memory until the snapshot is older than the
+    refresh interval or is invalidated, writes go through to redis and are applied to the snapshot right away.
+
+    Once listening, updates made anywhere else (e.g. a stop from the web app) are pushed over pub/sub and applied as
+    they arrive, so the periodic refresh only acts as a safety net."""
+    CAMPAIGN_FIELDS = ('id', 'status', 'delay', 'times', 'lowest_price')
+    POSH_USER_FIELDS = (
+        'status', 'is_registered', 'profile_updated', 'username', 'password', 'first_name', 'last_name', 'email',
+        'gender', 'profile_picture', 'header_picture',
+    )
+
+    def __init__(self, redis_campaign_id, redis_posh_user_id, get_redis_object_attr, update_redis_object,
+                 refresh_interval=None):
+        self.redis_campaign_id = redis_campaign_id
+        self.redis_posh_user_id = redis_posh_user_id
+        self.fallback_get = get_redis_object_attr
+        self.fallback_update = update_redis_object
+        self.refresh_interval = refresh_interval if refresh_interval is not None else settings.CAMPAIGN_STATE_REFRESH_INTERVAL
+        self.fields = {
+            redis_campaign_id: self.CAMPAIGN_FIELDS,
+            redis_posh_user_id: self.POSH_USER_FIELDS,
+        }
+        self.values = {}
+        self.refreshed_at = None
+        self.pubsub = None
+
+        self.usage_started_at = time.time()
+        self.usage_start = redis_store.stats.snapshot()
+
+    def refresh(self):
+        """Fetches every tracked field of the campaign and posh user in a single round trip"""
+        pipe = redis_store.pipeline(redis_store.INSTANCE_DB)
+        object_ids = list(self.fields.keys())
+
+        for object_id in object_ids:
+            pipe.hmget(object_id, self.fields[object_id])
+
+        for object_id, values in zip(object_ids, pipe.execute()):
+            self.values[object_id] = dict(zip(self.fields[object_id], values))
+
+        self.refreshed_at = time.time()
+
+    def invalidate(self):
+        """Forces the next read to fetch from redis"""
+        self.refreshed_at = None
+
+    def is_stale(self):
+        refresh_interval = settings.CAMPAIGN_STATE_LISTENING_REFRESH_INTERVAL if self.pubsub else self.refresh_interval
+
+        return self.refreshed_at is None or time.time() - self.refreshed_at >= refresh_interval
+
+    def listen(self):
+        """Subscribes to the update channels of the campaign and posh user"""
+        self.pubsub = redis_store.get_redis(redis_store.INSTANCE_DB).pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(*[redis_store.update_channel(object_id) for object_id in self.fields.keys()])
+        self.refresh()
+
+    def close(self):
+        if self.pubsub:
+            self.pubsub.close()
+            self.pubsub = None
+
+    def apply(self, object_id, fields):
+        if object_id in self.values:
+            for field_name, value in fields.items():
+                if field_name in self.fields[object_id]:
+                    self.values[object_id][field_name] = str(value)
+
+    def is_running(self):
+        return self.campaign_status == '1' and self.posh_user_status != PoshUser.INACTIVE
+
+    def poll(self, timeout=0):
+        """Applies the updates that have been pushed since the last poll, waiting up to timeout seconds for the first
+        one. Returns True if an update was applied."""
+        if not self.pubsub:
+            return False
+
+        applied = False
+        try:
+            message = self.pubsub.get_message(timeout=timeout)
+            while message:
+                if message['type'] == 'message':
+                    self.apply(*redis_store.parse_update(message))
+                    applied = True
+                message = self.pubsub.get_message()
+        except redis.ConnectionError:
+            logging.warning('Lost the campaign update channel, falling back to polling')
+            self.pubsub = None
+            self.invalidate()
+
+        return applied
+
+    def wait(self, seconds):
+        """Sleeps for the given seconds but returns as soon as the campaign is no longer running. Returns True if it
+        was interrupted."""
+        deadline = time.time() + seconds
+
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            if not self.pubsub:
+                time.sleep(remaining)
+                return False
+
+            if self.poll(timeout=remaining) and not self.is_running():
+                return True
+
+    def get(self, object_id, field_name):
+        self.poll()
+
+        if self.is_stale():
+            self.refresh()
+
+        return self.values[object_id][field_name]
+
+    def get_redis_object_attr(self, object_id, field_name=None):
+        """Drop in replacement for tasks.get_redis_object_attr that serves tracked fields from the snapshot"""
+        if field_name and field_name in self.fields.get(object_id, ()):
+            return self.get(object_id, field_name)
+
+        return self.fallback_get(object_id, field_name)
+
+    def update_redis_object(self, object_id, fields):
+        """Drop in replacement for tasks.update_redis_object that also keeps the snapshot current"""
+        self.fallback_update(object_id, fields)
+        self.apply(object_id, fields)
+
+    @property
+    def campaign_status(self):
+        return self.get(self.redis_campaign_id, 'status')
+
+    @property
+    def posh_user_status(self):
+        return self.get(self.redis_posh_user_id, 'status')
+
+    @property
+    def delay(self):
+        return int(self.get(self.redis_campaign_id, 'delay'))
+
+    @property
+    def times(self):
+        return self.get(self.redis_campaign_id, 'times').split(',')
+
+    @property
+    def hour_mask(self):
+        return scheduler.parse_times(self.get(self.redis_campaign_id, 'times'))
+
+    def in_window(self, now):
+        """Whether the campaign is set to run at the given UTC time"""
+        return scheduler.is_active(self.hour_mask, now)
+
+    @property
+    def is_registered(self):
+        return int(self.get(self.redis_posh_user_id, 'is_registered'))
+
+    @property
+    def profile_updated(self):
+        return int(self.get(self.redis_posh_user_id, 'profile_updated'))
+
+    def report_command_usage(self, logger, force=False):
+        """Logs the redis commands this process issued per campaign hour, once an hour has passed or when forced.
+        Celery's prefork pool runs one campaign per process so the process wide counter is the campaign's."""
+        elapsed = time.time() - self.usage_started_at
+
+        if elapsed >= 3600 or (force and elapsed > 0):
+            commands, round_trips = redis_store.stats.snapshot()
+            hours = elapsed / 3600
+            commands = commands - self.usage_start[0]
+            round_trips = round_trips - self.usage_start[1]
+
+            logger.debug(f'Redis usage: {round(commands / hours)} commands and {round(round_trips / hours)} round trips '
+                         f'per campaign hour ({commands} commands over {round(elapsed / 60, 1)} minutes)')
+
+            self.usage_started_at = time.time()
+            self.usage_start = redis_store.stats.snapshot()
@@ -9,6 +9,8 @@ import traceback
 from pathlib import Path
 
 import requests
+from celery.signals import worker_process_shutdown
+from django.conf import settings
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.chrome.options import Options
@@ -19,7 +21,10 @@ from selenium.webdriver.common.proxy import Proxy, ProxyType
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from poshmark.listing_cache import ListingCache
 from poshmark.models import PoshUser
+from .closet import ClosetSnapshot
+from .pool import get_driver_pool, get_parked_clients
 
 
 class Logger:
@@ -313,7 +318,8 @@ class PhoneNumber:
 
 
 class BaseClient:
-    def __init__(self, logger_id, log_function, proxy_ip=None, proxy_port=None, cookies_filename=False):
+    def __init__(self, logger_id, log_function, proxy_ip=None, proxy_port=None, cookies_filename=False,
+                 wait_function=None, driver_pool=None, profile=None):
         proxy = Proxy()
         hostname = proxy_ip if proxy_ip and proxy_port else ''
         port = proxy_port if proxy_ip and proxy_port else ''
@@ -323,8 +329,9 @@ class BaseClient:
             proxy.http_proxy = f'{hostname}:{port}'
             proxy.ssl_proxy = f'{hostname}:{port}'
 
-        capabilities = webdriver.DesiredCapabilities.CHROME
-        proxy.add_to_capabilities(capabilities)
+        # A copy, the shared defaults would otherwise carry this client's proxy into every browser the process launches
+        self.capabilities = webdriver.DesiredCapabilities.CHROME.copy()
+        proxy.add_to_capabilities(self.capabilities)
 
         self.web_driver = None
         self.web_driver_options = Options()
@@ -337,7 +344,22 @@ class BaseClient:
         self.web_driver_options.add_argument('--incognito')
         self.web_driver_options.add_argument('--no-sandbox')
 
+        profile_name = profile or settings.CHROME_DEFAULT_PROFILE
+        self.profile = settings.CHROME_PROFILES[profile_name]
+        if self.profile['block_images']:
+            self.web_driver_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        if self.profile['renderer_process_limit']:
+            self.web_driver_options.add_argument(f'--renderer-process-limit={self.profile["renderer_process_limit"]}')
+        if self.profile['disk_cache_mb']:
+            self.web_driver_options.add_argument(f'--disk-cache-size={self.profile["disk_cache_mb"] * 1024 * 1024}')
+        if settings.CHROME_DISABLE_DEV_SHM:
+            self.web_driver_options.add_argument('--disable-dev-shm-usage')
+
         self.logger = Logger(logger_id, log_function)
+        self.wait_function = wait_function
+        # Browsers behind a proxy are launched for their client alone, the proxy is fixed when chrome starts
+        self.driver_pool = driver_pool if not proxy_ip else None
+        self.pool_key = profile_name
         self.cookies_filename = cookies_filename
         self.cookies_loaded = False
         self.cookies_saved = False
@@ -350,17 +372,38 @@ class BaseClient:
     def __exit__(self, *args, **kwargs):
         self.close()
 
-    def open(self):
-        """Used to open the selenium web driver session"""
-        self.web_driver = webdriver.Chrome('/poshmark/chrome_clients/chromedriver', options=self.web_driver_options)
-        self.web_driver.implicitly_wait(15)
-        self.web_driver.set_page_load_timeout(300)
+    def launch(self):
+        """Starts a new selenium web driver session"""
+        web_driver = webdriver.Chrome('/poshmark/chrome_clients/chromedriver', options=self.web_driver_options,
+                                      desired_capabilities=self.capabilities)
+        web_driver.implicitly_wait(15)
+        web_driver.set_page_load_timeout(300)
         if '--headless' in self.web_driver_options.arguments:
-            self.web_driver.set_window_size(1920, 1080)
+            web_driver.set_window_size(*self.profile['window_size'])
+        if self.profile['blocked_urls']:
+            web_driver.execute_cdp_cmd('Network.enable', {})
+            web_driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.profile['blocked_urls']})
+
+        return web_driver
 
-    def close(self):
-        """Closes the selenium web driver session"""
-        self.web_driver.quit()
+    def open(self):
+        """Used to open the selenium web driver session, taken from the driver pool when the client has one"""
+        if self.driver_pool:
+            self.web_driver = self.driver_pool.checkout(self.pool_key, self.launch)
+        else:
+            self.web_driver = self.launch()
+
+    def close(self, discard=False):
+        """Closes the selenium web driver session, or hands it back to the driver pool unless discard is set. Does
+        nothing if the session is already closed."""
+        if self.web_driver is None:
+            return
+
+        if self.driver_pool and not discard:
+            self.driver_pool.checkin(self.pool_key, self.web_driver)
+        else:
+            self.web_driver.quit()
+        self.web_driver = None
 
     def locate(self, by, locator, location_type=None):
         """Locates the first elements with the given By"""
@@ -394,9 +437,10 @@ class BaseClient:
             return False
         return True
 
-    def sleep(self, lower, upper=None):
+    def sleep(self, lower, upper=None, interruptible=False):
         """Will simply sleep and log the amount that is sleeping for, can also be randomized amount of time if given the
-        upper value"""
+        upper value. An interruptible sleep is handed to the wait function so it can end early, returns True if it
+        did"""
         seconds = random.randint(lower, upper) if upper else lower
 
         if seconds > 60:
@@ -407,7 +451,11 @@ class BaseClient:
             word = 'second' if seconds == 1 else 'seconds'
 
         self.logger.info(f'Sleeping for about {round(duration, 2)} {word}')
+        if interruptible and self.wait_function:
+            return self.wait_function(seconds)
+
         time.sleep(seconds)
+        return False
 
     def save_cookies(self):
         self.logger.info('Saving cookies')
@@ -433,12 +481,25 @@ class BaseClient:
             self.logger.warning('Cookies not loaded: Cookie file not found')
 
 
+@worker_process_shutdown.connect
+def close_driver_pool(**kwargs):
+    # Parked clients hand their browsers back to the pool, so they go first
+    parked_clients = get_parked_clients()
+    if parked_clients:
+        parked_clients.close()
+
+    driver_pool = get_driver_pool()
+
+    if driver_pool:
+        driver_pool.close()
+
+
 class PoshMarkClient(BaseClient):
     def __init__(self, redis_posh_user_id, redis_campaign_id, logger_id, log_function, get_redis_object_attr,
-                 update_redis_object, redis_proxy_id=None):
+                 update_redis_object, redis_proxy_id=None, wait_function=None, profile=None):
         hostname = get_redis_object_attr(redis_proxy_id, 'ip') if redis_proxy_id else ''
         port = get_redis_object_attr(redis_proxy_id, 'port') if redis_proxy_id else ''
-        super(PoshMarkClient, self).__init__(logger_id, log_function, hostname, port, cookies_filename=get_redis_object_attr(redis_posh_user_id, "username"))
+        super(PoshMarkClient, self).__init__(logger_id, log_function, hostname, port, cookies_filename=get_redis_object_attr(redis_posh_user_id, "username"), wait_function=wait_function, driver_pool=get_driver_pool(), profile=profile)
 
         self.redis_posh_user_id = redis_posh_user_id
         self.redis_campaign_id = redis_campaign_id
@@ -449,6 +510,8 @@ class PoshMarkClient(BaseClient):
         }
         self.last_login = None
         self.login_error = None
+        self.closet = None
+        self.listing_cache = ListingCache(get_redis_object_attr(redis_posh_user_id, 'username'))
 
     def check_for_errors(self):
         """This will check for errors on the current page and handle them as necessary"""
@@ -515,14 +578,9 @@ class PoshMarkClient(BaseClient):
         try:
             self.logger.info(f'Checking for "{listing_title}" listing')
 
-            self.go_to_closet()
-
-            if self.is_present(By.CLASS_NAME, 'tile__title'):
-                titles = self.locate_all(By.CLASS_NAME, 'tile__title')
-                for title in titles:
-                    if listing_title in title.text:
-                        self.logger.info(f'"{listing_title}" listing found')
-                        return True
+            if self.get_closet().find(listing_title):
+                self.logger.info(f'"{listing_title}" listing found')
+                return True
 
             self.logger.warning(f'"{listing_title}" listing not found')
 
@@ -536,53 +594,44 @@ class PoshMarkClient(BaseClient):
         try:
             self.logger.info(f'Checking the timestamp on following item: {listing_title}')
 
-            self.go_to_closet()
-
-            if self.check_listing(listing_title):
-                listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-                for listed_item in listed_items:
-                    title = listed_item.find_element_by_class_name('tile__title')
-                    if title.text == listing_title:
-                        listing_button = listed_item.find_element_by_class_name('tile__covershot')
-                        listing_button.click()
-
-                        self.sleep(1)
+            if self.open_listing(listing_title):
+                self.sleep(1)
 
-                        timestamp_element = self.locate(
-                            By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[1]/div/header/div/div/div/div[2]'
-                        )
-                        timestamp = timestamp_element.text
-
-                        timestamp = timestamp[8:]
-                        elapsed_time = 9001
-                        unit = 'DECADES'
-
-                        space_index = timestamp.find(' ')
-
-                        if timestamp == 'now':
-                            elapsed_time = 0
-                        elif timestamp[:space_index] == 'a':
-                            elapsed_time = 60
-                        elif timestamp[:space_index].isnumeric():
-                            offset = space_index + 1
-                            second_space_index = timestamp[offset:].find(' ') + offset
-                            unit = timestamp[offset:second_space_index]
-
-                            if unit == 'secs':
-                                elapsed_time = int(timestamp[:space_index])
-                            elif unit == 'mins':
-                                elapsed_time = int(timestamp[:space_index]) * 60
-                            elif unit == 'hours':
-                                elapsed_time = int(timestamp[:space_index]) * 60 * 60
-
-                        if elapsed_time > 25:
-                            self.logger.error(f'Sharing does not seem to be working '
-                                              f'Elapsed Time: {elapsed_time} {unit}')
-                            return False
-                        else:
-                            self.logger.info(f'Shared successfully')
+                timestamp_element = self.locate(
+                    By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[1]/div/header/div/div/div/div[2]'
+                )
+                timestamp = timestamp_element.text
+
+                timestamp = timestamp[8:]
+                elapsed_time = 9001
+                unit = 'DECADES'
+
+                space_index = timestamp.find(' ')
+
+                if timestamp == 'now':
+                    elapsed_time = 0
+                elif timestamp[:space_index] == 'a':
+                    elapsed_time = 60
+                elif timestamp[:space_index].isnumeric():
+                    offset = space_index + 1
+                    second_space_index = timestamp[offset:].find(' ') + offset
+                    unit = timestamp[offset:second_space_index]
+
+                    if unit == 'secs':
+                        elapsed_time = int(timestamp[:space_index])
+                    elif unit == 'mins':
+                        elapsed_time = int(timestamp[:space_index]) * 60
+                    elif unit == 'hours':
+                        elapsed_time = int(timestamp[:space_index]) * 60 * 60
+
+                if elapsed_time > 25:
+                    self.logger.error(f'Sharing does not seem to be working '
+                                      f'Elapsed Time: {elapsed_time} {unit}')
+                    return False
+                else:
+                    self.logger.info(f'Shared successfully')
 
-                            return True
+                    return True
             else:
                 if self.check_inactive():
                     self.update_redis_object(self.redis_posh_user_id, {'status': PoshUser.INACTIVE})
@@ -596,7 +645,10 @@ class PoshMarkClient(BaseClient):
         try:
             self.logger.info(f'Checking is the following user is inactive: {self.get_redis_object_attr(self.redis_posh_user_id, "username")}')
 
-            self.go_to_closet()
+            closet = self.load_closet()
+            if not closet.complete:
+                # The page may just have been slow, only a closet that renders no cards twice counts as empty
+                closet = self.load_closet()
 
             listing_count_element = self.locate(
                 By.XPATH, '//*[@id="content"]/div/div[1]/div/div[2]/div/div[2]/nav/ul/li[1]/a'
@@ -605,7 +657,7 @@ class PoshMarkClient(BaseClient):
             index = listing_count.find('\n')
             total_listings = int(listing_count[:index])
 
-            if total_listings > 0 and not self.is_present(By.CLASS_NAME, 'card--small'):
+            if total_listings > 0 and not closet:
                 self.logger.warning('This user does not seem to be active, setting inactive')
                 self.update_redis_object(self.redis_posh_user_id, {'status': PoshUser.INACTIVE})
                 return True
@@ -621,38 +673,29 @@ class PoshMarkClient(BaseClient):
         try:
             self.logger.info(f'Deleting the following item: {listing_title}')
 
-            self.go_to_closet()
-
-            if self.check_listing(listing_title):
-                listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-                for listed_item in listed_items:
-                    title = listed_item.find_element_by_class_name('tile__title')
-                    if title.text == listing_title:
-                        listing_button = listed_item.find_element_by_class_name('tile__covershot')
-                        listing_button.click()
-
-                        self.sleep(1)
+            if self.open_listing(listing_title):
+                self.sleep(1)
 
-                        edit_listing_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[1]/a')
-                        edit_listing_button.click()
+                edit_listing_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[1]/a')
+                edit_listing_button.click()
 
-                        self.sleep(1, 2)
+                self.sleep(1, 2)
 
-                        delete_listing_button = self.locate(
-                            By.XPATH, '//*[@id="content"]/div/div[1]/div/div[2]/div/a[1]'
-                        )
-                        delete_listing_button.click()
-
-                        self.sleep(1)
+                delete_listing_button = self.locate(
+                    By.XPATH, '//*[@id="content"]/div/div[1]/div/div[2]/div/a[1]'
+                )
+                delete_listing_button.click()
 
-                        primary_buttons = self.locate_all(By.CLASS_NAME, 'btn--primary')
-                        for primary_button in primary_buttons:
-                            if primary_button.text == 'Yes':
-                                primary_button.click()
+                self.sleep(1)
 
-                        self.sleep(5)
+                primary_buttons = self.locate_all(By.CLASS_NAME, 'btn--primary')
+                for primary_button in primary_buttons:
+                    if primary_button.text == 'Yes':
+                        primary_button.click()
+                        self.closet = None
+                        self.listing_cache.forget(listing_title)
 
-                        break
+                self.sleep(5)
             else:
                 self.logger.error('Could not find listing - It does not exist')
 
@@ -877,19 +920,26 @@ class PoshMarkClient(BaseClient):
             self.login_error = True
             return False
 
+    def ensure_logged_in(self):
+        """Checks the user is still logged in at most once an hour, logging in again if not"""
+        current_time = datetime.datetime.now()
+        log_in_attempts = 0
+        if self.last_login is None or self.last_login <= current_time - datetime.timedelta(hours=1) or self.login_error:
+            if not self.check_logged_in():
+                while not self.log_in() and log_in_attempts < 2:
+                    self.logger.warning('Could not log in, trying again.')
+                    log_in_attempts += 1
+                if log_in_attempts >= 2:
+                    self.update_redis_object(self.redis_campaign_id, {'status': '5'})
+                    # The browser may be what's failing, carry on in a fresh one rather than one back from the pool
+                    self.close(discard=True)
+                    self.open()
+                    self.cookies_loaded = False
+
     def go_to_closet(self):
         """Ensures the current url for the web driver is at users poshmark closet"""
         try:
-            current_time = datetime.datetime.now()
-            log_in_attempts = 0
-            if self.last_login is None or self.last_login <= current_time - datetime.timedelta(hours=1) or self.login_error:
-                if not self.check_logged_in():
-                    while not self.log_in() and log_in_attempts < 2:
-                        self.logger.warning('Could not log in, trying again.')
-                        log_in_attempts += 1
-                    if log_in_attempts >= 2:
-                        self.update_redis_object(self.redis_campaign_id, {'status': '5'})
-                        self.close()
+            self.ensure_logged_in()
 
             if self.web_driver.current_url != f'https://poshmark.com/closet/{self.get_redis_object_attr(self.redis_posh_user_id, "username")}':
                 self.web_driver.get(f'https://poshmark.com/closet/{self.get_redis_object_attr(self.redis_posh_user_id, "username")}')
@@ -910,6 +960,70 @@ class PoshMarkClient(BaseClient):
             if not self.check_logged_in():
                 self.log_in()
 
+    def load_closet(self):
+        """Goes to the user's closet and takes a new snapshot of its listings"""
+        self.go_to_closet()
+
+        closet = ClosetSnapshot.extract(self.web_driver)
+        if not closet.complete:
+            # Not kept, so the next get_closet tries the closet again rather than taking it as empty
+            self.logger.warning('No listings rendered on the closet page')
+            self.closet = None
+            return closet
+
+        self.closet = closet
+        if self.closet:
+            self.listing_cache.save(self.closet.listings.values())
+
+        return self.closet
+
+    def get_closet(self):
+        """Returns the snapshot of the user's closet, only loading the closet when there is none. Anything that changes
+        the closet sets self.closet to None so the next call sees the change."""
+        if self.closet is None:
+            return self.load_closet()
+
+        return self.closet
+
+    def closet_card(self, listing_title):
+        """Returns the card of a listing on the closet page, reloading the closet only if the browser has left the page
+        the snapshot was taken on. None if the closet doesn't have the listing."""
+        closet = self.get_closet()
+        card = closet.card(listing_title)
+
+        if card is None and listing_title in closet:
+            card = self.load_closet().card(listing_title)
+
+        return card
+
+    def open_listing(self, listing_title):
+        """Goes straight to a listing's page and returns the listing, with its title, url and price. The url comes from
+        the closet snapshot or, when the client has none yet, from the listing cache. Falls back to scanning the closet
+        when the cache misses or its url doesn't lead to the listing, returns None if the closet doesn't have it."""
+        if self.closet is None:
+            listing = self.listing_cache.get(listing_title)
+            if listing:
+                self.ensure_logged_in()
+                self.web_driver.get(listing['url'])
+                if listing_title in self.web_driver.title:
+                    return listing
+
+                self.logger.warning(f'The cached url of "{listing_title}" is out of date, scanning the closet')
+                self.listing_cache.forget(listing_title)
+
+        listing = self.get_closet().get(listing_title)
+
+        if listing is None:
+            return None
+
+        if listing['url']:
+            self.web_driver.get(listing['url'])
+        else:
+            listing_button = self.closet_card(listing_title).find_element_by_class_name('tile__covershot')
+            listing_button.click()
+
+        return listing
+
     def get_all_listings(self):
         """Goes to a user's closet and returns a list of all the listings, excluding Ones that have an inventory tag"""
         try:
@@ -919,23 +1033,12 @@ class PoshMarkClient(BaseClient):
 
             self.logger.info('Getting all listings')
 
-            self.go_to_closet()
-
-            if self.is_present(By.CLASS_NAME, 'card--small'):
-                listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-                for listed_item in listed_items:
-                    title = listed_item.find_element_by_class_name('tile__title')
-                    try:
-                        icon = listed_item.find_element_by_class_name('inventory-tag__text')
-                    except NoSuchElementException:
-                        icon = None
+            closet = self.load_closet()
 
-                    if not icon:
-                        shareable_listings.append(title.text)
-                    elif icon.text == 'SOLD':
-                        sold_listings.append(title.text)
-                    elif icon.text == 'RESERVED':
-                        reserved_listings.append(title.text)
+            if closet:
+                shareable_listings = closet.titles()
+                sold_listings = closet.titles('SOLD')
+                reserved_listings = closet.titles('RESERVED')
 
                 if shareable_listings:
                     self.logger.info(f"Found the following listings: {','.join(shareable_listings)}")
@@ -1015,6 +1118,7 @@ class PoshMarkClient(BaseClient):
 
     def list_item(self, redis_listing_id=None):
         """Will list an item on poshmark for the user"""
+        self.closet = None
         try:
             if redis_listing_id:
                 listing_title = self.get_redis_object_attr(redis_listing_id, 'title')
@@ -1032,14 +1136,11 @@ class PoshMarkClient(BaseClient):
             else:
                 self.logger.info('Creating a fake listing, checking if there is one made first.')
                 self.go_to_closet()
+                fake_title = ClosetSnapshot.extract(self.web_driver).find('[FKE]')
 
-                if self.is_present(By.CLASS_NAME, 'card--small'):
-                    listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-                    for listed_item in listed_items:
-                        title = listed_item.find_element_by_class_name('tile__title')
-                        if '[FKE]' in title.text:
-                            self.logger.info('There is a fake listing already there, using that one')
-                            return title.text
+                if fake_title:
+                    self.logger.info('There is a fake listing already there, using that one')
+                    return fake_title
 
                 lowercase = string.ascii_lowercase
                 uppercase = string.ascii_uppercase
@@ -1324,6 +1425,7 @@ class PoshMarkClient(BaseClient):
                 self.log_in()
 
     def update_listing(self, current_title, **kwargs):
+        self.closet = None
         try:
             listing_brand = kwargs.pop('brand', None)
             listing_title = kwargs.pop('title', None)
@@ -1337,241 +1439,239 @@ class PoshMarkClient(BaseClient):
             listing_listing_price = kwargs.pop('listing_price', None)
             listing_photos = kwargs.pop('photos', None)
 
-            self.go_to_closet()
-
             self.logger.info(f'Updating the following listing: {current_title}')
 
-            listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-            for listed_item in listed_items:
-                title = listed_item.find_element_by_class_name('tile__title')
-                if '[FKE]' in title.text or current_title == title.text:
-                    listing_button = listed_item.find_element_by_class_name('tile__covershot')
-                    listing_button.click()
-
-                    self.sleep(3)
+            # A listing that was just made may still be the fake listing it replaces
+            listing = self.open_listing(current_title)
+            if not listing and self.get_closet().find('[FKE]'):
+                listing = self.open_listing(self.get_closet().find('[FKE]'))
 
-                    edit_listing_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[1]/a')
-                    edit_listing_button.click()
+            if listing:
+                self.sleep(3)
 
-                    self.sleep(5)
+                edit_listing_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[1]/a')
+                edit_listing_button.click()
 
-                    if listing_category and listing_subcategory:
-                        self.logger.info('Updating category')
+                self.sleep(5)
 
-                        self.web_driver.execute_script("window.scrollTo(0, 1280);")
+                if listing_category and listing_subcategory:
+                    self.logger.info('Updating category')
 
-                        category_dropdown = self.locate(
-                            By.XPATH,
-                            '//*[@id="content"]/div/div[1]/div/section[3]/div/div[2]/div[1]/div/div[1]'
+                    self.web_driver.execute_script("window.scrollTo(0, 1280);")
 
-                        )
-                        category_dropdown.click()
+                    category_dropdown = self.locate(
+                        By.XPATH,
+                        '//*[@id="content"]/div/div[1]/div/section[3]/div/div[2]/div[1]/div/div[1]'
 
-                        space_index = listing_category.find(' ')
-                        primary_category = listing_category[:space_index]
-                        secondary_category = listing_category[space_index + 1:]
-                        primary_categories = self.locate_all(By.CLASS_NAME, 'p--l--7')
-                        for category in primary_categories:
-                            if category.text == primary_category:
-                                category.click()
-                                break
+                    )
+                    category_dropdown.click()
+
+                    space_index = listing_category.find(' ')
+                    primary_category = listing_category[:space_index]
+                    secondary_category = listing_category[space_index + 1:]
+                    primary_categories = self.locate_all(By.CLASS_NAME, 'p--l--7')
+                    for category in primary_categories:
+                        if category.text == primary_category:
+                            category.click()
+                            break
 
-                        secondary_categories = self.locate_all(By.CLASS_NAME, 'p--l--7')
-                        for category in secondary_categories[1:]:
-                            if category.text == secondary_category:
-                                category.click()
-                                break
+                    secondary_categories = self.locate_all(By.CLASS_NAME, 'p--l--7')
+                    for category in secondary_categories[1:]:
+                        if category.text == secondary_category:
+                            category.click()
+                            break
 
-                        self.logger.info('Category Updated')
+                    self.logger.info('Category Updated')
 
-                        self.logger.info('Updating subcategory')
+                    self.logger.info('Updating subcategory')
 
-                        subcategory_menu = self.locate(By.CLASS_NAME, 'dropdown__menu--expanded')
-                        subcategories = subcategory_menu.find_elements_by_tag_name('a')
-                        subcategory = listing_subcategory
-                        for available_subcategory in subcategories:
-                            if available_subcategory.text == subcategory:
-                                available_subcategory.click()
-                                break
+                    subcategory_menu = self.locate(By.CLASS_NAME, 'dropdown__menu--expanded')
+                    subcategories = subcategory_menu.find_elements_by_tag_name('a')
+                    subcategory = listing_subcategory
+                    for available_subcategory in subcategories:
+                        if available_subcategory.text == subcategory:
+                            available_subcategory.click()
+                            break
 
-                        self.logger.info('Subcategory updated')
+                    self.logger.info('Subcategory updated')
 
-                    if listing_size:
-                        self.logger.info('Updating size')
-                        size_dropdown = self.locate(
-                            By.XPATH, '//*[@id="content"]/div/div[1]/div[2]/section[4]/div[2]/div[2]/div[1]/div/div[2]/div[1]/div'
-                        )
-                        size_dropdown.click()
-                        size_buttons = self.locate_all(By.CLASS_NAME, 'navigation--horizontal__tab')
+                if listing_size:
+                    self.logger.info('Updating size')
+                    size_dropdown = self.locate(
+                        By.XPATH, '//*[@id="content"]/div/div[1]/div[2]/section[4]/div[2]/div[2]/div[1]/div/div[2]/div[1]/div'
+                    )
+                    size_dropdown.click()
+                    size_buttons = self.locate_all(By.CLASS_NAME, 'navigation--horizontal__tab')
 
-                        for button in size_buttons:
-                            if button.text == 'Custom':
-                                button.click()
-                                break
+                    for button in size_buttons:
+                        if button.text == 'Custom':
+                            button.click()
+                            break
 
-                        custom_size_input = self.locate(By.ID, 'customSizeInput0')
-                        save_button = self.locate(
-                            By.XPATH,
-                            '//*[@id="content"]/div/div[1]/div[2]/section[4]/div[2]/div[2]/div[1]/div/div[2]/div[2]/div/div/div[1]/ul/li/div/div/button'
-                        )
-                        done_button = self.locate(
-                            By.XPATH,
-                            '//*[@id="content"]/div/div[1]/div[2]/section[4]/div[2]/div[2]/div[1]/div/div[2]/div[2]/div/div/div[2]/button'
-                        )
-                        size = listing_size
-                        custom_size_input.send_keys(size)
-                        save_button.click()
-                        done_button.click()
+                    custom_size_input = self.locate(By.ID, 'customSizeInput0')
+                    save_button = self.locate(
+                        By.XPATH,
+                        '//*[@id="content"]/div/div[1]/div[2]/section[4]/div[2]/div[2]/div[1]/div/div[2]/div[2]/div/div/div[1]/ul/li/div/div/button'
+                    )
+                    done_button = self.locate(
+                        By.XPATH,
+                        '//*[@id="content"]/div/div[1]/div[2]/section[4]/div[2]/div[2]/div[1]/div/div[2]/div[2]/div/div/div[2]/button'
+                    )
+                    size = listing_size
+                    custom_size_input.send_keys(size)
+                    save_button.click()
+                    done_button.click()
 
-                        self.logger.info('Size updated')
+                    self.logger.info('Size updated')
 
-                    if listing_cover_photo:
-                        self.logger.info('Updating Cover Photo')
-                        cover_photo = self.locate(By.XPATH,
-                                                  '//*[@id="imagePlaceholder"]/div/div/label/div[1]/div/div')
-                        cover_photo.click()
+                if listing_cover_photo:
+                    self.logger.info('Updating Cover Photo')
+                    cover_photo = self.locate(By.XPATH,
+                                              '//*[@id="imagePlaceholder"]/div/div/label/div[1]/div/div')
+                    cover_photo.click()
 
-                        cover_photo_field = self.locate(
-                            By.XPATH,
-                            '//*[@id="imagePlaceholder"]/div[2]/div[2]/div[1]/div/div/div/div[2]/div/span/label/input'
-                        )
-                        cover_photo_field.send_keys(listing_cover_photo)
+                    cover_photo_field = self.locate(
+                        By.XPATH,
+                        '//*[@id="imagePlaceholder"]/div[2]/div[2]/div[1]/div/div/div/div[2]/div/span/label/input'
+                    )
+                    cover_photo_field.send_keys(listing_cover_photo)
 
-                        self.sleep(1)
+                    self.sleep(1)
 
-                        apply_button = self.locate(
-                            By.XPATH,
-                            '//*[@id="imagePlaceholder"]/div[2]/div[2]/div[2]/div/button[2]'
-                        )
-                        apply_button.click()
+                    apply_button = self.locate(
+                        By.XPATH,
+                        '//*[@id="imagePlaceholder"]/div[2]/div[2]/div[2]/div/button[2]'
+                    )
+                    apply_button.click()
                         
-                        self.logger.info('Cover photo updated')
+                    self.logger.info('Cover photo updated')
                         
-                        self.sleep(1)
+                    self.sleep(1)
 
-                    if listing_photos:
-                        self.logger.info('Updating photos (Not the cover photo)')
+                if listing_photos:
+                    self.logger.info('Updating photos (Not the cover photo)')
 
-                        for photo in listing_photos:
-                            upload_photos_field = self.locate(By.ID, 'img-file-input')
-                            upload_photos_field.clear()
-                            upload_photos_field.send_keys(photo)
-                            self.sleep(1)
+                    for photo in listing_photos:
+                        upload_photos_field = self.locate(By.ID, 'img-file-input')
+                        upload_photos_field.clear()
+                        upload_photos_field.send_keys(photo)
+                        self.sleep(1)
 
-                        self.logger.info('Photos uploaded')
+                    self.logger.info('Photos uploaded')
 
-                    if listing_listing_price and listing_original_price:
-                        self.logger.info('Updating Price')
+                if listing_listing_price and listing_original_price:
+                    self.logger.info('Updating Price')
 
-                        input_fields = self.locate_all(By.TAG_NAME, 'input')
-                        for input_field in input_fields:
-                            if input_field.get_attribute('data-vv-name') == 'originalPrice':
-                                original_price_field = input_field
-                            if input_field.get_attribute('data-vv-name') == 'listingPrice':
-                                listing_price_field = input_field
+                    input_fields = self.locate_all(By.TAG_NAME, 'input')
+                    for input_field in input_fields:
+                        if input_field.get_attribute('data-vv-name') == 'originalPrice':
+                            original_price_field = input_field
+                        if input_field.get_attribute('data-vv-name') == 'listingPrice':
+                            listing_price_field = input_field
 
-                        original_price_field.clear()
-                        original_price_field.send_keys(listing_original_price)
+                    original_price_field.clear()
+                    original_price_field.send_keys(listing_original_price)
 
-                        listing_price_field.clear()
-                        listing_price_field.send_keys(listing_listing_price)
+                    listing_price_field.clear()
+                    listing_price_field.send_keys(listing_listing_price)
 
-                        self.logger.info('Price Updated')
+                    self.logger.info('Price Updated')
 
-                    if listing_title:
-                        self.logger.info('Updating Title')
+                if listing_title:
+                    self.logger.info('Updating Title')
 
-                        title_field = self.locate(
-                            By.XPATH,
-                            '//*[@id="content"]/div/div[1]/div/section[2]/div[1]/div[2]/div/div[1]/div/div/input'
-                        )
+                    title_field = self.locate(
+                        By.XPATH,
+                        '//*[@id="content"]/div/div[1]/div/section[2]/div[1]/div[2]/div/div[1]/div/div/input'
+                    )
 
-                        title_field.clear()
-                        title_field.send_keys(listing_title)
+                    title_field.clear()
+                    title_field.send_keys(listing_title)
 
-                        self.logger.info('Title Updated')
+                    self.logger.info('Title Updated')
 
-                    if listing_description:
-                        self.logger.info('Updating Description')
+                if listing_description:
+                    self.logger.info('Updating Description')
 
-                        description_field = self.locate(
-                            By.XPATH, '//*[@id="content"]/div/div[1]/div/section[2]/div[2]/div[2]/textarea'
-                        )
-                        description_field.clear()
-                        for part in listing_description.split('\n'):
-                            description_field.send_keys(part)
-                            ActionChains(self.web_driver).key_down(Keys.SHIFT).key_down(Keys.ENTER).key_up(
-                                Keys.SHIFT).key_up(
-                                Keys.ENTER).perform()
+                    description_field = self.locate(
+                        By.XPATH, '//*[@id="content"]/div/div[1]/div/section[2]/div[2]/div[2]/textarea'
+                    )
+                    description_field.clear()
+                    for part in listing_description.split('\n'):
+                        description_field.send_keys(part)
+                        ActionChains(self.web_driver).key_down(Keys.SHIFT).key_down(Keys.ENTER).key_up(
+                            Keys.SHIFT).key_up(
+                            Keys.ENTER).perform()
 
-                        self.logger.info('Description Updated')
+                    self.logger.info('Description Updated')
 
-                    if listing_tags:
-                        tags_button = self.locate(
-                            By.XPATH,
-                            '//*[@id="content"]/div/div[1]/div/section[5]/div/div[2]/div[1]/button[1]',
-                            'clickable'
-                        )
-                        self.web_driver.execute_script("arguments[0].click();", tags_button)
+                if listing_tags:
+                    tags_button = self.locate(
+                        By.XPATH,
+                        '//*[@id="content"]/div/div[1]/div/section[5]/div/div[2]/div[1]/button[1]',
+                        'clickable'
+                    )
+                    self.web_driver.execute_script("arguments[0].click();", tags_button)
 
-                    if listing_brand:
-                        self.logger.info('Updating Brand')
-                        brand_field = self.locate(
-                            By.XPATH,
-                            '//*[@id="content"]/div/div[1]/div/section[6]/div/div[2]/div[1]/div[1]/div/input'
-                        )
+                if listing_brand:
+                    self.logger.info('Updating Brand')
+                    brand_field = self.locate(
+                        By.XPATH,
+                        '//*[@id="content"]/div/div[1]/div/section[6]/div/div[2]/div[1]/div[1]/div/input'
+                    )
 
-                        brand_field.clear()
-                        brand_field.send_keys(listing_brand)
-                        self.logger.info('Brand Updated')
+                    brand_field.clear()
+                    brand_field.send_keys(listing_brand)
+                    self.logger.info('Brand Updated')
 
-                    update_button = self.locate(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[2]/button')
-                    update_button.click()
+                update_button = self.locate(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[2]/button')
+                update_button.click()
+                self.listing_cache.forget(listing['title'])
 
-                    self.sleep(1)
+                self.sleep(1)
 
-                    list_item_button = self.locate(
-                        By.XPATH, '//*[@id="content"]/div/div[1]/div/div[3]/div[2]/div[2]/div[2]/button'
-                    )
-                    list_item_button.click()
+                list_item_button = self.locate(
+                    By.XPATH, '//*[@id="content"]/div/div[1]/div/div[3]/div[2]/div[2]/div[2]/button'
+                )
+                list_item_button.click()
 
-                    # if self.is_present(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[7]/div[1]/div[2]/div[3]/div/button[2]'):
-                    #     self.logger.warning('Certify Listing pop up came up')
-                    #
-                    #     certify_listing_button = self.locate(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[7]/div[1]/div[2]/div[3]/div/button[2]')
-                    #     certify_listing_button.click()
-                    #
-                    #     self.logger.info('Clicked Certify Listing button')
-                    #
-                    #     self.sleep(1)
-                    #
-                    #     certify_button = self.locate(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[7]/div[1]/div[2]/div[3]/div/button[2]')
-                    #     certify_button.click()
-                    #
-                    #     self.logger.info('Clicked certify button')
-                    # else:
-                    #     self.logger.info('Certify listing did not come up')
+                # if self.is_present(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[7]/div[1]/div[2]/div[3]/div/button[2]'):
+                #     self.logger.warning('Certify Listing pop up came up')
+                #
+                #     certify_listing_button = self.locate(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[7]/div[1]/div[2]/div[3]/div/button[2]')
+                #     certify_listing_button.click()
+                #
+                #     self.logger.info('Clicked Certify Listing button')
+                #
+                #     self.sleep(1)
+                #
+                #     certify_button = self.locate(By.XPATH, '//*[@id="content"]/div/div[1]/div/div[7]/div[1]/div[2]/div[3]/div/button[2]')
+                #     certify_button.click()
+                #
+                #     self.logger.info('Clicked certify button')
+                # else:
+                #     self.logger.info('Certify listing did not come up')
 
-                    sell_button = self.is_present(By.XPATH, '//*[@id="app"]/header/nav[2]/div[1]/ul[2]/li[2]/a')
+                sell_button = self.is_present(By.XPATH, '//*[@id="app"]/header/nav[2]/div[1]/ul[2]/li[2]/a')
 
-                    attempts = 0
+                attempts = 0
 
-                    screenshot_saved = False
-                    while not sell_button and attempts <= 10:
-                        self.logger.error('Not done updating listing. Checking again...')
-                        sell_button = self.is_present(By.XPATH, '//*[@id="app"]/header/nav[2]/div[1]/ul[2]/li[2]/a')
-                        attempts += 1
-                        self.web_driver.save_screenshot(f'updating_error.png')
-                        screenshot_saved = True
+                screenshot_saved = False
+                while not sell_button and attempts <= 10:
+                    self.logger.error('Not done updating listing. Checking again...')
+                    sell_button = self.is_present(By.XPATH, '//*[@id="app"]/header/nav[2]/div[1]/ul[2]/li[2]/a')
+                    attempts += 1
+                    self.web_driver.save_screenshot(f'updating_error.png')
+                    screenshot_saved = True
+                else:
+                    if attempts > 10:
+                        self.logger.error(
+                            f'Attempted to locate the sell button {attempts} times but could not find it.')
+                        return False
                     else:
-                        if attempts > 10:
-                            self.logger.error(
-                                f'Attempted to locate the sell button {attempts} times but could not find it.')
-                            return False
-                        else:
-                            self.logger.info('Updated successfully')
+                        self.logger.info('Updated successfully')
 
-                    return True
+                return True
 
         except Exception as e:
             self.logger.error(f'{traceback.format_exc()}')
@@ -1581,6 +1681,7 @@ class PoshMarkClient(BaseClient):
 
     def replace_fke_listing(self, redis_listing_id, brand=None):
         """Will update a fake listing the listing that was passed"""
+        self.closet = None
         try:
             self.go_to_closet()
             listing_title = self.get_redis_object_attr(redis_listing_id, 'title')
@@ -1808,24 +1909,20 @@ class PoshMarkClient(BaseClient):
         try:
             self.logger.info(f'Sharing the following item: {listing_title}')
 
-            self.go_to_closet()
+            listed_item = self.closet_card(listing_title)
 
-            if self.check_listing(listing_title):
-                listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-                for listed_item in listed_items:
-                    title = listed_item.find_element_by_class_name('tile__title')
-                    if title.text == listing_title:
-                        share_button = listed_item.find_element_by_class_name('social-action-bar__share')
-                        share_button.click()
+            if listed_item:
+                share_button = listed_item.find_element_by_class_name('social-action-bar__share')
+                share_button.click()
 
-                        self.sleep(1)
+                self.sleep(1)
 
-                        to_followers_button = self.locate(By.CLASS_NAME, 'internal-share__link')
-                        to_followers_button.click()
+                to_followers_button = self.locate(By.CLASS_NAME, 'internal-share__link')
+                to_followers_button.click()
 
-                        self.logger.info('Item Shared')
+                self.logger.info('Item Shared')
 
-                        return self.check_listing_timestamp(listing_title)
+                return self.check_listing_timestamp(listing_title)
 
             else:
                 if self.check_inactive():
@@ -1941,6 +2038,7 @@ class PoshMarkClient(BaseClient):
                                         for button in primary_buttons:
                                             if button.text == 'Yes':
                                                 button.click()
+                                                self.closet = None
                                                 self.logger.info(f'Accepted offer at ${sender_offer}.')
                                                 self.sleep(5)
                                                 break
@@ -2005,62 +2103,54 @@ class PoshMarkClient(BaseClient):
             lowest_price = int(self.get_redis_object_attr(redis_listing_id, 'lowest_price')) if redis_listing_id else int(self.get_redis_object_attr(self.redis_campaign_id, 'lowest_price'))
             self.logger.info(f'Sending offers to all likers for the following item: {listing_title}')
 
-            self.go_to_closet()
-
-            if self.check_listing(listing_title):
-                listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-                for listed_item in listed_items:
-                    title = listed_item.find_element_by_class_name('tile__title')
-                    if title.text == listing_title:
-                        listing_price_text = listed_item.find_element_by_class_name('fw--bold').text
-                        listing_price = int(re.findall(r'\d+', listing_price_text)[-1])
+            listing = self.open_listing(listing_title)
 
-                        listing_button = listed_item.find_element_by_class_name('tile__covershot')
-                        listing_button.click()
+            if listing:
+                listing_price = listing['price']
 
-                        self.sleep(2)
+                self.sleep(2)
 
-                        offer_button = self.locate(
-                            By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div/button'
-                        )
-                        offer_button.click()
+                offer_button = self.locate(
+                    By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div/button'
+                )
+                offer_button.click()
 
-                        offer_to_likers_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[2]/div/div[2]/div/button')
-                        offer_to_likers_button.click()
+                offer_to_likers_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[2]/div/div[2]/div/button')
+                offer_to_likers_button.click()
 
-                        self.sleep(1)
+                self.sleep(1)
 
-                        offer = round(lowest_price + (lowest_price * .05))
-                        ten_off = int(listing_price - (listing_price * .1))
-                        if offer > ten_off:
-                            offer = ten_off
+                offer = round(lowest_price + (lowest_price * .05))
+                ten_off = int(listing_price - (listing_price * .1))
+                if offer > ten_off:
+                    offer = ten_off
 
-                        self.logger.info(f'Sending offers to likers for ${offer}')
+                self.logger.info(f'Sending offers to likers for ${offer}')
 
-                        offer_input = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[2]/div/form/div[1]/input')
-                        offer_input.send_keys(str(offer))
+                offer_input = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[2]/div/form/div[1]/input')
+                offer_input.send_keys(str(offer))
 
-                        self.sleep(2)
+                self.sleep(2)
 
-                        shipping_dropdown = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[2]/div/form/div[2]/div[1]/div/div/div/div[1]/div')
-                        shipping_dropdown.click()
+                shipping_dropdown = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[2]/div/form/div[2]/div[1]/div/div/div/div[1]/div')
+                shipping_dropdown.click()
 
-                        shipping_options = self.locate_all(By.CLASS_NAME, 'dropdown__menu__item')
+                shipping_options = self.locate_all(By.CLASS_NAME, 'dropdown__menu__item')
 
-                        for shipping_option in shipping_options:
-                            if shipping_option.text == 'FREE':
-                                shipping_option.click()
-                                break
+                for shipping_option in shipping_options:
+                    if shipping_option.text == 'FREE':
+                        shipping_option.click()
+                        break
 
-                        apply_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[3]/div/button[2]')
-                        apply_button.click()
+                apply_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[2]/div[3]/div/button[2]')
+                apply_button.click()
 
-                        done_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[2]/div[3]/button')
-                        done_button.click()
+                done_button = self.locate(By.XPATH, '//*[@id="content"]/div/div/div[3]/div[2]/div[5]/div[2]/div/div[2]/div[2]/div[3]/button')
+                done_button.click()
 
-                        self.logger.info('Offers successfully sent!')
+                self.logger.info('Offers successfully sent!')
 
-                        return True
+                return True
             else:
                 self.logger.warning(f'The following listing was not found: {listing_title}')
                 self.logger.warning(f'Offers not sent to likers')
@@ -2075,45 +2165,35 @@ class PoshMarkClient(BaseClient):
         try:
             self.logger.info(f'Checking the comments for the following item: {listing_title}')
 
-            self.go_to_closet()
-
             bad_words = ('scam', 'scammer', 'fake', 'replica', 'reported', 'counterfeit', 'stolen', 'chinesecrap')
             reported = False
 
-            if self.check_listing(listing_title):
-                listed_items = self.locate_all(By.CLASS_NAME, 'card--small')
-                for listed_item in listed_items:
-                    title = listed_item.find_element_by_class_name('tile__title')
-                    if title.text == listing_title:
-                        listing_button = listed_item.find_element_by_class_name('tile__covershot')
-                        listing_button.click()
-
-                        self.sleep(3)
-                        if self.is_present(By.CLASS_NAME, 'comment-item__container'):
-                            regex = re.compile('[^a-zA-Z]+')
-                            comments = self.locate_all(By.CLASS_NAME, 'comment-item__container')
-                            for comment in comments:
-                                text = comment.find_element_by_class_name('comment-item__text').text
-                                cleaned_comment = regex.sub('', text.lower())
-
-                                if any([bad_word in cleaned_comment for bad_word in bad_words]):
-                                    report_button = comment.find_element_by_class_name('flag')
-                                    report_button.click()
-
-                                    self.sleep(1)
-
-                                    primary_buttons = self.locate_all(By.CLASS_NAME, 'btn--primary')
-                                    for button in primary_buttons:
-                                        if button.text == 'Submit':
-                                            button.click()
-                                            reported = True
-                                            self.logger.warning(f'Reported the following comment as spam: {text}')
-                                            break
-                            if not reported:
-                                self.logger.info(f'No comments with the following words: {", ".join(bad_words)}')
-                        else:
-                            self.logger.info(f'No comments on this listing yet.')
-                        break
+            if self.open_listing(listing_title):
+                self.sleep(3)
+                if self.is_present(By.CLASS_NAME, 'comment-item__container'):
+                    regex = re.compile('[^a-zA-Z]+')
+                    comments = self.locate_all(By.CLASS_NAME, 'comment-item__container')
+                    for comment in comments:
+                        text = comment.find_element_by_class_name('comment-item__text').text
+                        cleaned_comment = regex.sub('', text.lower())
+
+                        if any([bad_word in cleaned_comment for bad_word in bad_words]):
+                            report_button = comment.find_element_by_class_name('flag')
+                            report_button.click()
+
+                            self.sleep(1)
+
+                            primary_buttons = self.locate_all(By.CLASS_NAME, 'btn--primary')
+                            for button in primary_buttons:
+                                if button.text == 'Submit':
+                                    button.click()
+                                    reported = True
+                                    self.logger.warning(f'Reported the following comment as spam: {text}')
+                                    break
+                    if not reported:
+                        self.logger.info(f'No comments with the following words: {", ".join(bad_words)}')
+                else:
+                    self.logger.info(f'No comments on this listing yet.')
 
         except Exception as e:
             self.logger.error(f'{traceback.format_exc()}')
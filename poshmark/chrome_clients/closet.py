@@ -0,0 +1,102 @@
+import re
+
+from django.conf import settings
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Whether the closet page has rendered any cards yet, checked in a script so the wait isn't stretched by the implicit
+# wait of the clients
+HAS_CARDS_SCRIPT = "return document.getElementsByClassName('card--small').length > 0;"
+
+# Reads every card on a closet page in the browser and returns them in one payload, selenium hands the card elements
+# back as web elements
+EXTRACT_CARDS_SCRIPT = """
+return Array.prototype.filter.call(document.getElementsByClassName('card--small'), function (card) {
+    return card.getElementsByClassName('tile__title').length > 0;
+}).map(function (card) {
+    function text(className) {
+        var element = card.getElementsByClassName(className)[0];
+        return element ? element.innerText.trim() : null;
+    }
+    var covershot = card.getElementsByClassName('tile__covershot')[0];
+
+    return {
+        title: text('tile__title'),
+        tag: text('inventory-tag__text'),
+        price: text('fw--bold'),
+        url: covershot && covershot.href ? covershot.href : null,
+        element: card
+    };
+});
+"""
+
+
+class ClosetSnapshot:
+    """The listings of a closet as they were on one load of the closet page, keyed by title. Each listing has its title,
+    inventory tag (None for listings that can be shared), price, url and card element. The card elements only work until
+    the browser leaves that page, everything else holds until the closet itself changes. A snapshot that isn't complete
+    was taken of a page that never rendered a card, it is empty but says nothing about whether the closet is."""
+    def __init__(self, listings, complete=True):
+        self.complete = complete
+        self.listings = {}
+        for listing in listings:
+            # The first card wins, the same as the scans that looked for a title on the closet page
+            self.listings.setdefault(listing['title'], listing)
+
+    @classmethod
+    def extract(cls, web_driver, timeout=None):
+        """Builds a snapshot of the closet page the browser is on with a single script, instead of a round trip per card
+        and a wait for the inventory tag that most cards don't have. Waits up to timeout seconds, CLOSET_LOAD_TIMEOUT by
+        default, for the first card to render and returns an incomplete snapshot if none does."""
+        if timeout is None:
+            timeout = settings.CLOSET_LOAD_TIMEOUT
+
+        try:
+            WebDriverWait(web_driver, timeout).until(lambda driver: driver.execute_script(HAS_CARDS_SCRIPT))
+        except TimeoutException:
+            return cls([], complete=False)
+
+        listings = []
+
+        for listing in web_driver.execute_script(EXTRACT_CARDS_SCRIPT):
+            price_digits = re.findall(r'\d+', listing['price'] or '')
+            listing['price'] = int(price_digits[-1]) if price_digits else None
+            listings.append(listing)
+
+        return cls(listings)
+
+    def __len__(self):
+        return len(self.listings)
+
+    def __contains__(self, listing_title):
+        return listing_title in self.listings
+
+    def get(self, listing_title):
+        return self.listings.get(listing_title)
+
+    def titles(self, tag=None):
+        """The titles of the listings with the given inventory tag, the shareable ones by default"""
+        return [title for title, listing in self.listings.items() if listing['tag'] == tag]
+
+    def find(self, text):
+        """Returns the first title containing text, None if no listing has it"""
+        for title in self.listings:
+            if text in title:
+                return title
+
+        return None
+
+    def card(self, listing_title):
+        """Returns the card element of a listing, None if the listing isn't in the snapshot or the page it was on is
+        gone"""
+        listing = self.listings.get(listing_title)
+
+        if listing is None:
+            return None
+
+        try:
+            listing['element'].is_enabled()
+        except StaleElementReferenceException:
+            return None
+
+        return listing['element']
@@ -0,0 +1,215 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from selenium.common.exceptions import WebDriverException
+
+# Everything a tenant leaves behind in the browser is under this origin
+POSHMARK_ORIGIN = 'https://poshmark.com'
+
+
+class DriverPool:
+    """Keeps launched browsers between the clients of a process so a client doesn't pay for a cold start. A checked
+    out driver belongs to one client, on checkin it's reset so the next tenant starts without the previous one's
+    cookies or storage. Drivers that fail a health check or have been checked out max_uses times are replaced with
+    fresh ones. Drivers are kept per key since clients with different options can't share them."""
+    def __init__(self, size, max_uses):
+        self.size = size
+        self.max_uses = max_uses
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def checkout(self, key, launch):
+        """Returns a healthy idle driver for the key, launching one with launch() if there is none"""
+        while True:
+            with self.lock:
+                drivers = self.idle.get(key)
+                driver = drivers.pop() if drivers else None
+
+            if driver is None:
+                driver = launch()
+                driver.pool_uses = 0
+                break
+
+            if self.is_healthy(driver):
+                break
+
+            logging.warning('Replacing a pooled browser that failed its health check')
+            self.discard(driver)
+
+        driver.pool_uses += 1
+
+        return driver
+
+    def checkin(self, key, driver):
+        """Resets the driver and keeps it for the next client, unless it's used up, broken or the pool is full"""
+        if driver.pool_uses >= self.max_uses or not self.reset(driver):
+            self.discard(driver)
+            return
+
+        with self.lock:
+            drivers = self.idle.setdefault(key, [])
+            if len(drivers) < self.size:
+                drivers.append(driver)
+                return
+
+        self.discard(driver)
+
+    def warm(self, key, launch):
+        """Launches drivers until the key has a full set of idle ones"""
+        while True:
+            with self.lock:
+                if len(self.idle.get(key, [])) >= self.size:
+                    return
+
+            driver = launch()
+            driver.pool_uses = 0
+
+            with self.lock:
+                drivers = self.idle.setdefault(key, [])
+                if len(drivers) < self.size:
+                    drivers.append(driver)
+                    continue
+
+            self.discard(driver)
+            return
+
+    def close(self):
+        """Quits every idle driver"""
+        with self.lock:
+            drivers = [driver for key_drivers in self.idle.values() for driver in key_drivers]
+            self.idle = {}
+
+        for driver in drivers:
+            self.discard(driver)
+
+    @staticmethod
+    def is_healthy(driver):
+        try:
+            return driver.execute_script('return 1') == 1
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def reset(driver):
+        """Closes extra windows and clears the cookies and storage the last tenant left, returns False if the browser
+        didn't respond. The http cache is kept, it holds nothing tied to the account."""
+        try:
+            for handle in driver.window_handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                'origin': POSHMARK_ORIGIN,
+                'storageTypes': 'local_storage,session_storage,indexeddb,websql,service_workers,cache_storage',
+            })
+            driver.get('about:blank')
+
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def discard(driver):
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+class ParkedClients:
+    """Keeps the clients of campaigns run in steps open between their steps. A step that lands on the process that ran
+    its campaign's last step takes the client back with its browser, login and closet snapshot instead of starting
+    over. At most size clients are kept, the least recently parked are closed first, and a client left longer than
+    idle_seconds is closed on the next take or park."""
+    def __init__(self, size, idle_seconds):
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self.parked = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key):
+        """Returns the client parked under key, None if there is none or its browser stopped responding"""
+        with self.lock:
+            expired = self.expire()
+            parked = self.parked.pop(key, None)
+
+        for client in expired:
+            client.close()
+
+        if parked is None:
+            return None
+
+        client = parked[0]
+        if client.web_driver is None or not DriverPool.is_healthy(client.web_driver):
+            client.close(discard=True)
+            return None
+
+        return client
+
+    def park(self, key, client):
+        with self.lock:
+            self.parked[key] = (client, time.time())
+            self.parked.move_to_end(key)
+            evicted = self.expire()
+            while len(self.parked) > self.size:
+                evicted.append(self.parked.popitem(last=False)[1][0])
+
+        for client in evicted:
+            client.close()
+
+    def expire(self):
+        """Removes the clients parked longer than idle_seconds and returns them, the caller holds the lock"""
+        cutoff = time.time() - self.idle_seconds
+        expired_keys = [key for key, (client, parked_at) in self.parked.items() if parked_at < cutoff]
+
+        return [self.parked.pop(key)[0] for key in expired_keys]
+
+    def close(self):
+        """Closes every parked client"""
+        with self.lock:
+            clients = [client for client, parked_at in self.parked.values()]
+            self.parked.clear()
+
+        for client in clients:
+            client.close()
+
+
+_pool = None
+_pool_pid = None
+_parked = None
+_parked_pid = None
+
+
+def get_driver_pool():
+    """Returns this process's driver pool, None when pooling is turned off. A forked process gets its own pool, the
+    browsers of the parent can't be driven from it."""
+    global _pool, _pool_pid
+
+    if settings.CHROME_POOL_SIZE <= 0:
+        return None
+
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = DriverPool(settings.CHROME_POOL_SIZE, settings.CHROME_POOL_MAX_USES)
+        _pool_pid = os.getpid()
+
+    return _pool
+
+
+def get_parked_clients():
+    """Returns this process's parked clients, None when parking is turned off"""
+    global _parked, _parked_pid
+
+    if settings.CAMPAIGN_STEP_PARKED_CLIENTS <= 0:
+        return None
+
+    if _parked is None or _parked_pid != os.getpid():
+        _parked = ParkedClients(settings.CAMPAIGN_STEP_PARKED_CLIENTS, settings.CAMPAIGN_STEP_CLIENT_IDLE_SECONDS)
+        _parked_pid = os.getpid()
+
+    return _parked
@@ -7,6 +7,8 @@ import string
 from django import forms
 from django.core.files.base import ContentFile
 from poshmark.models import PoshUser, Listing, ListingPhotos, Campaign
+from poshmark.scheduler import CampaignTimers
+from poshmark.tasks import update_redis_object
 
 
 class CreateListing(forms.Form):
@@ -423,6 +425,16 @@ class EditCampaignForm(CreateCampaign):
 
         self.campaign.save()
 
+        if self.campaign.status == '1' and self.campaign.redis_id:
+            # Push the new settings to the running campaign, it picks them up without waiting for a refresh
+            update_redis_object(self.campaign.redis_id, {
+                'delay': int(self.campaign.delay),
+                'times': self.campaign.times,
+                'lowest_price': self.campaign.lowest_price,
+            })
+            # A campaign waiting for its next window works it out again from the new times
+            CampaignTimers().wake(self.campaign.id)
+
         old_listings = Listing.objects.filter(campaign=self.campaign)
         for old_listing in old_listings:
             old_listing.campaign = None
@@ -0,0 +1,44 @@
+import json
+
+from django.conf import settings
+
+from . import redis_store
+
+
+def cache_key(username):
+    return f'listing_urls:{username}'
+
+
+class ListingCache:
+    """A redis hash of a posh user's listings, title to the listing's url and price, filled on every scan of their
+    closet. It lets a client go straight to a listing's page without loading the closet, shared by every client and
+    task working on the user. An entry can be out of date, whoever uses it has to check they landed on the listing."""
+    def __init__(self, username):
+        self.r = redis_store.get_redis(redis_store.INSTANCE_DB)
+        self.key = cache_key(username)
+
+    def get(self, listing_title):
+        """Returns the cached listing as a dict with its title, url and price, None on a miss"""
+        listing = self.r.hget(self.key, listing_title)
+
+        if listing is None:
+            return None
+
+        return dict(json.loads(listing), title=listing_title)
+
+    def save(self, listings):
+        """Replaces the cache with the listings from a full scan of the closet"""
+        cached = {
+            listing['title']: json.dumps({'url': listing['url'], 'price': listing['price']})
+            for listing in listings if listing['url']
+        }
+
+        pipe = self.r.pipeline(transaction=True)
+        pipe.delete(self.key)
+        if cached:
+            pipe.hset(self.key, mapping=cached)
+            pipe.expire(self.key, settings.LISTING_CACHE_TTL)
+        pipe.execute()
+
+    def forget(self, listing_title):
+        self.r.hdel(self.key, listing_title)
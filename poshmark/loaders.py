@@ -0,0 +1,54 @@
+import contextvars
+
+_loaders = contextvars.ContextVar('batch_loaders', default=None)
+
+
+class BatchLoader:
+    """Resolves model instances by id, fetching every id it hasn't seen yet with a single id__in query and keeping the
+    results for the rest of the request"""
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.cache = {}
+
+    def load_many(self, ids):
+        """Returns the instances for the given ids in the same order, skipping ids that don't exist"""
+        ids = [int(instance_id) for instance_id in ids if str(instance_id).strip()]
+        missing_ids = {instance_id for instance_id in ids if instance_id not in self.cache}
+
+        if missing_ids:
+            for instance in self.queryset.filter(id__in=missing_ids):
+                self.cache[instance.id] = instance
+
+        return [self.cache[instance_id] for instance_id in ids if instance_id in self.cache]
+
+    def load(self, instance_id):
+        instances = self.load_many([instance_id])
+
+        return instances[0] if instances else None
+
+
+def get_loader(model):
+    """Returns the request's loader for the given model, or a throwaway one outside of a request"""
+    loaders = _loaders.get()
+
+    if loaders is None:
+        return BatchLoader(model.objects.all())
+
+    if model not in loaders:
+        loaders[model] = BatchLoader(model.objects.all())
+
+    return loaders[model]
+
+
+class BatchLoaderMiddleware:
+    """Gives every request its own set of loaders so nothing is cached across requests"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _loaders.set({})
+
+        try:
+            return self.get_response(request)
+        finally:
+            _loaders.reset(token)
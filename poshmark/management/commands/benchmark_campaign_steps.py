@@ -0,0 +1,117 @@
+import os
+import statistics
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+
+from poshmark import tasks
+from poshmark.chrome_clients.clients import BaseClient
+from poshmark.chrome_clients.pool import ParkedClients
+from poshmark.models import Campaign
+
+
+def memory_kb(pid):
+    """The proportional set size of a process, so pages shared with other processes are only counted once. Falls back
+    to the resident set size where the kernel doesn't report it, and to 0 once the process is gone."""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as smaps:
+            for line in smaps:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+
+    return 0
+
+
+def process_tree(pid):
+    """The pid and every descendant of it, chromedriver and the browsers it started included"""
+    pids = [pid]
+
+    for parent in pids:
+        try:
+            with open(f'/proc/{parent}/task/{parent}/children') as children:
+                pids.extend(int(child) for child in children.read().split())
+        except FileNotFoundError:
+            pass
+
+    return pids
+
+
+class Command(BaseCommand):
+    help = 'Runs real steps of an idle basic sharing or aging campaign in this process with the real client, once ' \
+           'opening a client for every step and once parking it between steps, and reports the time per step, the ' \
+           'browsers launched and the peak memory of this process and its browsers. The campaign really shares and ' \
+           'browses, so run it within the campaign\'s hours on an account that can take it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaign', type=int, required=True, help='Id of an idle basic sharing or aging campaign')
+        parser.add_argument('--steps', type=int, default=5, help='Steps run in each mode')
+        parser.add_argument('--honor-delay', action='store_true',
+                            help='Wait out the countdown between steps, by default the next step runs right away')
+
+    def run_steps(self, campaign, task, parked_clients, options):
+        """Starts the campaign, runs its steps back to back the way the broker would hand them out and stops it"""
+        Campaign.objects.filter(id=campaign.id).update(status='1')
+        timings = []
+        peak_kb = 0
+
+        with mock.patch.object(tasks, 'get_parked_clients', return_value=parked_clients), \
+                mock.patch.object(task, 'apply_async') as apply_async, \
+                mock.patch.object(BaseClient, 'launch', autospec=True, side_effect=BaseClient.launch) as launch:
+            args = (campaign.id,)
+            for _ in range(options['steps']):
+                start = time.perf_counter()
+                task(*args)
+                timings.append(time.perf_counter() - start)
+                peak_kb = max(peak_kb, sum(memory_kb(pid) for pid in process_tree(os.getpid())))
+
+                if not apply_async.called:
+                    raise CommandError('The campaign did not schedule its next step, is it within its hours?')
+                args = apply_async.call_args[0][0]
+                countdown = apply_async.call_args[1]['countdown']
+                apply_async.reset_mock()
+                if options['honor_delay']:
+                    time.sleep(countdown)
+
+            # A step that finds the campaign stopped ends it and closes the client it had parked
+            campaign.refresh_from_db()
+            tasks.update_redis_object(campaign.redis_id, {'status': '3'})
+            task(*args)
+            launches = launch.call_count
+
+        if parked_clients:
+            parked_clients.close()
+        Campaign.objects.filter(id=campaign.id).update(status='2')
+
+        return timings, launches, peak_kb
+
+    def handle(self, *args, **options):
+        campaign = Campaign.objects.select_related('posh_user').get(id=options['campaign'])
+
+        if campaign.status != '2':
+            raise CommandError('The campaign has to be idle')
+        if campaign.mode == Campaign.BASIC_SHARING:
+            task = tasks.basic_sharing_step
+        elif campaign.mode == Campaign.AGING:
+            task = tasks.aging_step
+        else:
+            raise CommandError('Only basic sharing and aging campaigns run in steps')
+
+        self.stdout.write(f'{options["steps"]} steps of {task.name} for {campaign.title}')
+
+        for name, parked_clients in (('fresh', None), ('parked', ParkedClients(1, 60 * 60))):
+            timings, launches, peak_kb = self.run_steps(campaign, task, parked_clients, options)
+            self.stdout.write(
+                f'{name:<6} first {timings[0]:>6.2f}s  mean after {statistics.mean(timings[1:] or timings):>6.2f}s  '
+                f'{launches:>3} browsers launched  peak {peak_kb / 1024:>8.1f}MB'
+            )
@@ -0,0 +1,75 @@
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from poshmark.chrome_clients.clients import BaseClient
+from poshmark.management.commands.benchmark_campaign_steps import memory_kb
+
+DEFAULT_URLS = (
+    'https://poshmark.com/',
+    'https://poshmark.com/category/Women',
+    'https://poshmark.com/category/Men',
+    'https://poshmark.com/brand/Nike',
+)
+
+
+def process_tree(root_pid):
+    """The pid and every descendant pid of a process"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as stat:
+                    # The command can contain spaces, the parent pid is the second field after it
+                    parent_pid = int(stat.read().rsplit(')', 1)[1].split()[1])
+            except (FileNotFoundError, ProcessLookupError):
+                continue
+            children.setdefault(parent_pid, []).append(int(entry))
+
+    pids = [root_pid]
+    for pid in pids:
+        pids.extend(children.get(pid, []))
+
+    return pids
+
+
+class Command(BaseCommand):
+    help = 'Loads the same pages with every chrome resource profile, reporting the memory of each browser and how ' \
+           'many pages it loads per minute'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=','.join(settings.CHROME_PROFILES.keys()))
+        parser.add_argument('--rounds', type=int, default=3, help='Times every url is loaded')
+        parser.add_argument('--urls', default=','.join(DEFAULT_URLS))
+
+    def measure(self, profile, urls, rounds):
+        client = BaseClient(None, lambda *args: None, profile=profile)
+        client.open()
+
+        try:
+            samples = []
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for url in urls:
+                    client.web_driver.get(url)
+                    pids = process_tree(client.web_driver.service.process.pid)
+                    samples.append(sum(memory_kb(pid) for pid in pids))
+            elapsed = time.perf_counter() - start
+        finally:
+            client.close()
+
+        return statistics.mean(samples), max(samples), len(urls) * rounds / elapsed * 60
+
+    def handle(self, *args, **options):
+        urls = options['urls'].split(',')
+        self.stdout.write(f'{len(urls)} urls loaded {options["rounds"]} times per profile')
+
+        for profile in options['profiles'].split(','):
+            mean_kb, peak_kb, pages_per_minute = self.measure(profile, urls, options['rounds'])
+            self.stdout.write(
+                f'{profile:<8} mean {mean_kb / 1024:>7.1f}MB  peak {peak_kb / 1024:>7.1f}MB  '
+                f'{pages_per_minute:>6.1f} pages/minute'
+            )
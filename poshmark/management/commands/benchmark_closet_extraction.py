@@ -0,0 +1,110 @@
+import functools
+import http.server
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from selenium.common.exceptions import NoSuchElementException
+
+from poshmark.chrome_clients.clients import BaseClient
+from poshmark.chrome_clients.closet import ClosetSnapshot
+
+CARD_HTML = """
+<div class="card card--small">
+    <a class="tile__covershot" href="/listing/{slug}"><img alt="{title}"></a>
+    <a class="tile__title" href="/listing/{slug}">{title}</a>
+    <span class="fw--bold">${price}</span>
+    {tag}
+    <div class="social-action-bar__share"></div>
+</div>
+"""
+
+
+def fixture_html(cards, tagged_every):
+    """A closet page with the card markup the clients read, every tagged_every-th card is sold"""
+    html = []
+
+    for index in range(cards):
+        tag = '<span class="inventory-tag__text">SOLD</span>' if tagged_every and index % tagged_every == 0 else ''
+        html.append(CARD_HTML.format(slug=f'listing-{index}', title=f'Listing {index}', price=10 + index, tag=tag))
+
+    return f'<html><head><title>Closet</title></head><body>{"".join(html)}</body></html>'.encode()
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    def __init__(self, page, *args, **kwargs):
+        self.page = page
+        super(FixtureHandler, self).__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(self.page)))
+        self.end_headers()
+        self.wfile.write(self.page)
+
+    def log_message(self, *args):
+        pass
+
+
+def scan_cards(web_driver):
+    """The closet scan as get_all_listings did it: a round trip per card and field, and a full implicit wait for the
+    inventory tag of every card without one"""
+    listings = []
+
+    for card in web_driver.find_elements_by_class_name('card--small'):
+        title = card.find_element_by_class_name('tile__title').text
+        try:
+            tag = card.find_element_by_class_name('inventory-tag__text').text
+        except NoSuchElementException:
+            tag = None
+        price = card.find_element_by_class_name('fw--bold').text
+        url = card.find_element_by_class_name('tile__covershot').get_attribute('href')
+        listings.append({'title': title, 'tag': tag, 'price': price, 'url': url})
+
+    return listings
+
+
+class Command(BaseCommand):
+    help = 'Serves a closet page of fixture html locally and times reading its cards with a round trip per card ' \
+           'against the single script of ClosetSnapshot.extract'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=50)
+        parser.add_argument('--tagged-every', type=int, default=10, help='Every nth card has a sold tag, 0 for none')
+        parser.add_argument('--implicit-wait', type=float, default=15,
+                            help='Seconds of implicit wait, the clients use 15')
+        parser.add_argument('--rounds', type=int, default=3, help='Times the single script is timed')
+        parser.add_argument('--skip-scan', action='store_true', help='Only time the script, the scan can take minutes')
+
+    def handle(self, *args, **options):
+        page = fixture_html(options['cards'], options['tagged_every'])
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(FixtureHandler, page))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/closet'
+
+        client = BaseClient(None, lambda *args: None)
+        client.open()
+
+        try:
+            client.web_driver.get(url)
+            client.web_driver.implicitly_wait(options['implicit_wait'])
+            self.stdout.write(
+                f'{options["cards"]} cards, {options["implicit_wait"]}s implicit wait, served from {url}'
+            )
+
+            if not options['skip_scan']:
+                start = time.perf_counter()
+                scanned = scan_cards(client.web_driver)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f'scan     {len(scanned):>5} listings  {elapsed * 1000:>10.1f}ms')
+
+            timings = []
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                closet = ClosetSnapshot.extract(client.web_driver)
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(f'extract  {len(closet):>5} listings  {min(timings) * 1000:>10.1f}ms')
+        finally:
+            client.close()
+            server.shutdown()
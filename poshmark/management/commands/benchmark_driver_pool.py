@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from poshmark.chrome_clients.clients import BaseClient
+from poshmark.chrome_clients.pool import DriverPool
+
+
+class Command(BaseCommand):
+    help = 'Measures time to first page for clients that launch their own browser against clients that check one ' \
+           'out of a warm driver pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10, help='Clients opened one after the other')
+        parser.add_argument('--url', default='https://poshmark.com')
+
+    def time_to_first_page(self, driver_pool, url):
+        client = BaseClient(None, lambda *args: None, driver_pool=driver_pool)
+
+        start = time.perf_counter()
+        client.open()
+        client.web_driver.get(url)
+        elapsed = time.perf_counter() - start
+
+        client.close()
+
+        return elapsed
+
+    def report(self, name, timings):
+        timings = sorted(timings)
+        self.stdout.write(
+            f'{name:<6} mean {statistics.mean(timings):>6.2f}s  p50 {timings[len(timings) // 2]:>6.2f}s  '
+            f'max {timings[-1]:>6.2f}s'
+        )
+
+    def handle(self, *args, **options):
+        clients, url = options['clients'], options['url']
+        self.stdout.write(f'{clients} clients, first page {url}')
+
+        self.report('cold', [self.time_to_first_page(None, url) for _ in range(clients)])
+
+        driver_pool = DriverPool(1, clients + 1)
+        warm_client = BaseClient(None, lambda *args: None, driver_pool=driver_pool)
+        driver_pool.warm(warm_client.pool_key, warm_client.launch)
+        try:
+            self.report('pooled', [self.time_to_first_page(driver_pool, url) for _ in range(clients)])
+        finally:
+            driver_pool.close()
@@ -0,0 +1,71 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from poshmark import redis_store
+
+
+class Command(BaseCommand):
+    help = 'Hammers the redis id allocator with concurrent writers, checking for collisions and counting round trips ' \
+           'against the random id plus existence check loop it replaced'
+
+    namespace = 'Benchmark'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=300)
+        parser.add_argument('--ids', type=int, default=100, help='Ids allocated by each writer')
+
+    def random_id(self):
+        """The old allocator: pick a random id and retry while it exists. Nothing reserves the id between the check
+        and the write, so two writers can leave with the same one."""
+        r = redis_store.get_redis(redis_store.INSTANCE_DB)
+        instance_id = f'{self.namespace}_{random.getrandbits(32)}'
+
+        while r.exists(instance_id):
+            instance_id = f'{self.namespace}_{random.getrandbits(32)}'
+
+        r.hset(instance_id, 'instance_type', self.namespace)
+
+        return instance_id
+
+    def counter_id(self):
+        instance_id = redis_store.allocate_ids([self.namespace])[0]
+        redis_store.get_redis(redis_store.INSTANCE_DB).hset(instance_id, 'instance_type', self.namespace)
+
+        return instance_id
+
+    def run_scenario(self, name, allocate, writers, ids):
+        redis_store.stats.reset()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            batches = list(executor.map(lambda writer: [allocate() for _ in range(ids)], range(writers)))
+        elapsed = time.perf_counter() - start
+
+        allocated = [instance_id for batch in batches for instance_id in batch]
+        collisions = len(allocated) - len(set(allocated))
+        commands, round_trips = redis_store.stats.snapshot()
+
+        self.stdout.write(
+            f'{name:<8} {len(allocated):>8} ids {collisions:>5} collisions '
+            f'{round_trips / len(allocated):>5.2f} round trips/id {len(allocated) / elapsed:>10.0f} ids/sec'
+        )
+
+        return allocated
+
+    def handle(self, *args, **options):
+        r = redis_store.get_redis(redis_store.INSTANCE_DB)
+        self.stdout.write(f'{options["writers"]} concurrent writers, {options["ids"]} ids each')
+
+        allocated = []
+        try:
+            allocated += self.run_scenario('random', self.random_id, options['writers'], options['ids'])
+            allocated += self.run_scenario('counter', self.counter_id, options['writers'], options['ids'])
+        finally:
+            pipe = r.pipeline(transaction=False)
+            for instance_id in set(allocated):
+                pipe.delete(instance_id)
+            pipe.delete(f'ids:{self.namespace}')
+            pipe.execute()
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from poshmark import redis_store
+from poshmark.models import Log, LogEntry
+from poshmark.tasks import ingest_log_messages
+
+
+class Command(BaseCommand):
+    help = 'Measures end to end log throughput (redis stream to postgres) against saving each message with Log.log'
+
+    stream = 'benchmark_log_entries'
+    group = 'benchmark_log_reader'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=100000)
+        parser.add_argument('--loggers', type=int, default=50)
+        parser.add_argument('--legacy-messages', type=int, default=2000,
+                            help='Messages saved one by one with Log.log, 0 to skip it')
+
+    def produce(self, r, logs, messages):
+        pipe = r.pipeline(transaction=False)
+        for message in range(messages):
+            pipe.xadd(self.stream, {
+                'log_id': logs[message % len(logs)].id,
+                'timestamp': time.time(),
+                'level': 'INFO',
+                'message': f'Benchmark message {message}',
+            })
+            if len(pipe) >= 1000:
+                pipe.execute()
+        pipe.execute()
+
+    def consume(self, r, messages):
+        consumed = 0
+        while consumed < messages:
+            response = r.xreadgroup(self.group, 'benchmark', {self.stream: '>'}, count=settings.LOG_BATCH_SIZE,
+                                    block=settings.STREAM_BLOCK_MILLISECONDS)
+            if not response:
+                break
+
+            entries = response[0][1]
+            ingest_log_messages(entries)
+            r.xack(self.stream, self.group, *[entry_id for entry_id, fields in entries])
+            consumed += len(entries)
+
+        return consumed
+
+    def report(self, name, messages, elapsed):
+        self.stdout.write(f'{name:<12} {messages:>8} messages {elapsed:>8.2f}s {messages / elapsed:>10.0f} messages/sec')
+
+    def handle(self, *args, **options):
+        r = redis_store.get_redis(redis_store.LOG_DB)
+        logs = [Log(description=f'Benchmark {logger}') for logger in range(options['loggers'])]
+        for log in logs:
+            log.save()
+
+        r.delete(self.stream)
+        redis_store.ensure_group(r, self.stream, self.group)
+
+        try:
+            if options['legacy_messages']:
+                start = time.perf_counter()
+                for message in range(options['legacy_messages']):
+                    logs[message % len(logs)].info(f'Benchmark message {message}')
+                self.report('per message', options['legacy_messages'], time.perf_counter() - start)
+
+            start = time.perf_counter()
+            self.produce(r, logs, options['messages'])
+            consumed = self.consume(r, options['messages'])
+            self.report('stream', consumed, time.perf_counter() - start)
+
+            entries_written = LogEntry.objects.filter(logger__in=logs).count()
+            self.stdout.write(f'{entries_written} entries written for {len(logs)} loggers')
+
+            start = time.perf_counter()
+            deleted = Log.trim_entries([log.id for log in logs], settings.LOG_ENTRIES_PER_LOGGER)
+            self.stdout.write(f'Retention trimmed {deleted} entries in {time.perf_counter() - start:.2f}s')
+        finally:
+            r.delete(self.stream)
+            Log.objects.filter(id__in=[log.id for log in logs]).delete()
@@ -0,0 +1,139 @@
+import random
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from poshmark.proxy_leases import ProxyLeases
+
+
+class Command(BaseCommand):
+    help = 'Simulates starting a burst of campaigns on fake proxies, comparing start latency of the single sleeping ' \
+           'start_campaign worker against the lease allocator'
+
+    namespace = 'benchmark_proxy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaigns', type=int, default=200)
+        parser.add_argument('--proxies', type=int, default=5)
+        parser.add_argument('--connections', type=int, default=4, help='Slots per proxy')
+        parser.add_argument('--no-proxy', type=float, default=0.3,
+                            help='Share of campaigns, like basic sharing, that start without a proxy')
+        parser.add_argument('--min-run', type=float, default=60, help='Shortest time a campaign holds its proxy')
+        parser.add_argument('--max-run', type=float, default=600, help='Longest time a campaign holds its proxy')
+        parser.add_argument('--time-scale', type=float, default=0.001,
+                            help='Simulated seconds are multiplied by this, including the old 30 second sleep')
+
+    def make_campaigns(self, options):
+        scale = options['time_scale']
+        campaigns = []
+
+        for campaign_id in range(1, options['campaigns'] + 1):
+            needs_proxy = random.random() >= options['no_proxy']
+            run_time = random.uniform(options['min_run'], options['max_run']) * scale
+            campaigns.append((campaign_id, needs_proxy, run_time))
+
+        return campaigns
+
+    def sleeping_worker(self, campaigns, proxy_ids, connections, scale):
+        """The old start_campaign: one worker takes the starts in order and sleeps 30 seconds whenever every proxy
+        slot is taken, holding up every start queued behind it"""
+        running = {proxy_id: [] for proxy_id in proxy_ids}
+        latencies = {}
+        submitted = time.perf_counter()
+
+        for campaign_id, needs_proxy, run_time in campaigns:
+            while needs_proxy:
+                now = time.perf_counter()
+                free_proxy = None
+                for proxy_id in proxy_ids:
+                    running[proxy_id] = [ends_at for ends_at in running[proxy_id] if ends_at > now]
+                    if len(running[proxy_id]) < connections:
+                        free_proxy = proxy_id
+                        break
+
+                if free_proxy is not None:
+                    running[free_proxy].append(now + run_time)
+                    break
+
+                time.sleep(30 * scale)
+
+            latencies[campaign_id] = time.perf_counter() - submitted
+
+        return latencies
+
+    def lease_allocator(self, campaigns, proxy_ids, connections):
+        """The lease allocator: proxy starts wait in the queue, the rest start right away, and every returned lease
+        immediately grants the next waiting campaign its slot"""
+        leases = ProxyLeases(self.namespace)
+        leases.reset()
+        run_times = {str(campaign_id): run_time for campaign_id, _, run_time in campaigns}
+        latencies = {}
+        allocation_lock = threading.Lock()
+        all_started = threading.Event()
+        timers = []
+        submitted = time.perf_counter()
+
+        def started(campaign_id):
+            latencies[campaign_id] = time.perf_counter() - submitted
+            if len(latencies) == len(campaigns):
+                all_started.set()
+
+        def release(proxy_id, campaign_id):
+            leases.release(proxy_id, campaign_id)
+            allocate()
+
+        def allocate():
+            # Allocation runs on the single worker queue, so grants never overlap
+            with allocation_lock:
+                granted = leases.grant({proxy_id: connections for proxy_id in proxy_ids}, 3600)
+
+            for campaign_id, proxy_id in granted:
+                started(int(campaign_id))
+                timer = threading.Timer(run_times[campaign_id], release, (proxy_id, campaign_id))
+                timers.append(timer)
+                timer.start()
+
+        try:
+            for campaign_id, needs_proxy, run_time in campaigns:
+                if needs_proxy:
+                    leases.enqueue(campaign_id)
+                    allocate()
+                else:
+                    started(campaign_id)
+
+            all_started.wait()
+        finally:
+            for timer in timers:
+                timer.cancel()
+            leases.reset()
+
+        return latencies
+
+    def report(self, name, latencies, campaigns):
+        for label, wanted in (('proxy', True), ('no proxy', False)):
+            values = sorted(latencies[campaign_id] for campaign_id, needs_proxy, _ in campaigns if needs_proxy == wanted)
+            if not values:
+                continue
+
+            self.stdout.write(
+                f'{name:<8} {label:<9} {len(values):>4} campaigns  mean {statistics.mean(values):>7.3f}s  '
+                f'p50 {values[len(values) // 2]:>7.3f}s  p95 {values[int(len(values) * 0.95)]:>7.3f}s  '
+                f'max {values[-1]:>7.3f}s'
+            )
+
+    def handle(self, *args, **options):
+        campaigns = self.make_campaigns(options)
+        proxy_ids = [f'proxy{index}' for index in range(1, options['proxies'] + 1)]
+
+        self.stdout.write(
+            f'{len(campaigns)} campaigns on {len(proxy_ids)} proxies with {options["connections"]} slots each, '
+            f'time scaled by {options["time_scale"]}'
+        )
+
+        sleeping = self.sleeping_worker(campaigns, proxy_ids, options['connections'], options['time_scale'])
+        self.report('sleeping', sleeping, campaigns)
+
+        leased = self.lease_allocator(campaigns, proxy_ids, options['connections'])
+        self.report('leases', leased, campaigns)
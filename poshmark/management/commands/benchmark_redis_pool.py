@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from poshmark import redis_store
+
+
+class Command(BaseCommand):
+    help = 'Simulates many campaigns reading their state from redis, comparing a new client per call against the ' \
+           'shared connection pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaigns', type=int, default=500)
+        parser.add_argument('--iterations', type=int, default=20, help='Loop iterations per campaign')
+        parser.add_argument('--threads', type=int, default=100)
+
+    @staticmethod
+    def per_call_client():
+        return redis.Redis(db=redis_store.INSTANCE_DB, decode_responses=True, host=settings.REDIS_HOST,
+                           port=settings.REDIS_PORT)
+
+    @staticmethod
+    def pooled_client():
+        return redis_store.get_redis(redis_store.INSTANCE_DB)
+
+    @staticmethod
+    def run_campaign(client_factory, campaign_key, iterations, pipelined):
+        operations = 0
+        for _ in range(iterations):
+            if pipelined:
+                pipe = client_factory().pipeline(transaction=False)
+                pipe.hmget(campaign_key, ['status', 'delay', 'times'])
+                pipe.hget(campaign_key, 'is_registered')
+                pipe.execute()
+            else:
+                for field in ('status', 'delay', 'times', 'is_registered'):
+                    client_factory().hget(campaign_key, field)
+            operations += 4
+        return operations
+
+    def run_scenario(self, name, client_factory, keys, iterations, threads, pipelined=False):
+        admin = redis.Redis(db=redis_store.INSTANCE_DB, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+        connections_before = admin.info('stats')['total_connections_received']
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            operations = sum(executor.map(
+                lambda key: self.run_campaign(client_factory, key, iterations, pipelined), keys
+            ))
+        elapsed = time.perf_counter() - start
+
+        connections_opened = admin.info('stats')['total_connections_received'] - connections_before
+        admin.close()
+
+        self.stdout.write(
+            f'{name:<18} {operations / elapsed:>12.0f} ops/sec {connections_opened:>10} connections opened '
+            f'{elapsed:>8.2f}s'
+        )
+
+    def handle(self, *args, **options):
+        r = redis_store.get_redis(redis_store.INSTANCE_DB)
+        keys = [f'Benchmark_{campaign}' for campaign in range(options['campaigns'])]
+
+        pipe = r.pipeline(transaction=False)
+        for key in keys:
+            pipe.hset(key, mapping={'status': '1', 'delay': '60', 'times': '04 AM,05 AM', 'is_registered': 1})
+        pipe.execute()
+
+        self.stdout.write(f'{options["campaigns"]} campaigns, {options["iterations"]} iterations each, '
+                          f'{options["threads"]} threads')
+
+        try:
+            self.run_scenario('per call client', self.per_call_client, keys, options['iterations'], options['threads'])
+            redis_store.disconnect_all()
+            self.run_scenario('pooled', self.pooled_client, keys, options['iterations'], options['threads'])
+            redis_store.disconnect_all()
+            self.run_scenario('pooled pipelined', self.pooled_client, keys, options['iterations'], options['threads'],
+                              pipelined=True)
+        finally:
+            redis_store.get_redis(redis_store.INSTANCE_DB).delete(*keys)
+            redis_store.disconnect_all()
@@ -0,0 +1,51 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from poshmark.models import Campaign, Listing, PoshProxy, PoshUser
+
+
+def reflective_to_dict(instance):
+    """The per call reflection every to_dict used to do, kept here as the baseline"""
+    data = {}
+    for field in instance._meta.get_fields():
+        field_type = field.get_internal_type()
+        if field_type not in ('OneToOneField', 'ForeignKey'):
+            if field_type == 'DateField':
+                pass
+            elif field_type == 'BooleanField':
+                data[field.name] = int(field.value_from_object(instance))
+            elif field_type == 'FileField':
+                value = field.value_from_object(instance)
+                data[field.name] = value.path if value else ''
+            else:
+                data[field.name] = field.value_from_object(instance)
+    return data
+
+
+class Command(BaseCommand):
+    help = 'Compares serializing models for redis with per call reflection against the precompiled field plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        instances = [
+            PoshUser(id=1, username='benchmark', password='benchmark1'),
+            Campaign(id=1, title='Benchmark', times='04 AM', delay=60),
+            Listing(id=1, title='Benchmark', size='M', brand='Brand', category='Women', subcategory='Tops',
+                    original_price=100, listing_price=50),
+            PoshProxy(id=1, ip='127.0.0.1', port=8080),
+        ]
+
+        for instance in instances:
+            name = instance.__class__.__name__
+            reflective = timeit.timeit(lambda: reflective_to_dict(instance), number=iterations)
+            compiled = timeit.timeit(lambda: instance.to_dict(), number=iterations)
+            partial = timeit.timeit(lambda: instance.to_dict(['id']), number=iterations)
+
+            self.stdout.write(
+                f'{name:<10} reflective {iterations / reflective:>10.0f}/sec  compiled {iterations / compiled:>10.0f}/sec'
+                f'  partial {iterations / partial:>10.0f}/sec  ({reflective / compiled:.1f}x)'
+            )
@@ -0,0 +1,35 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from poshmark.tasks import purge_logs
+
+
+class Command(BaseCommand):
+    help = 'Runs the log cleanup now, deleting old logs of idle campaigns and registrations in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.LOG_CLEANUP_AGE_DAYS,
+                            help='Delete logs created more than this many days ago')
+        parser.add_argument('--logs-per-batch', type=int, default=settings.LOG_CLEANUP_LOGS_PER_BATCH)
+        parser.add_argument('--entries-per-batch', type=int, default=settings.LOG_CLEANUP_ENTRIES_PER_BATCH)
+
+    def progress(self, metrics):
+        self.stdout.write(f'{metrics["logs"]}/{metrics["total_logs"]} logs, {metrics["entries"]} entries deleted '
+                          f'({metrics["seconds"]}s)')
+
+    def handle(self, *args, **options):
+        metrics = purge_logs(
+            timezone.now() - datetime.timedelta(days=options['days']),
+            options['logs_per_batch'],
+            options['entries_per_batch'],
+            progress=self.progress,
+        )
+
+        rate = round(metrics['entries'] / metrics['seconds']) if metrics['seconds'] else metrics['entries']
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {metrics["logs"]} logs and {metrics["entries"]} entries in {metrics["seconds"]}s '
+            f'({rate} entries/sec)'
+        ))
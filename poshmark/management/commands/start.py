@@ -10,6 +10,8 @@ from django.db.utils import OperationalError
 
 from users.models import User
 from poshmark.models import Campaign, ProxyConnection, PoshUser, Log
+from poshmark.proxy_leases import ProxyLeases
+from poshmark.scheduler import CampaignTimers
 from poshmark.tasks import redis_log_reader, redis_instance_reader
 
 
@@ -90,6 +92,10 @@ class Command(BaseCommand):
         logging.info('Removing all proxy connections')
         connections = ProxyConnection.objects.all()
         connections.delete()
+        ProxyLeases().reset()
+
+        logging.info('Removing all campaign timers')
+        CampaignTimers().reset()
 
         logging.info('Starting redis log reader...')
         redis_log_reader.delay()
@@ -98,5 +104,5 @@ class Command(BaseCommand):
         redis_instance_reader.delay()
 
         logging.info('Starting server...')
-        os.system("gunicorn --preload -b 0.0.0.0:80 PoshBot.wsgi:application --threads 8 -w 4")
+        os.system("gunicorn --preload -b 0.0.0.0:80 PoshBot.wsgi:application --threads 32 -w 4")
         exit()
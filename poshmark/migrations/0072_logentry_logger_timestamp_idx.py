@@ -0,0 +1,17 @@
+# Generated by Django 3.1.7 on 2021-09-12 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poshmark', '0071_auto_20210905_1446'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['logger', 'timestamp'], name='logentry_logger_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.7 on 2021-09-14 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poshmark', '0072_logentry_logger_timestamp_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='logentry',
+            name='logentry_logger_timestamp_idx',
+        ),
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['logger', 'timestamp', 'id'], name='logentry_logger_ts_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.7 on 2021-09-18 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poshmark', '0073_logentry_logger_ts_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='campaign',
+            name='redis_id',
+            field=models.CharField(db_index=True, default='', max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='listing',
+            name='redis_id',
+            field=models.CharField(db_index=True, default='', max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='poshproxy',
+            name='redis_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='poshuser',
+            name='redis_id',
+            field=models.CharField(db_index=True, default='', max_length=40),
+        ),
+    ]
@@ -10,13 +10,14 @@ import requests
 import urllib3
 
 from django.core.files.base import ContentFile
-from django.db import models
+from django.db import connection, models
 from django.utils import timezone
 from imagekit.models import ProcessedImageField
 from imagekit.processors import ResizeToFill, Transpose
 from mailslurp_client.rest import ApiException
 
 from users.models import User
+from .serializers import serialize
 
 
 class PoshUser(models.Model):
@@ -46,7 +47,7 @@ class PoshUser(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     first_name = models.CharField(max_length=30, blank=True)
     last_name = models.CharField(max_length=30, blank=True)
-    redis_id = models.CharField(max_length=40, default='')
+    redis_id = models.CharField(max_length=40, default='', db_index=True)
     dob_month = models.CharField(max_length=20, default='')
     dob_day = models.CharField(max_length=20, default='')
     dob_year = models.CharField(max_length=20, default='')
@@ -65,24 +66,8 @@ class PoshUser(models.Model):
     def get_full_name(self):
         return f'{self.first_name} {self.last_name}'
 
-    def to_dict(self):
-        data = {}
-        for field in self._meta.get_fields():
-            field_type = field.get_internal_type()
-            if field_type not in ('OneToOneField', 'ForeignKey'):
-                if field.name == 'profile_picture' or field.name == 'header_picture':
-                    picture = field.value_from_object(self)
-                    if picture:
-                        data[field.name] = picture.path
-                    else:
-                        data[field.name] = ''
-                elif field_type == 'DateField':
-                    pass
-                elif field_type == 'BooleanField':
-                    data[field.name] = int(field.value_from_object(self))
-                else:
-                    data[field.name] = field.value_from_object(self)
-        return data
+    def to_dict(self, field_names=None):
+        return serialize(self, field_names)
 
     def delete_email(self):
         if self.email_id:
@@ -390,7 +375,7 @@ class Campaign(models.Model):
     title = models.CharField(max_length=30)
     status = models.CharField(max_length=15, choices=STATUS_CHOICES)
     times = models.CharField(max_length=255)
-    redis_id = models.CharField(max_length=40, default='')
+    redis_id = models.CharField(max_length=40, default='', db_index=True)
 
     delay = models.IntegerField()
     lowest_price = models.IntegerField(blank=True, default=250)
@@ -398,18 +383,8 @@ class Campaign(models.Model):
     auto_run = models.BooleanField(default=False)
     generate_users = models.BooleanField(default=False)
 
-    def to_dict(self):
-        data = {}
-        for field in self._meta.get_fields():
-            field_type = field.get_internal_type()
-            if field_type not in ('OneToOneField', 'ForeignKey'):
-                if field_type == 'DateField':
-                    pass
-                elif field_type == 'BooleanField':
-                    data[field.name] = int(field.value_from_object(self))
-                else:
-                    data[field.name] = field.value_from_object(self)
-        return data
+    def to_dict(self, field_names=None):
+        return serialize(self, field_names)
 
     def __str__(self):
         return f'Campaign - Title: {self.title} Username: {self.posh_user.username if self.posh_user else "None"}'
@@ -432,7 +407,7 @@ class Listing(models.Model):
     brand = models.CharField(max_length=30)
     category = models.CharField(max_length=30)
     subcategory = models.CharField(max_length=30)
-    redis_id = models.CharField(max_length=40, default='')
+    redis_id = models.CharField(max_length=40, default='', db_index=True)
 
     description = models.TextField()
 
@@ -445,20 +420,8 @@ class Listing(models.Model):
 
     campaign = models.ForeignKey(Campaign, on_delete=models.SET_NULL, null=True)
 
-    def to_dict(self):
-        data = {}
-        for field in self._meta.get_fields():
-            field_type = field.get_internal_type()
-            if field_type not in ('OneToOneField', 'ForeignKey'):
-                if field_type == 'DateField':
-                    pass
-                elif field_type == 'BooleanField':
-                    data[field.name] = int(field.value_from_object(self))
-                elif field_type == 'FileField':
-                    data[field.name] = field.value_from_object(self).path
-                else:
-                    data[field.name] = field.value_from_object(self)
-        return data
+    def to_dict(self, field_names=None):
+        return serialize(self, field_names)
 
     def get_photos(self):
         """Returns the paths for all the listing's photos"""
@@ -505,11 +468,6 @@ class Log(models.Model):
 
     def log(self, message, log_level=None):
         timestamp = self.get_time()
-        log_entries = LogEntry.objects.filter(logger=self).order_by('timestamp')
-
-        if len(log_entries) >= 1000:
-            last_log = log_entries.first()
-            last_log.delete()
 
         log_entry = LogEntry(
             level=log_level if log_level else LogEntry.NOTSET,
@@ -535,6 +493,33 @@ class Log(models.Model):
     def debug(self, message):
         self.log(message, LogEntry.DEBUG)
 
+    @staticmethod
+    def trim_entries(log_ids, max_entries=1000, max_age=None):
+        """Keeps only the newest max_entries of each given logger, and none older than max_age if given, with a single
+        DELETE for the whole batch of loggers"""
+        if not log_ids:
+            return 0
+
+        table = LogEntry._meta.db_table
+        conditions = ['position > %s']
+        params = [list(log_ids), max_entries]
+
+        if max_age:
+            conditions.append('timestamp < %s')
+            params.append(timezone.now() - max_age)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE id IN ('
+                f'  SELECT id FROM ('
+                f'    SELECT id, timestamp, ROW_NUMBER() OVER (PARTITION BY logger_id ORDER BY timestamp DESC, id DESC) AS position'
+                f'    FROM {table} WHERE logger_id = ANY(%s)'
+                f'  ) AS ranked WHERE {" OR ".join(conditions)}'
+                f')',
+                params
+            )
+            return cursor.rowcount
+
     def save(self, *args, **kwargs):
         """On save, update timestamps"""
         if not self.id:
@@ -567,6 +552,11 @@ class LogEntry(models.Model):
     timestamp = models.DateTimeField()
     message = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['logger', 'timestamp', 'id'], name='logentry_logger_ts_id_idx'),
+        ]
+
 
 class PoshProxy(models.Model):
     enabled = models.BooleanField(default=False)
@@ -577,7 +567,7 @@ class PoshProxy(models.Model):
     max_connections = models.IntegerField(default=2)
     registered_accounts = models.IntegerField(default=0, blank=True)
 
-    redis_id = models.CharField(max_length=40, default='', blank=True)
+    redis_id = models.CharField(max_length=40, default='', blank=True, db_index=True)
 
     ip = models.GenericIPAddressField()
     port = models.IntegerField()
@@ -607,23 +597,11 @@ class PoshProxy(models.Model):
         )
         new_connection.save()
 
-    def to_dict(self):
-        data = {}
-        for field in self._meta.get_fields():
-            field_type = field.get_internal_type()
-            if field_type not in ('OneToOneField', 'ForeignKey'):
-                if field_type == 'DateField':
-                    pass
-                elif field_type == 'BooleanField':
-                    data[field.name] = int(field.value_from_object(self))
-                else:
-                    data[field.name] = field.value_from_object(self)
-        return data
+    def to_dict(self, field_names=None):
+        return serialize(self, field_names)
 
     def remove_connection(self, posh_user):
-        connections = ProxyConnection.objects.filter(posh_user=posh_user, posh_proxy=self)
-        for connection in connections:
-            connection.delete()
+        ProxyConnection.objects.filter(posh_user=posh_user, posh_proxy=self).delete()
 
     def __str__(self):
         return f'Registration Proxy #{self.id}'
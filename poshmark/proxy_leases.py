@@ -0,0 +1,146 @@
+import threading
+import time
+
+from . import redis_store
+
+# Grants leases to the waiting campaigns strictly in arrival order, each to the proxy with the most free slots, until
+# the queue is empty or every slot is taken. Expired leases don't take up a slot, the sweep removes them.
+# KEYS: the wait queue then one lease set per proxy, ARGV: now, lease ttl, then the capacity of each proxy
+GRANT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local free = {}
+local granted = {}
+
+for i = 2, #KEYS do
+    free[i] = tonumber(ARGV[i + 1]) - redis.call('ZCOUNT', KEYS[i], '(' .. now, '+inf')
+end
+
+while true do
+    local head = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+    if not head then
+        break
+    end
+
+    local chosen = nil
+    for i = 2, #KEYS do
+        if free[i] > 0 and (chosen == nil or free[i] > free[chosen]) then
+            chosen = i
+        end
+    end
+    if chosen == nil then
+        break
+    end
+
+    redis.call('ZADD', KEYS[chosen], now + ttl, head)
+    redis.call('ZREM', KEYS[1], head)
+    free[chosen] = free[chosen] - 1
+    granted[#granted + 1] = head
+    granted[#granted + 1] = chosen - 1
+end
+
+return granted
+"""
+
+
+class ProxyLeases:
+    """Hands out proxy slots as expiring leases kept in redis. Each proxy has a sorted set of the campaigns holding one
+    of its slots, scored by when the lease expires, and campaigns waiting for a slot sit in a queue scored by when
+    they asked, so slots go to them in order."""
+    def __init__(self, namespace='proxy'):
+        self.namespace = namespace
+        self.queue_key = f'{namespace}_wait_queue'
+        self.r = redis_store.get_redis(redis_store.INSTANCE_DB)
+        self.grant_script = self.r.register_script(GRANT_SCRIPT)
+
+    def lease_key(self, proxy_id):
+        return f'{self.namespace}_leases:{proxy_id}'
+
+    def enqueue(self, campaign_id):
+        """Puts the campaign in the wait queue, a campaign already waiting keeps its place"""
+        self.r.zadd(self.queue_key, {campaign_id: time.time()}, nx=True)
+
+    def dequeue(self, campaign_id):
+        """Takes the campaign out of the wait queue, returns False if it wasn't waiting (e.g. it was just granted)"""
+        return bool(self.r.zrem(self.queue_key, campaign_id))
+
+    def waiting(self):
+        return self.r.zcard(self.queue_key)
+
+    def grant(self, capacities, ttl):
+        """Atomically grants leases of ttl seconds to as many waiting campaigns as the given {proxy id: capacity} allow,
+        returns the (campaign id, proxy id) pairs that were granted"""
+        if not capacities:
+            return []
+
+        proxy_ids = list(capacities.keys())
+        keys = [self.queue_key] + [self.lease_key(proxy_id) for proxy_id in proxy_ids]
+        args = [time.time(), ttl] + [capacities[proxy_id] for proxy_id in proxy_ids]
+        granted = self.grant_script(keys=keys, args=args)
+
+        return [
+            (granted[index], proxy_ids[int(granted[index + 1]) - 1]) for index in range(0, len(granted), 2)
+        ]
+
+    def release(self, proxy_id, campaign_id):
+        self.r.zrem(self.lease_key(proxy_id), campaign_id)
+
+    def renew(self, proxy_id, campaign_id, ttl):
+        """Pushes the lease's expiry ttl seconds out, returns False if the campaign no longer holds the lease"""
+        return bool(self.r.zadd(self.lease_key(proxy_id), {campaign_id: time.time() + ttl}, xx=True, ch=True))
+
+    def sweep(self, proxy_ids):
+        """Removes every expired lease on the given proxies in one transaction, returns the (campaign id, proxy id)
+        pairs that were removed"""
+        now = time.time()
+        pipe = self.r.pipeline(transaction=True)
+        for proxy_id in proxy_ids:
+            pipe.zrangebyscore(self.lease_key(proxy_id), '-inf', now)
+            pipe.zremrangebyscore(self.lease_key(proxy_id), '-inf', now)
+        results = pipe.execute()
+
+        return [
+            (campaign_id, proxy_id) for proxy_id, expired in zip(proxy_ids, results[::2]) for campaign_id in expired
+        ]
+
+    def active_leases(self, proxy_id):
+        """The number of leases on the proxy that haven't expired"""
+        return self.r.zcount(self.lease_key(proxy_id), time.time(), '+inf')
+
+    def reset(self):
+        """Drops every lease and the wait queue"""
+        keys = [self.queue_key] + list(self.r.scan_iter(match=self.lease_key('*')))
+        self.r.delete(*keys)
+
+
+class LeaseHeartbeat:
+    """Renews a proxy lease every interval seconds from a background thread for as long as the block it guards runs.
+    If the worker dies the renewals stop with it and the lease expires, and a campaign holding its proxy for longer than
+    max_seconds is left to expire as stuck."""
+    def __init__(self, leases, proxy_id, campaign_id, ttl, interval, max_seconds=None):
+        self.leases = leases
+        self.proxy_id = proxy_id
+        self.campaign_id = campaign_id
+        self.ttl = ttl
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        started = time.time()
+
+        while not self.stopped.wait(self.interval):
+            if self.max_seconds and time.time() - started > self.max_seconds:
+                break
+            if not self.leases.renew(self.proxy_id, self.campaign_id, self.ttl):
+                break
+
+    def __enter__(self):
+        self.leases.renew(self.proxy_id, self.campaign_id, self.ttl)
+        self.thread.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stopped.set()
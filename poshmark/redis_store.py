@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+
+import redis
+from django.conf import settings
+from redis.client import Pipeline
+
+LOG_DB = 1
+INSTANCE_DB = 2
+
+INSTANCE_UPDATES_STREAM = 'instance_updates'
+INSTANCE_UPDATES_GROUP = 'instance_reader'
+LOG_STREAM = 'log_entries'
+LOG_GROUP = 'log_reader'
+LOGS_TO_TRIM = 'logs_to_trim'  # Set of the loggers that received entries since trim_log_entries last ran
+
+INSTANCE_INDEX = 'instance_index'  # Hash of "<model>:<database id>" to the redis id of the object
+
+ID_COUNTER_START = 2 ** 32  # Above every id the old random allocator could have handed out
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+class CommandStats:
+    """Keeps a running count of the redis commands and round trips made by this process"""
+    def __init__(self):
+        self.commands = 0
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def record(self, commands, round_trips=1):
+        with self._lock:
+            self.commands += commands
+            self.round_trips += round_trips
+
+    def snapshot(self):
+        return self.commands, self.round_trips
+
+    def reset(self):
+        with self._lock:
+            self.commands = 0
+            self.round_trips = 0
+
+
+stats = CommandStats()
+
+
+class CountingPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        commands = len(self.command_stack)
+        if commands:
+            stats.record(commands)
+        return super(CountingPipeline, self).execute(raise_on_error)
+
+
+class CountingRedis(redis.Redis):
+    def execute_command(self, *args, **options):
+        stats.record(1)
+        return super(CountingRedis, self).execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return CountingPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def _check_fork():
+    """Celery prefork children inherit the parent's pools, so any pool created before the fork is thrown away and
+    rebuilt in the child instead of sharing sockets with the parent"""
+    global _pools_pid
+
+    if _pools_pid != os.getpid():
+        with _pools_lock:
+            if _pools_pid != os.getpid():
+                _pools.clear()
+                _pools_pid = os.getpid()
+
+
+def get_pool(db):
+    """Returns the process wide connection pool for the given redis db, creating it if needed"""
+    _check_fork()
+    pool = _pools.get(db)
+
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db)
+            if pool is None:
+                pool = redis.BlockingConnectionPool(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=db,
+                    decode_responses=True,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    timeout=settings.REDIS_POOL_TIMEOUT,
+                )
+                _pools[db] = pool
+
+    return pool
+
+
+def get_redis(db=INSTANCE_DB):
+    """Returns a redis client backed by the shared connection pool for the given db"""
+    return CountingRedis(connection_pool=get_pool(db))
+
+
+def pipeline(db=INSTANCE_DB, transaction=False):
+    """Returns a pipeline on the shared connection pool, commands are sent in a single round trip on execute"""
+    return get_redis(db).pipeline(transaction=transaction)
+
+
+def allocate_ids(namespaces, db=INSTANCE_DB):
+    """Allocates one id per namespace from per namespace INCR counters, all in a single round trip. The ids never
+    repeat, even across concurrent writers, so they need no existence check."""
+    pipe = pipeline(db)
+
+    for namespace in namespaces:
+        pipe.setnx(f'ids:{namespace}', ID_COUNTER_START)
+        pipe.incr(f'ids:{namespace}')
+
+    counters = pipe.execute()[1::2]
+
+    return [f'{namespace}_{counter}' for namespace, counter in zip(namespaces, counters)]
+
+
+def index_field(instance_type, instance_id):
+    """The field of INSTANCE_INDEX that points to the redis object of a database row"""
+    return f'{instance_type}:{instance_id}'
+
+
+def registry_key(instance_type):
+    """The set of every redis object of an instance type, which lets redis_cleaner skip scanning the keyspace"""
+    return f'registry:{instance_type}'
+
+
+def update_channel(object_id):
+    """The pub/sub channel on which every update to a redis object is announced"""
+    return f'updates:{object_id}'
+
+
+def publish_update(pipe, object_id, fields):
+    """Queues the announcement of an update to a redis object on the given pipeline"""
+    pipe.publish(update_channel(object_id), json.dumps(fields, default=str))
+
+
+def parse_update(message):
+    """Returns the object id and updated fields from a pub/sub message sent by publish_update"""
+    return message['channel'][len(update_channel('')):], json.loads(message['data'])
+
+
+def log_tail_stream(log_id):
+    """The short, capped stream holding a logger's latest messages for live viewers"""
+    return f'log_tail:{log_id}'
+
+
+def ensure_group(r, stream, group):
+    """Creates the consumer group (and the stream) if it doesn't exist yet"""
+    try:
+        r.xgroup_create(stream, group, id='0', mkstream=True)
+    except redis.ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def consume_stream(db, stream, group, consumer, handle_batch, count, block):
+    """Blocks on the stream and hands each batch of (entry id, fields) to handle_batch, acknowledging the batch once
+    it returns. Entries a previous run read but never acknowledged are handled first so a crash loses nothing."""
+    r = get_redis(db)
+    ensure_group(r, stream, group)
+    last_id = '0'
+
+    while True:
+        response = r.xreadgroup(group, consumer, {stream: last_id}, count=count, block=None if last_id == '0' else block)
+        entries = response[0][1] if response else []
+
+        if not entries:
+            last_id = '>'
+            continue
+
+        # Pending entries that were trimmed from the stream come back without fields
+        live_entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if live_entries:
+            handle_batch(live_entries)
+
+        r.xack(stream, group, *[entry_id for entry_id, fields in entries])
+
+
+def disconnect_all():
+    """Closes every pooled connection, used on worker shutdown and by the benchmarks"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.disconnect()
+        _pools.clear()
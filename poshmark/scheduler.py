@@ -0,0 +1,123 @@
+import datetime
+import functools
+import json
+import time
+
+import pytz
+from django.conf import settings
+
+from . import redis_store
+
+TIMERS_KEY = 'campaign_timers'
+
+# Claims the timers that are due and removes them in one step, so a timer never wakes its campaign twice
+# KEYS: the timers set, ARGV: now, the most timers to claim
+POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, campaign_id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], campaign_id)
+end
+return due
+"""
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_times(times):
+    """Turns a campaign's comma separated UTC hours (e.g. '04 AM,05 PM') into a mask with bit n set for hour n"""
+    mask = 0
+
+    for hour in times.split(','):
+        hour = hour.strip()
+        if hour:
+            mask |= 1 << datetime.datetime.strptime(hour, '%I %p').hour
+
+    return mask
+
+
+def is_active(mask, now):
+    return bool(mask >> now.hour & 1)
+
+
+def next_window(mask, now):
+    """Returns the (start, end) of the window of consecutive active hours that is open at now or opens next, None if no
+    hour is active. The start of an open window is the start of the current hour."""
+    if not mask:
+        return None
+
+    offset = 0
+    while not is_active(mask, now + datetime.timedelta(hours=offset)):
+        offset += 1
+
+    start = now.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=offset)
+    length = 0
+    while length < 24 and is_active(mask, start + datetime.timedelta(hours=length)):
+        length += 1
+
+    return start, start + datetime.timedelta(hours=length)
+
+
+def run_key(campaign_id):
+    return f'campaign_run:{campaign_id}'
+
+
+def save_run(campaign_id, run):
+    """Keeps what a campaign needs to pick up where it left off, once its next window opens or, for campaigns run in
+    steps, once its next step is due"""
+    fields = dict(run)
+    fields['end_time'] = run['end_time'].timestamp()
+    fields['sent_offer'] = int(bool(run['sent_offer']))
+    if 'pending_listings' in run:
+        fields['pending_listings'] = json.dumps(run['pending_listings'])
+    fields = {field_name: '' if value is None else value for field_name, value in fields.items()}
+
+    pipe = redis_store.pipeline(redis_store.INSTANCE_DB)
+    pipe.hset(run_key(campaign_id), mapping=fields)
+    pipe.expire(run_key(campaign_id), settings.REDIS_HELPER_KEY_TTL)
+    pipe.execute()
+
+
+def load_run(campaign_id):
+    run = redis_store.get_redis(redis_store.INSTANCE_DB).hgetall(run_key(campaign_id))
+
+    if not run:
+        return None
+
+    run['logger_id'] = int(run['logger_id'])
+    run['end_time'] = datetime.datetime.fromtimestamp(float(run['end_time']), pytz.utc)
+    run['sent_offer'] = bool(int(run['sent_offer']))
+    if 'pending_listings' in run:
+        run['pending_listings'] = json.loads(run['pending_listings'])
+
+    return run
+
+
+def delete_run(campaign_id):
+    redis_store.get_redis(redis_store.INSTANCE_DB).delete(run_key(campaign_id))
+
+
+class CampaignTimers:
+    """A redis sorted set of the campaigns waiting for their next window, scored by when they should wake up. Nothing
+    runs for a waiting campaign, the dispatcher claims the due timers and resumes their campaigns."""
+    def __init__(self):
+        self.r = redis_store.get_redis(redis_store.INSTANCE_DB)
+        self.pop_due_script = self.r.register_script(POP_DUE_SCRIPT)
+
+    def schedule(self, campaign_id, wake_at):
+        self.r.zadd(TIMERS_KEY, {campaign_id: wake_at.timestamp()})
+
+    def cancel(self, campaign_id):
+        self.r.zrem(TIMERS_KEY, campaign_id)
+
+    def wake(self, campaign_id):
+        """Makes a waiting campaign due now so it notices changes (e.g. a stop or new times) right away, returns False
+        if the campaign wasn't waiting"""
+        return bool(self.r.zadd(TIMERS_KEY, {campaign_id: time.time()}, xx=True, ch=True))
+
+    def pop_due(self, limit):
+        """Claims up to limit timers that are due, returns their campaign ids"""
+        return self.pop_due_script(keys=[TIMERS_KEY], args=[time.time(), limit])
+
+    def reset(self):
+        """Drops every timer along with the runs waiting on them"""
+        keys = [TIMERS_KEY] + list(self.r.scan_iter(match=run_key('*')))
+        self.r.delete(*keys)
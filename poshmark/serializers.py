@@ -0,0 +1,45 @@
+SKIPPED_FIELD_TYPES = ('OneToOneField', 'ForeignKey', 'DateField')
+
+_plans = {}
+
+
+def _boolean(value):
+    return int(value)
+
+
+def _file(value):
+    return value.path if value else ''
+
+
+CONVERTERS = {
+    'BooleanField': _boolean,
+    'FileField': _file,
+}
+
+
+def compile_plan(model):
+    """Works out once which fields of a model go to redis and how each value is converted, as a list of
+    (field name, attribute name, converter) tuples. ImageFields report FileField as their internal type."""
+    plan = []
+
+    for field in model._meta.get_fields():
+        field_type = field.get_internal_type()
+        if field.concrete and field_type not in SKIPPED_FIELD_TYPES:
+            plan.append((field.name, field.attname, CONVERTERS.get(field_type)))
+
+    _plans[model] = plan
+
+    return plan
+
+
+def serialize(instance, field_names=None):
+    """Returns the redis representation of a model instance, limited to field_names if given"""
+    plan = _plans.get(instance.__class__) or compile_plan(instance.__class__)
+    data = {}
+
+    for field_name, attname, converter in plan:
+        if field_names is None or field_name in field_names:
+            value = getattr(instance, attname)
+            data[field_name] = converter(value) if converter else value
+
+    return data
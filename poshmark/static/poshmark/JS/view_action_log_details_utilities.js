@@ -1,49 +1,65 @@
-setInterval(function get_log_entries() {
-    let log_container = $('#LogEntriesContainer');
-    $.ajax({
-       url: log_container.data('get-log-entries-url'),
-       type: 'GET',
-       cache: false,
-       processData: false,
-       contentType: false,
-       success: function (data) {
-           if (Object.keys(data).length > 0) {
-               let new_url = data.new_url;
-               let messages = data.log_entry_messages;
-
-               log_container.data('get-log-entries-url', new_url);
-               for (let i=0; i < messages.length; i++) {
-                   let container = document.getElementById('LogEntriesContainer');
-                   let row = document.createElement('DIV');
-                   let col = document.createElement('DIV');
-                   let message = document.createElement('P');
-                   let start_index = messages[i].indexOf('[') + 1;
-                   let end_index = messages[i].indexOf(']');
-                   let level = messages[i].substring(start_index, end_index);
-                   let message_class = 'text-dark';
-
-                   if (level === 'CRITICAL' || level === 'ERROR') {
-                       message_class = 'text-danger'
-                   } else if (level === 'WARNING') {
-                       message_class = 'text-warning'
-                   } else if (level === 'DEBUG') {
-                       message_class = 'text-info'
-                   }
-
-                   row.classList.add('row');
-                   col.classList.add('col');
-                   message.classList.add('m-0');
-                   message.classList.add(message_class);
-
-                   message.innerText = messages[i];
-
-                   col.appendChild(message);
-                   row.appendChild(col);
-                   container.appendChild(row);
-               }
-           }
-       },
-    });
-    return false;
-}, 1000);
+function create_log_entry_row(message_text, message_class) {
+    let row = document.createElement('DIV');
+    let col = document.createElement('DIV');
+    let message = document.createElement('P');
+
+    row.classList.add('row');
+    col.classList.add('col');
+    message.classList.add('m-0');
+    message.classList.add(message_class);
+
+    message.innerText = message_text;
+
+    col.appendChild(message);
+    row.appendChild(col);
+
+    return row;
+}
+
+$(document).ready(function () {
+    let container = document.getElementById('LogEntriesContainer');
+    let older_entries = document.getElementById('OlderLogEntries');
+    // The browser reconnects on its own and resumes from the last event id it received
+    let log_source = new EventSource(container.dataset.liveLogEntriesUrl);
+
+    log_source.onmessage = function (event) {
+        let data = JSON.parse(event.data);
+        let message_class = 'text-dark';
 
+        if (data.level === 'CRITICAL' || data.level === 'ERROR') {
+            message_class = 'text-danger'
+        } else if (data.level === 'WARNING') {
+            message_class = 'text-warning'
+        } else if (data.level === 'DEBUG') {
+            message_class = 'text-info'
+        }
+
+        container.appendChild(create_log_entry_row(data.message, message_class));
+    };
+
+    $('#LoadOlderLogEntries').click(function () {
+        $.ajax({
+            url: container.dataset.logEntriesUrl,
+            type: 'GET',
+            data: {'before': container.dataset.olderCursor},
+            success: function (data) {
+                let previous_height = container.scrollHeight;
+                let first_row = older_entries.nextSibling;
+
+                for (let i = 0; i < data.log_entries.length; i++) {
+                    let log_entry = data.log_entries[i];
+                    container.insertBefore(create_log_entry_row(log_entry.message, log_entry.css_class), first_row);
+                }
+
+                // Keeps the entries that were on screen in place
+                container.scrollTop += container.scrollHeight - previous_height;
+
+                if (data.older_cursor) {
+                    container.dataset.olderCursor = data.older_cursor;
+                } else {
+                    older_entries.classList.add('d-none');
+                }
+            },
+        });
+    });
+});
@@ -0,0 +1,50 @@
+function load_action_log_group(group) {
+    let url = group.closest('#accordion').data('action-log-group-url');
+    let search_params = new URLSearchParams(window.location.search);
+
+    $.ajax({
+        url: url,
+        type: 'GET',
+        data: {
+            'type': group.data('type'),
+            'title': group.data('title'),
+            'page': group.data('next-page'),
+            'description': search_params.get('description') || '',
+            'username_select': search_params.get('username_select') || '',
+        },
+        success: function (data) {
+            let logs_container = group.find('.action-log-group-logs');
+
+            for (let i = 0; i < data.logs.length; i++) {
+                let log = data.logs[i];
+                let link = $('<a class="col-lg-4 col-sm-6 col-12  text-dark mb-2" style="text-decoration: none"></a>');
+                let card = $('<div class="border border-dark rounded p-1"></div>');
+
+                link.attr('href', log.url);
+                card.append($('<h6><b>Description:</b> </h6>').append(document.createTextNode(log.description)));
+                card.append($('<h6><b>Date Created:</b> </h6>').append(document.createTextNode(log.date_created)));
+                card.append($('<h6><b>Time Created:</b> </h6>').append(document.createTextNode(log.time_created)));
+                link.append(card);
+                logs_container.append(link);
+            }
+
+            group.data('next-page', data.next_page);
+            group.find('.action-log-group-more').toggleClass('d-none', !data.next_page);
+        },
+    });
+}
+
+$(document).ready(function () {
+    $('.action-log-group').on('show.bs.collapse', function () {
+        let group = $(this);
+
+        if (!group.data('loaded')) {
+            group.data('loaded', true);
+            load_action_log_group(group);
+        }
+    });
+
+    $('.action-log-group-more').click(function () {
+        load_action_log_group($(this).closest('.action-log-group'));
+    });
+});
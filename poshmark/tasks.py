@@ -1,61 +1,110 @@
 import datetime
+import json
 import logging
 import random
 import time
 import traceback
+import uuid
 
 import pytz
-import redis
 import requests
 from celery import shared_task
+from celery.signals import worker_process_shutdown
 from django import db
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from poshmark.chrome_clients.clients import PoshMarkClient
+from poshmark.chrome_clients.clients import Logger, PoshMarkClient
+from poshmark.chrome_clients.pool import get_parked_clients
 from users.models import User
-from .models import Campaign, Listing, Log, PoshProxy, PoshUser, ProxyConnection
+from . import redis_store, scheduler
+from .campaign_state import CampaignState
+from .models import Campaign, Listing, Log, LogEntry, PoshProxy, PoshUser, ProxyConnection
+from .proxy_leases import LeaseHeartbeat, ProxyLeases
 
 
-def get_new_id(instance_type):
-    r = redis.Redis(db=2, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-    instance_id = f'{instance_type}_{random.getrandbits(32)}'
+def lease_heartbeat(campaign_id, proxy_id):
+    """Keeps the campaign's proxy lease alive while the task is using the proxy"""
+    return LeaseHeartbeat(
+        ProxyLeases(), proxy_id, campaign_id, settings.PROXY_LEASE_HEARTBEAT_TTL,
+        settings.PROXY_LEASE_HEARTBEAT_INTERVAL, settings.PROXY_LEASE_MAX_SECONDS
+    )
 
-    while r.exists(instance_id):
-        instance_id = f'{instance_type}_{random.getrandbits(32)}'
 
-    return instance_id
+@worker_process_shutdown.connect
+def close_redis_pools(**kwargs):
+    redis_store.disconnect_all()
 
 
-def remove_proxy_connection(campaign_id, proxy_id):
-    proxy = PoshProxy.objects.get(id=proxy_id)
-    posh_user = PoshUser.objects.get(campaign__id=campaign_id)
+def get_new_id(instance_type):
+    return redis_store.allocate_ids([instance_type])[0]
 
-    proxy.remove_connection(posh_user)
+
+def remove_proxy_connection(campaign_id, proxy_id):
+    ProxyConnection.objects.filter(posh_proxy_id=proxy_id, posh_user__campaign__id=campaign_id).delete()
+    ProxyLeases().release(proxy_id, campaign_id)
+    allocate_proxies.delay()
 
     db.connections.close_all()
 
 
+INSTANCE_TYPES = {
+    'PoshUser': PoshUser,
+    'Campaign': Campaign,
+    'Listing': Listing,
+    'PoshProxy': PoshProxy
+}
+
+
+def delete_redis_objects(redis_ids):
+    """Deletes redis objects along with their photos list, index entries and registry membership"""
+    r = redis_store.get_redis(redis_store.INSTANCE_DB)
+    redis_ids = list(redis_ids)
+
+    if redis_ids:
+        pipe = r.pipeline(transaction=False)
+        for redis_id in redis_ids:
+            pipe.hmget(redis_id, ['id', 'photos'])
+        attrs = pipe.execute()
+
+        unindex_redis_objects((redis_id, instance_id) for redis_id, (instance_id, photos_id) in zip(redis_ids, attrs))
+
+        pipe.delete(*redis_ids, *[photos_id for instance_id, photos_id in attrs if photos_id])
+        for redis_id in redis_ids:
+            pipe.srem(redis_store.registry_key(redis_id[:redis_id.find('_')]), redis_id)
+        pipe.execute()
+
+
 def remove_redis_object(*args):
-    r = redis.Redis(db=2, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-    instance_types = {
-        'PoshUser': PoshUser,
-        'Campaign': Campaign,
-        'Listing': Listing,
-        'PoshProxy': PoshProxy
-    }
+    delete_redis_objects(args)
 
+    redis_ids_by_type = {}
     for redis_id in args:
-        r.delete(redis_id)
-        instance_type = redis_id[:redis_id.find('_')]
-        model = instance_types[instance_type]
+        redis_ids_by_type.setdefault(redis_id[:redis_id.find('_')], []).append(redis_id)
+
+    for instance_type, redis_ids in redis_ids_by_type.items():
+        INSTANCE_TYPES[instance_type].objects.filter(redis_id__in=redis_ids).update(redis_id='')
 
-        try:
-            instance = model.objects.get(redis_id=redis_id)
-            instance.redis_id = ''
-            instance.save()
-        except model.DoesNotExist:
-            pass
+
+def unindex_redis_objects(objects):
+    """Removes the index entries of the given (redis id, database id) pairs, leaving alone entries that already point
+    to a newer redis object of the same row"""
+    r = redis_store.get_redis(redis_store.INSTANCE_DB)
+    objects = [(redis_id, instance_id) for redis_id, instance_id in objects if instance_id]
+
+    if objects:
+        fields = [redis_store.index_field(redis_id[:redis_id.find('_')], instance_id) for redis_id, instance_id in objects]
+        indexed_ids = r.hmget(redis_store.INSTANCE_INDEX, fields)
+        stale_fields = [
+            field for field, (redis_id, instance_id), indexed_id in zip(fields, objects, indexed_ids)
+            if indexed_id == redis_id
+        ]
+
+        if stale_fields:
+            r.hdel(redis_store.INSTANCE_INDEX, *stale_fields)
 
 
 def initialize_campaign(campaign_id, registration_proxy_id=None):
@@ -91,8 +140,97 @@ def initialize_campaign(campaign_id, registration_proxy_id=None):
     return redis_campaign_id, redis_posh_user_id, logger.id, redis_listing_id, redis_registration_proxy_id
 
 
+def begin_run(campaign_id, task_name, resumed, registration_proxy_id=None, run_id=None):
+    """Initializes a new run of the campaign, or loads the run a timer or step resumed. Returns None if there is no run
+    to resume, e.g. the campaign was reset while it waited, or if run_id belongs to a run that has since been replaced."""
+    if resumed:
+        run = scheduler.load_run(campaign_id)
+        if not run:
+            logging.warning(f'Campaign {campaign_id} has no run to resume')
+        elif run_id and run.get('run_id') != run_id:
+            logging.warning(f'Campaign {campaign_id} discarded a step of run {run_id}, its current run is {run.get("run_id")}')
+            return None
+        return run
+
+    scheduler.CampaignTimers().cancel(campaign_id)
+    redis_campaign_id, redis_posh_user_id, logger_id, redis_listing_id, redis_registration_proxy_id = initialize_campaign(campaign_id, registration_proxy_id)
+    run = {
+        'run_id': uuid.uuid4().hex,
+        'task': task_name,
+        'redis_campaign_id': redis_campaign_id,
+        'redis_posh_user_id': redis_posh_user_id,
+        'redis_listing_id': redis_listing_id,
+        'redis_registration_proxy_id': redis_registration_proxy_id,
+        'logger_id': logger_id,
+        'end_time': datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1),
+        'sent_offer': False,
+    }
+    scheduler.save_run(campaign_id, run)
+
+    return run
+
+
+def pause_campaign(campaign_id, state, run):
+    """Frees the worker and the browser until the campaign's next window opens, or until the run ends if that comes
+    first. The campaign keeps its running status while it waits."""
+    now = datetime.datetime.now(pytz.utc)
+    window = scheduler.next_window(state.hour_mask, now)
+    wake_at = min(window[0], run['end_time']) if window else run['end_time']
+
+    scheduler.save_run(campaign_id, run)
+    scheduler.CampaignTimers().schedule(campaign_id, wake_at)
+
+    local_tz = pytz.timezone('US/Eastern')
+    log_to_redis(str(run['logger_id']), {
+        'level': 'WARNING',
+        'message': f"This campaign is not set to run at {now.astimezone(local_tz).strftime('%I %p')}, sleeping until "
+                   f"{wake_at.astimezone(local_tz).strftime('%I:%M %p')}..."
+    })
+
+
+def count_registration(redis_registration_proxy_id):
+    """Counts a registration on the proxy toward its max accounts. Only runs that had to register the account count,
+    a campaign restarted with an account that's already registered uses up nothing."""
+    registered_accounts = get_redis_object_attr(redis_registration_proxy_id, 'registered_accounts')
+    total_registered = int(registered_accounts) + 1 if registered_accounts else 1
+    update_redis_object(redis_registration_proxy_id, {'registered_accounts': str(total_registered)})
+
+
+def requeue_at_next_window(campaign_id, proxy_id, state, run):
+    """Gives the campaign's proxy back and pauses it until its next window opens, when requeue_campaign puts it back in
+    the queue for a proxy. Holding the proxy through the hours off would keep its slot from registrations for nothing."""
+    remove_proxy_connection(campaign_id, proxy_id)
+    run['task'] = 'requeue_campaign'
+    pause_campaign(campaign_id, state, run)
+    state.close()
+
+
+def end_run(campaign_id):
+    scheduler.CampaignTimers().cancel(campaign_id)
+    scheduler.delete_run(campaign_id)
+
+
+def finish_campaign(campaign_id, state, run):
+    """Ends the campaign's run, restarting the campaign if it was still running or asked for a restart"""
+    state.close()
+    end_run(campaign_id)
+    log_to_redis(str(run['logger_id']), {'level': 'INFO', 'message': 'Campaign Ended'})
+
+    state.refresh()
+    posh_user_status = state.posh_user_status
+    campaign_status = state.campaign_status
+
+    state.update_redis_object(state.redis_campaign_id, {'status': '2'})
+
+    if posh_user_status != PoshUser.INACTIVE:
+        state.update_redis_object(state.redis_posh_user_id, {'status': PoshUser.IDLE})
+
+    if campaign_status == '1' or campaign_status == '5':
+        restart_task.delay(campaign_id)
+
+
 def get_redis_object_attr(object_id, field_name=None):
-    r = redis.Redis(db=2, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    r = redis_store.get_redis(redis_store.INSTANCE_DB)
     if field_name:
         return r.hget(object_id, field_name)
     else:
@@ -100,15 +238,15 @@ def get_redis_object_attr(object_id, field_name=None):
 
 
 def create_redis_object(instance):
-    r = redis.Redis(db=2, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    r = redis_store.get_redis(redis_store.INSTANCE_DB)
     instance_type = str(instance.__class__.__name__)
     already_exists = False
 
     if instance_type == 'PoshProxy':
-        for posh_proxy_key in r.scan_iter(match='PoshProxy_*'):
-            if instance.id == r.hget(posh_proxy_key, 'id'):
-                already_exists = True
-                instance_id = posh_proxy_key
+        indexed_id = r.hget(redis_store.INSTANCE_INDEX, redis_store.index_field(instance_type, instance.id))
+        if indexed_id and r.exists(indexed_id):
+            already_exists = True
+            instance_id = indexed_id
     elif instance_type == 'PoshUser' and not instance.is_registered:
         username = instance.username
         username_test = requests.get(f'https://poshmark.com/closet/{username}', timeout=10)
@@ -120,17 +258,28 @@ def create_redis_object(instance):
         instance.username = username
         instance.save()
 
+    # Every id this object needs is allocated in one round trip
+    namespaces = ([] if already_exists else [instance_type]) + (['photos'] if instance_type == 'Listing' else [])
+    new_ids = dict(zip(namespaces, redis_store.allocate_ids(namespaces))) if namespaces else {}
+    pipe = r.pipeline(transaction=False)
+
     if not already_exists:
-        instance_id = get_new_id(instance_type)
+        instance_id = new_ids[instance_type]
+
+        pipe.hset(instance_id, 'instance_type', instance_type)
+        pipe.hset(instance_id, mapping=instance.to_dict())
+        pipe.hset(redis_store.INSTANCE_INDEX, redis_store.index_field(instance_type, instance.id), instance_id)
+        pipe.sadd(redis_store.registry_key(instance_type), instance_id)
 
-        r.hset(instance_id, 'instance_type', instance_type)
-        r.hset(instance_id, mapping=instance.to_dict())
-    
     if instance_type == 'Listing':
-        photos_id = get_new_id('photos')
-        for listing_photo in instance.get_photos():
-            r.lpush(photos_id, listing_photo)
-        r.hset(instance_id, 'photos', photos_id)
+        photos_id = new_ids['photos']
+        listing_photos = instance.get_photos()
+        if listing_photos:
+            pipe.lpush(photos_id, *listing_photos)
+            pipe.expire(photos_id, settings.REDIS_HELPER_KEY_TTL)
+        pipe.hset(instance_id, 'photos', photos_id)
+
+    pipe.execute()
 
     instance.redis_id = instance_id
     instance.save()
@@ -141,41 +290,66 @@ def create_redis_object(instance):
 
 
 def update_redis_object(object_id, fields):
-    r = redis.Redis(db=2, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    update_redis_objects([(object_id, fields)])
 
-    if r.hgetall(object_id):
-        r.hset(object_id, mapping=fields)
 
-        fields_id = get_new_id('fields')
+def update_redis_objects(updates):
+    """Applies several (object_id, fields) updates, checking existence and writing everything in two round trips"""
+    r = redis_store.get_redis(redis_store.INSTANCE_DB)
 
-        # Creates an entry with a unique id and store the value that was updated and the value it got updated to
-        r.hset(fields_id, mapping=fields)
+    # The database id doubles as the existence check, every redis object is created with one
+    pipe = r.pipeline(transaction=False)
+    for object_id, fields in updates:
+        pipe.hget(object_id, 'id')
+    instance_ids = pipe.execute()
 
-        updated_entry = {
-            'object_id': object_id,
-            'fields_id': fields_id,
-        }
+    for (object_id, fields), instance_id in zip(updates, instance_ids):
+        if instance_id is not None:
+            pipe.hset(object_id, mapping=fields)
+            # Queues the update for redis_instance_reader to apply to the database row, found by its primary key since
+            # the row may have moved on to a new redis object by the time the update is read
+            pipe.xadd(
+                redis_store.INSTANCE_UPDATES_STREAM,
+                {'object_id': object_id, 'pk': instance_id, 'fields': json.dumps(fields, default=str)},
+                maxlen=settings.INSTANCE_UPDATES_STREAM_MAXLEN,
+                approximate=True,
+            )
+            # Lets running campaigns react to the change immediately instead of polling for it
+            redis_store.publish_update(pipe, object_id, fields)
 
-        # This maps the updated entry to the object it belongs to
-        r.hset(get_new_id('updated'), mapping=updated_entry)
+    pipe.execute()
 
 
 def log_to_redis(log_id, fields):
-    r = redis.Redis(db=1, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    r = redis_store.get_redis(redis_store.LOG_DB)
 
     redis_message = {
         'log_id': log_id,
+        'timestamp': time.time(),
     }
 
     for key, value in fields.items():
         redis_message[key] = value
 
-    message_id = random.getrandbits(32)
+    pipe = r.pipeline(transaction=False)
+    pipe.xadd(redis_store.LOG_STREAM, redis_message, maxlen=settings.LOG_STREAM_MAXLEN, approximate=True)
+    # The per logger tail is what the action log page streams from, the entry ids double as resume cursors
+    pipe.xadd(redis_store.log_tail_stream(log_id), redis_message, maxlen=settings.LOG_TAIL_MAXLEN, approximate=True)
+    pipe.expire(redis_store.log_tail_stream(log_id), settings.LOG_TAIL_TTL)
+    pipe.execute()
+
 
-    while r.exists(message_id):
-        message_id = random.getrandbits(32)
+def get_log_tail_cursor(log_id, timestamp=None):
+    """Returns the id of the last tail entry logged at or before the given timestamp, so a page rendered from the
+    database can resume from the live tail without gaps or repeats"""
+    r = redis_store.get_redis(redis_store.LOG_DB)
 
-    r.hset(f'Message:{message_id}', mapping=redis_message)
+    if timestamp:
+        for entry_id, fields in r.xrevrange(redis_store.log_tail_stream(log_id), count=settings.LOG_TAIL_MAXLEN):
+            if float(fields['timestamp']) <= timestamp.timestamp():
+                return entry_id
+
+    return '0'
 
 
 @shared_task
@@ -199,200 +373,409 @@ def generate_posh_users(password, quantity, user_id, email=None):
         new_posh_user.save()
 
 
+def ingest_log_messages(entries):
+    """Writes a batch of streamed log messages with one bulk insert, retention is left to trim_log_entries"""
+    log_levels = {level_name: level for level, level_name in LogEntry.LOG_LEVELS if level_name}
+    log_ids = {int(fields['log_id']) for entry_id, fields in entries}
+    existing_log_ids = set(Log.objects.filter(id__in=log_ids).values_list('id', flat=True))
+    log_entries = []
+
+    for entry_id, fields in entries:
+        log_id = int(fields['log_id'])
+        if log_id in existing_log_ids and fields.get('level') in log_levels:
+            log_entries.append(LogEntry(
+                level=log_levels[fields['level']],
+                logger_id=log_id,
+                timestamp=datetime.datetime.fromtimestamp(float(fields['timestamp']), pytz.utc),
+                message=fields['message'],
+            ))
+
+    LogEntry.objects.bulk_create(log_entries, batch_size=settings.LOG_BATCH_SIZE)
+
+    if log_entries:
+        redis_store.get_redis(redis_store.LOG_DB).sadd(
+            redis_store.LOGS_TO_TRIM, *{log_entry.logger_id for log_entry in log_entries}
+        )
+
+    return len(log_entries)
+
+
 @shared_task
 def redis_log_reader():
     try:
-        r = redis.Redis(db=1, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-
-        while True:
-            for message_id in r.scan_iter():
-                log_id = r.hget(message_id, 'log_id')
-                log_level = r.hget(message_id, 'level')
-                log_message = r.hget(message_id, 'message')
-                try:
-                    log = Log.objects.get(id=log_id)
-
-                    if log_level == 'CRITICAL':
-                        log.critical(log_message)
-                    elif log_level == 'ERROR':
-                        log.error(log_message)
-                    elif log_level == 'WARNING':
-                        log.warning(log_message)
-                    elif log_level == 'INFO':
-                        log.info(log_message)
-                    elif log_level == 'DEBUG':
-                        log.debug(log_message)
-
-                    r.delete(message_id)
-                except Log.DoesNotExist:
-                    r.delete(message_id)
+        redis_store.consume_stream(
+            redis_store.LOG_DB,
+            redis_store.LOG_STREAM,
+            redis_store.LOG_GROUP,
+            'redis_log_reader',
+            ingest_log_messages,
+            count=settings.LOG_BATCH_SIZE,
+            block=settings.STREAM_BLOCK_MILLISECONDS,
+        )
     except Exception as e:
         logging.info(traceback.format_exc())
         redis_log_reader.delay()
 
 
-@shared_task
-def redis_instance_reader():
-    try:
-        r = redis.Redis(db=2, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-        instance_types = {
-            'PoshUser': PoshUser,
-            'Campaign': Campaign,
-            'Listing': Listing,
-            'PoshProxy': PoshProxy
-        }
-        while True:
-            updated_keys = r.scan_iter(match='updated_*')
-            for updated_key in updated_keys:
-                object_id = r.hget(updated_key, 'object_id')
-                fields_id = r.hget(updated_key, 'fields_id')
-                instance_type = r.hget(object_id, 'instance_type')
-                instance_id = int(r.hget(object_id, 'id'))
-
-                model = instance_types[instance_type]
+def apply_instance_updates(entries):
+    """Writes a batch of streamed instance updates to the database. The updates are replayed in order on instances
+    loaded with one query per model, then each instance is written once with the net result using bulk_update."""
+    updates_by_type = {}
+
+    for entry_id, entry in entries:
+        object_id = entry['object_id']
+        instance_type = object_id[:object_id.find('_')]
+        if instance_type in INSTANCE_TYPES:
+            updates_by_type.setdefault(instance_type, []).append(
+                (object_id, entry.get('pk'), json.loads(entry['fields']))
+            )
+
+    for instance_type, updates in updates_by_type.items():
+        model = INSTANCE_TYPES[instance_type]
+        pks = {int(pk) for object_id, pk, fields in updates if pk}
+        # Entries queued before the primary key was carried can only be matched by their redis id
+        redis_ids = {object_id for object_id, pk, fields in updates if not pk}
+        lookup = Q(pk__in=pks) | Q(redis_id__in=redis_ids) if redis_ids else Q(pk__in=pks)
+        instances_by_pk = {instance.pk: instance for instance in model.objects.filter(lookup)}
+        instances_by_redis_id = {instance.redis_id: instance for instance in instances_by_pk.values()}
+        changed_fields = {}
+
+        for object_id, pk, fields in updates:
+            instance = instances_by_pk.get(int(pk)) if pk else instances_by_redis_id.get(object_id)
+            if not instance:
+                logging.warning(f'Dropped an update to {object_id} (pk {pk or "unknown"}), no {instance_type} row matches it')
+                continue
+
+            for field_name, field_value in fields.items():
                 try:
-                    instance = model.objects.get(id=instance_id)
-                    fields_to_update = r.hgetall(fields_id)
-                    for field_name, field_value in fields_to_update.items():
-                        if not (instance_type == 'Campaign' and field_name == 'status' and getattr(instance, field_name) == '4') and not (instance_type == 'Campaign' and field_name == 'status' and getattr(instance, field_name) == '2' and (field_value == '3' or field_value == '5')):
-                            if field_name in ('registered_accounts',):
-                                setattr(instance, field_name, int(field_value))
-                            else:
-                                setattr(instance, field_name, field_value)
+                    model._meta.get_field(field_name)
+                except FieldDoesNotExist:
+                    continue
+
+                if not (instance_type == 'Campaign' and field_name == 'status' and getattr(instance, field_name) == '4') and not (instance_type == 'Campaign' and field_name == 'status' and getattr(instance, field_name) == '2' and (field_value == '3' or field_value == '5')):
+                    if field_name in ('registered_accounts',):
+                        setattr(instance, field_name, int(field_value))
+                    else:
+                        setattr(instance, field_name, field_value)
+                    changed_fields.setdefault(instance.pk, set()).add(field_name)
+
+        # Instances are grouped by the fields that changed so nothing else on them gets overwritten
+        instances_by_fields = {}
+        for instance_pk, field_names in changed_fields.items():
+            instances_by_fields.setdefault(frozenset(field_names), []).append(instances_by_pk[instance_pk])
+
+        for field_names, instances_to_update in instances_by_fields.items():
+            model.objects.bulk_update(instances_to_update, list(field_names))
 
-                    instance.save()
 
-                    r.delete(updated_key)
-                    r.delete(fields_id)
-                except model.DoesNotExist:
-                    r.delete(updated_key)
-                    r.delete(fields_id)
+@shared_task
+def redis_instance_reader():
+    try:
+        redis_store.consume_stream(
+            redis_store.INSTANCE_DB,
+            redis_store.INSTANCE_UPDATES_STREAM,
+            redis_store.INSTANCE_UPDATES_GROUP,
+            'redis_instance_reader',
+            apply_instance_updates,
+            count=settings.INSTANCE_UPDATES_BATCH_SIZE,
+            block=settings.STREAM_BLOCK_MILLISECONDS,
+        )
     except Exception as e:
         logging.info(traceback.format_exc())
         redis_instance_reader.delay()
 
 
+@shared_task
+def trim_log_entries():
+    """Trims the loggers that received entries since the last run down to their newest entries (and drops entries past
+    the max age if one is set), issuing one DELETE per batch of loggers. Loggers nothing was written to can't have grown
+    past the cap, so they are left alone unless they hold entries past the max age."""
+    max_age = datetime.timedelta(days=settings.LOG_ENTRY_MAX_AGE_DAYS) if settings.LOG_ENTRY_MAX_AGE_DAYS else None
+
+    # Taken and cleared in one step, loggers written to while the trim runs are left for the next run
+    pipe = redis_store.pipeline(redis_store.LOG_DB, transaction=True)
+    pipe.smembers(redis_store.LOGS_TO_TRIM)
+    pipe.delete(redis_store.LOGS_TO_TRIM)
+    log_ids = {int(log_id) for log_id in pipe.execute()[0]}
+
+    if max_age:
+        log_ids.update(
+            LogEntry.objects.filter(timestamp__lt=timezone.now() - max_age).values_list('logger_id', flat=True).distinct()
+        )
+
+    log_ids = sorted(log_ids)
+    deleted = 0
+
+    for start in range(0, len(log_ids), settings.LOG_TRIM_BATCH_SIZE):
+        deleted += Log.trim_entries(log_ids[start:start + settings.LOG_TRIM_BATCH_SIZE],
+                                    settings.LOG_ENTRIES_PER_LOGGER, max_age)
+
+    logging.info(f'Trimmed {deleted} log entries across {len(log_ids)} loggers')
+
+
+def purge_logs(older_than, logs_per_batch, entries_per_batch, progress=None):
+    """Deletes the logs created before older_than that belong to idle campaigns or to no campaign at all (registration
+    logs). Loggers are handled in chunks, their entries are deleted in id batches of at most entries_per_batch rows so
+    no single transaction grows unbounded, then the chunk of logs is deleted with one statement. progress is called
+    with the running totals after each chunk."""
+    start_time = time.time()
+    log_ids = list(
+        Log.objects.filter(created_date__lte=older_than)
+        .filter(Q(campaign__isnull=True) | Q(campaign__status='2'))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    metrics = {'logs': 0, 'entries': 0, 'total_logs': len(log_ids), 'seconds': 0}
+
+    for start in range(0, len(log_ids), logs_per_batch):
+        chunk = log_ids[start:start + logs_per_batch]
+
+        while True:
+            entry_ids = list(LogEntry.objects.filter(logger_id__in=chunk).values_list('id', flat=True)[:entries_per_batch])
+            if not entry_ids:
+                break
+
+            with transaction.atomic():
+                metrics['entries'] += LogEntry.objects.filter(id__in=entry_ids).delete()[0]
+
+        with transaction.atomic():
+            Log.objects.filter(id__in=chunk).delete()
+        metrics['logs'] += len(chunk)
+        metrics['seconds'] = round(time.time() - start_time, 2)
+
+        if progress:
+            progress(metrics)
+
+    metrics['seconds'] = round(time.time() - start_time, 2)
+
+    return metrics
+
+
 @shared_task
 def log_cleanup():
-    logs = Log.objects.filter(created_date__lte=timezone.now()-datetime.timedelta(days=2))
+    metrics = purge_logs(
+        timezone.now() - datetime.timedelta(days=settings.LOG_CLEANUP_AGE_DAYS),
+        settings.LOG_CLEANUP_LOGS_PER_BATCH,
+        settings.LOG_CLEANUP_ENTRIES_PER_BATCH,
+    )
+
+    logging.info(f'Log cleanup deleted {metrics["logs"]} logs and {metrics["entries"]} entries in {metrics["seconds"]}s')
 
-    for log in logs:
-        if log.campaign.status == '2':
-            log.delete()
+
+def register_legacy_redis_objects(r):
+    """One off scan that adds the objects created before the registries existed to them"""
+    if r.set('registry:backfilled', 1, nx=True):
+        pipe = r.pipeline(transaction=False)
+        for key in r.scan_iter(count=1000):
+            instance_type = key[:key.find('_')]
+            if instance_type in INSTANCE_TYPES:
+                pipe.sadd(redis_store.registry_key(instance_type), key)
+        pipe.execute()
 
 
 @shared_task
 def redis_cleaner():
-    r = redis.Redis(db=2, decode_responses=True, host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-    instance_types = {
-        'PoshUser': PoshUser,
-        'Campaign': Campaign,
-        'Listing': Listing,
-        'PoshProxy': PoshProxy
+    """Deletes the redis objects whose database row no longer points to them. Walks each type's registry set in
+    batches with one redis_id__in query per batch, so the cost follows the number of objects rather than the size
+    of the keyspace."""
+    r = redis_store.get_redis(redis_store.INSTANCE_DB)
+    register_legacy_redis_objects(r)
+    deleted = 0
+
+    for instance_type, model in INSTANCE_TYPES.items():
+        registry = r.sscan_iter(redis_store.registry_key(instance_type), count=settings.REDIS_CLEANER_BATCH_SIZE)
+        redis_ids = list(registry)
+
+        for start in range(0, len(redis_ids), settings.REDIS_CLEANER_BATCH_SIZE):
+            batch = redis_ids[start:start + settings.REDIS_CLEANER_BATCH_SIZE]
+            live_ids = set(model.objects.filter(redis_id__in=batch).values_list('redis_id', flat=True))
+            orphaned_ids = [redis_id for redis_id in batch if redis_id not in live_ids]
+
+            delete_redis_objects(orphaned_ids)
+            deleted += len(orphaned_ids)
+
+    # Drops index entries whose redis object is gone
+    index = r.hgetall(redis_store.INSTANCE_INDEX)
+    pipe = r.pipeline(transaction=False)
+    for redis_id in index.values():
+        pipe.exists(redis_id)
+    dangling_fields = [field for field, exists in zip(index.keys(), pipe.execute()) if not exists]
+
+    if dangling_fields:
+        r.hdel(redis_store.INSTANCE_INDEX, *dangling_fields)
+
+    logging.info(f'Redis cleaner deleted {deleted} objects')
+
+
+def dispatch_campaign(campaign_id, registration_proxy_id=None):
+    """Starts the campaign's task, on the given proxy for the modes that need one"""
+    campaign = Campaign.objects.select_related('posh_user').get(id=campaign_id)
+
+    if campaign.status != '4':
+        logging.error('This campaign does not have status starting, cannot start.')
+        if registration_proxy_id:
+            ProxyLeases().release(registration_proxy_id, campaign_id)
+        return
+
+    if campaign.mode in (Campaign.ADVANCED_SHARING, Campaign.REGISTER, Campaign.LIST_ITEM):
+        registration_proxy = PoshProxy.objects.get(id=registration_proxy_id)
+        registration_proxy.add_connection(campaign.posh_user)
+    elif registration_proxy_id:
+        # Nothing in this mode uses the proxy or keeps its lease alive, the slot goes straight back
+        ProxyLeases().release(registration_proxy_id, campaign_id)
+
+    campaign.status = '1'
+    campaign.save()
+
+    if campaign.mode == Campaign.ADVANCED_SHARING:
+        advanced_sharing.delay(campaign_id, registration_proxy_id)
+    elif campaign.mode == Campaign.BASIC_SHARING:
+        if settings.CAMPAIGN_STEP_TASKS:
+            basic_sharing_step.delay(campaign_id)
+        else:
+            basic_sharing.delay(campaign_id)
+    elif campaign.mode == Campaign.REGISTER:
+        register_posh_user.delay(campaign_id, registration_proxy_id)
+    elif campaign.mode == Campaign.LIST_ITEM:
+        list_item.delay(campaign_id, registration_proxy_id)
+    elif campaign.mode == Campaign.AGING:
+        if settings.CAMPAIGN_STEP_TASKS:
+            aging_step.delay(campaign_id)
+        else:
+            aging.delay(campaign_id)
+
+
+@shared_task
+def allocate_proxies():
+    """Grants proxy leases to the waiting campaigns in the order they asked and dispatches each one as soon as it has
+    its lease. Runs whenever a campaign asks for a proxy or gives one back, and after every sweep of expired leases."""
+    leases = ProxyLeases()
+
+    if not leases.waiting():
+        return
+
+    capacities = {}
+    for proxy in PoshProxy.objects.filter(enabled=True):
+        if proxy.registered_accounts >= proxy.max_accounts:
+            if leases.active_leases(proxy.id):
+                continue
+            proxy.reset_ip()
+            proxy.refresh_from_db()
+            if proxy.redis_id:
+                remove_redis_object(proxy.redis_id)
+
+        # Every lease can end in a registration so a proxy never hands out more than it has accounts left
+        capacity = min(proxy.max_connections, proxy.max_accounts - proxy.registered_accounts)
+        if capacity > 0:
+            capacities[proxy.id] = capacity
+
+    for campaign_id, proxy_id in leases.grant(capacities, settings.PROXY_LEASE_TTL):
+        dispatch_campaign(int(campaign_id), proxy_id)
+
+    db.connections.close_all()
+
+
+@shared_task
+def reclaim_proxy_leases():
+    """Frees the slots of leases that stopped getting heartbeats and flags the campaigns that held them for a
+    restart"""
+    proxy_ids = list(PoshProxy.objects.values_list('id', flat=True))
+    expired = ProxyLeases().sweep(proxy_ids)
+
+    if expired:
+        campaign_ids = {int(campaign_id) for campaign_id, proxy_id in expired}
+        updates = []
+        for campaign in Campaign.objects.filter(id__in=campaign_ids).select_related('posh_user'):
+            if campaign.redis_id:
+                updates.append((campaign.redis_id, {'status': '5'}))
+                if campaign.posh_user and campaign.posh_user.redis_id:
+                    updates.append((campaign.posh_user.redis_id, {'status': PoshUser.IDLE}))
+        update_redis_objects(updates)
+
+        ProxyConnection.objects.filter(posh_user__campaign__id__in=campaign_ids).delete()
+        logging.info(f'Reclaimed {len(expired)} expired proxy leases')
+
+    allocate_proxies()
+
+    db.connections.close_all()
+
+
+@shared_task
+def dispatch_campaign_timers():
+    """Resumes the campaigns whose next window has opened"""
+    resumable_tasks = {
+        'basic_sharing': basic_sharing,
+        'advanced_sharing': advanced_sharing,
+        'aging': aging,
+        'basic_sharing_step': basic_sharing_step,
+        'aging_step': aging_step,
+        'requeue_campaign': requeue_campaign,
     }
-    for key in r.scan_iter():
-        instance_type = key[:key.find('_')]
-        if instance_type in instance_types.keys():
-            model = instance_types[instance_type]
-            try:
-                model.objects.get(redis_id=key)
-            except model.DoesNotExist:
-                if instance_type == 'Listing':
-                    r.delete(r.hget(key, 'photos'))
-                r.delete(key)
+
+    for campaign_id in scheduler.CampaignTimers().pop_due(settings.CAMPAIGN_TIMER_BATCH_SIZE):
+        run = scheduler.load_run(campaign_id)
+        if run and run['task'] in resumable_tasks:
+            resumable_tasks[run['task']].delay(int(campaign_id), resumed=True, run_id=run.get('run_id'))
 
 
 @shared_task
-def start_campaign(campaign_id, registration_ip):
-    registration_proxy = None
+def requeue_campaign(campaign_id, resumed=True, run_id=None):
+    """Puts a campaign that gave its proxy back while it waited for its window in the queue for a proxy again, its task
+    starts over once it has one. Ends the campaign if it was stopped while it waited or its run is over."""
+    run = begin_run(campaign_id, 'requeue_campaign', resumed, run_id=run_id)
+    if not run:
+        return
+
+    state = CampaignState(run['redis_campaign_id'], run['redis_posh_user_id'], get_redis_object_attr, update_redis_object)
+
+    if datetime.datetime.now(pytz.utc) < run['end_time'] and state.is_running():
+        end_run(campaign_id)
+        Campaign.objects.filter(id=campaign_id).update(status='4')
+        start_campaign.delay(campaign_id, True)
+    else:
+        finish_campaign(campaign_id, state, run)
 
-    if registration_ip:
-        while not registration_proxy:
-            registration_proxies = PoshProxy.objects.filter(enabled=True)
-            for proxy in registration_proxies:
-                proxy_connections = ProxyConnection.objects.filter(posh_proxy=proxy)
-                if proxy.registered_accounts >= proxy.max_accounts and len(proxy_connections) == 0:
-                    proxy.reset_ip()
-                    proxy.refresh_from_db()
-                    if proxy.redis_id:
-                        remove_redis_object(proxy.redis_id)
-                else:
-                    if len(proxy_connections) < proxy.max_connections and proxy.registered_accounts < proxy.max_accounts:
-                        registration_proxy = proxy
-                        break
-                    else:
-                        for proxy_connection in proxy_connections:
-                            now = timezone.now()
-                            elapsed_time = (now - proxy_connection.datetime).seconds
-                            if elapsed_time > 900:
-                                try:
-                                    broken_campaign = Campaign.objects.get(posh_user=proxy_connection.posh_user)
-                                    if broken_campaign.redis_id:
-                                        update_redis_object(broken_campaign.redis_id, {'status': '5'})
-                                        update_redis_object(proxy_connection.posh_user.redis_id, {'status': '1'})
-                                except Campaign.DoesNotExist:
-                                    pass
-                                proxy_connection.delete()
-            if not registration_proxy:
-                time.sleep(30)
+    db.connections.close_all()
 
-    campaign = Campaign.objects.get(id=campaign_id)
-    if campaign.status == '4':
-        if campaign.mode == Campaign.ADVANCED_SHARING:
-            registration_proxy.add_connection(campaign.posh_user)
-            campaign.status = '1'
-            campaign.save()
-            advanced_sharing.delay(campaign_id, registration_proxy.id)
-        elif campaign.mode == Campaign.BASIC_SHARING:
-            campaign.status = '1'
-            campaign.save()
-            basic_sharing.delay(campaign_id)
-        elif campaign.mode == Campaign.REGISTER:
-            registration_proxy.add_connection(campaign.posh_user)
-            campaign.status = '1'
-            campaign.save()
-            register_posh_user.delay(campaign.id, registration_proxy.id)
-        elif campaign.mode == Campaign.LIST_ITEM:
-            registration_proxy.add_connection(campaign.posh_user)
-            campaign.status = '1'
-            campaign.save()
-            list_item.delay(campaign.id, registration_proxy.id)
-        elif campaign.mode == Campaign.AGING:
-            campaign.status = '1'
-            campaign.save()
-            aging.delay(campaign.id)
+
+@shared_task
+def start_campaign(campaign_id, registration_ip):
+    if registration_ip:
+        ProxyLeases().enqueue(campaign_id)
+        allocate_proxies()
     else:
-        logging.error('This campaign does not have status starting, cannot start.')
+        dispatch_campaign(campaign_id)
 
     db.connections.close_all()
 
 
 @shared_task
-def basic_sharing(campaign_id):
-    redis_campaign_id, redis_posh_user_id, logger_id, *other = initialize_campaign(campaign_id)
-    logged_hour_message = False
-    max_deviation = round(int(get_redis_object_attr(redis_campaign_id, 'delay')) / 2)
+def basic_sharing(campaign_id, resumed=False, run_id=None):
+    run = begin_run(campaign_id, 'basic_sharing', resumed, run_id=run_id)
+    if not run:
+        return
+
+    redis_campaign_id, redis_posh_user_id, logger_id = run['redis_campaign_id'], run['redis_posh_user_id'], run['logger_id']
+    state = CampaignState(redis_campaign_id, redis_posh_user_id, get_redis_object_attr, update_redis_object)
+    state.listen()
+    logger = Logger(logger_id, log_to_redis)
+    max_deviation = round(state.delay / 2)
     now = datetime.datetime.now(pytz.utc)
-    end_time = now + datetime.timedelta(days=1)
-    sent_offer = False
+    end_time = run['end_time']
 
-    if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
-        update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
+    if not resumed:
+        if state.posh_user_status != PoshUser.INACTIVE:
+            state.update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
 
-    log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
+        log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
 
-    with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object) as client:
-        posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-        campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-        while now < end_time and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
-            now = datetime.datetime.now(pytz.utc)
-            posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-            campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-            campaign_delay = int(get_redis_object_attr(redis_campaign_id, 'delay'))
-            campaign_times = get_redis_object_attr(redis_campaign_id, 'times').split(',')
-            # This inner loop is to run the task for the given hour
-            while now.strftime('%I %p') in campaign_times and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
-                now = datetime.datetime.now(pytz.utc)
+    # The browser is only opened while the campaign is in one of its hours, it waits for the next one on a timer
+    if now < end_time and state.is_running() and state.in_window(now):
+        with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, state.get_redis_object_attr, state.update_redis_object, wait_function=state.wait, profile=settings.CHROME_PROFILE_BY_MODE.get(Campaign.BASIC_SHARING)) as client:
+            posh_user_status = state.posh_user_status
+            campaign_status = state.campaign_status
+            while now < end_time and state.in_window(now) and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
+                campaign_delay = state.delay
 
                 listing_titles = client.get_all_listings()
                 if listing_titles:
@@ -402,8 +785,8 @@ def basic_sharing(campaign_id):
                             client.share_item(listing_title)
                             client.check_offers(listing_title=listing_title)
                             client.check_comments(listing_title=listing_title)
-                            if not sent_offer and now > end_time.replace(hour=11, minute=0, second=0):
-                                sent_offer = client.send_offer_to_likers(listing_title=listing_title)
+                            if not run['sent_offer'] and now > end_time.replace(hour=11, minute=0, second=0):
+                                run['sent_offer'] = client.send_offer_to_likers(listing_title=listing_title)
 
                             positive_negative = 1 if random.random() < 0.5 else -1
                             deviation = random.randint(0, max_deviation) * positive_negative
@@ -411,281 +794,296 @@ def basic_sharing(campaign_id):
                             elapsed_time = round(post_share_time - pre_share_time, 2)
                             sleep_amount = (campaign_delay - elapsed_time) + deviation
 
-                            if elapsed_time < sleep_amount:
-                                client.sleep(sleep_amount)
+                            state.report_command_usage(logger)
+
+                            if elapsed_time < sleep_amount and client.sleep(sleep_amount, interruptible=True):
+                                break
                     elif not listing_titles['shareable_listings'] and listing_titles['sold_listings'] and not listing_titles['reserved_listings']:
                         log_to_redis(str(logger_id), {'level': 'WARNING', 'message': f"There are only sold listings in this account, stopping the campaign."})
-                        update_redis_object(redis_campaign_id, {'status': '3'})
+                        state.update_redis_object(redis_campaign_id, {'status': '3'})
 
-                if logged_hour_message:
-                    logged_hour_message = False
-
-            if not logged_hour_message and campaign_status == '1' and posh_user_status == PoshUser.RUNNING:
-                log_message = f"This campaign is not set to run at {now.astimezone(pytz.timezone('US/Eastern')).strftime('%I %p')}, sleeping..."
-                log_to_redis(str(logger_id), {'level': 'WARNING', 'message': log_message})
-                logged_hour_message = True
-
-    log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Ended'})
-
-    posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-    campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
+                posh_user_status = state.posh_user_status
+                campaign_status = state.campaign_status
+                now = datetime.datetime.now(pytz.utc)
 
-    update_redis_object(redis_campaign_id, {'status': '2'})
+    state.report_command_usage(logger, force=True)
 
-    if posh_user_status != PoshUser.INACTIVE:
-        update_redis_object(redis_posh_user_id, {'status': PoshUser.IDLE})
+    if datetime.datetime.now(pytz.utc) < end_time and state.is_running():
+        pause_campaign(campaign_id, state, run)
+        state.close()
+        return
 
-    if campaign_status == '1' or campaign_status == '5':
-        restart_task.delay(campaign_id)
+    finish_campaign(campaign_id, state, run)
 
 
 @shared_task
-def advanced_sharing(campaign_id, registration_proxy_id):
-    redis_campaign_id, redis_posh_user_id, logger_id, redis_listing_id, redis_registration_proxy_id = initialize_campaign(campaign_id, registration_proxy_id)
+def advanced_sharing(campaign_id, registration_proxy_id=None, resumed=False, run_id=None):
+    run = begin_run(campaign_id, 'advanced_sharing', resumed, registration_proxy_id, run_id)
+    if not run:
+        return
+
+    redis_campaign_id, redis_posh_user_id, logger_id = run['redis_campaign_id'], run['redis_posh_user_id'], run['logger_id']
+    redis_listing_id, redis_registration_proxy_id = run['redis_listing_id'], run['redis_registration_proxy_id']
+    state = CampaignState(redis_campaign_id, redis_posh_user_id, get_redis_object_attr, update_redis_object)
+    state.listen()
+    logger = Logger(logger_id, log_to_redis)
     item_updated = None
-    logged_hour_message = False
-    sent_offer = False
-    
-    max_deviation = round(int(get_redis_object_attr(redis_campaign_id, 'delay')) / 2)
+
+    max_deviation = round(state.delay / 2)
     now = datetime.datetime.now(pytz.utc)
-    end_time = now + datetime.timedelta(days=1)
+    end_time = run['end_time']
 
-    if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
-        update_redis_object(redis_posh_user_id, {'status': PoshUser.REGISTERING})
+    # Registering and listing the item on the proxy only happens once, a resumed run goes straight to sharing
+    if not resumed:
+        if not state.in_window(now):
+            requeue_at_next_window(campaign_id, registration_proxy_id, state, run)
+            return
 
-    log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
+        if state.posh_user_status != PoshUser.INACTIVE:
+            state.update_redis_object(redis_posh_user_id, {'status': PoshUser.REGISTERING})
 
-    with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object, redis_registration_proxy_id) as proxy_client:
-        posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-        campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-        while now < end_time and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and not item_updated:
-            now = datetime.datetime.now(pytz.utc)
-            posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-            campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-            campaign_times = get_redis_object_attr(redis_campaign_id, 'times').split(',')
-            # This inner loop is to run the task for the given hour
-            while now.strftime('%I %p') in campaign_times and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and not item_updated:
+        log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
+
+        waiting_for_window = False
+        was_registered = state.is_registered
+        with lease_heartbeat(campaign_id, registration_proxy_id), PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, state.get_redis_object_attr, state.update_redis_object, redis_registration_proxy_id) as proxy_client:
+            posh_user_status = state.posh_user_status
+            campaign_status = state.campaign_status
+            while now < end_time and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and not item_updated:
                 now = datetime.datetime.now(pytz.utc)
-                posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-                campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-                posh_user_is_registered = int(get_redis_object_attr(redis_posh_user_id, 'is_registered'))
-
-                registration_attempts = 0
-                while not posh_user_is_registered and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and registration_attempts < 2:
-                    proxy_client.register()
-                    registration_attempts += 1
-                    posh_user_is_registered = int(get_redis_object_attr(redis_posh_user_id, 'is_registered'))
-                    posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-                    campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
+                posh_user_status = state.posh_user_status
+                campaign_status = state.campaign_status
+                if not state.in_window(now):
+                    waiting_for_window = True
+                    break
+                # This inner loop is to run the task for the given hour
+                while state.in_window(now) and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and not item_updated:
+                    now = datetime.datetime.now(pytz.utc)
+                    posh_user_status = state.posh_user_status
+                    campaign_status = state.campaign_status
+                    posh_user_is_registered = state.is_registered
+
+                    registration_attempts = 0
+                    while not posh_user_is_registered and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and registration_attempts < 2:
+                        proxy_client.register()
+                        registration_attempts += 1
+                        posh_user_is_registered = state.is_registered
+                        posh_user_status = state.posh_user_status
+                        campaign_status = state.campaign_status
+
+                    if registration_attempts >= 2:
+                        state.update_redis_object(redis_campaign_id, {'status': '5'})
+                        log_to_redis(str(logger_id), {'level': 'ERROR', 'message': f'Could not register after {registration_attempts} attempts. Restarting Campaign.'})
+
+                    posh_user_profile_updated = state.profile_updated
+                    while posh_user_is_registered and not posh_user_profile_updated and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
+                        proxy_client.update_profile()
+                        posh_user_is_registered = state.is_registered
+                        posh_user_status = state.posh_user_status
+                        campaign_status = state.campaign_status
+                        posh_user_profile_updated = state.profile_updated
+
+                    if posh_user_is_registered:
+                        listing_title = get_redis_object_attr(redis_listing_id, 'title')
+                        listing_found = proxy_client.check_listing(listing_title)
+                        update_attempts = 0
+                        photos_updated = False
+                        categories_size_updated = False
+                        prices_updated = False
+                        other_updated = False
+                        brand_updated = False
+                        item_updated = False
+                        item_listed_title = None
+                        while not listing_found and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and not item_updated and update_attempts < 4:
+                            posh_user_status = state.posh_user_status
+                            campaign_status = state.campaign_status
+                            if not item_listed_title:
+                                item_listed_title = proxy_client.list_item()
+
+                            if item_listed_title:
+                                # redis_listing_photos_id = get_redis_object_attr(redis_listing_id, 'photos')
+                                # listing_photos = get_redis_object_attr(redis_listing_photos_id)
+                                # listing_brand = get_redis_object_attr(redis_listing_id, 'brand')
+                                # listing_description = get_redis_object_attr(redis_listing_id, 'description')
+                                # listing_category = get_redis_object_attr(redis_listing_id, 'category')
+                                # listing_subcategory = get_redis_object_attr(redis_listing_id, 'subcategory')
+                                # listing_size = get_redis_object_attr(redis_listing_id, 'size')
+                                # listing_title = get_redis_object_attr(redis_listing_id, 'title')
+                                # listing_cover_photo = get_redis_object_attr(redis_listing_id, 'cover_photo')
+                                # listing_original_price = get_redis_object_attr(redis_listing_id, 'original_price')
+                                # listing_listing_price = get_redis_object_attr(redis_listing_id, 'listing_price')
+                                # item_updated = proxy_client.update_listing(item_listed_title,
+                                #                                            description=listing_description,
+                                #                                            title=listing_title,
+                                #                                            cover_photo=listing_cover_photo,
+                                #                                            photos=listing_photos,
+                                #                                            brand=listing_brand,
+                                #                                            category=listing_category,
+                                #                                            subcategory=listing_subcategory,
+                                #                                            size=listing_size,
+                                #                                            original_price = listing_original_price,
+                                #                                            listing_price=listing_listing_price
+                                #                                            )
+                                # update_attempts += 1
+                                if not photos_updated:
+                                    redis_listing_photos_id = get_redis_object_attr(redis_listing_id, 'photos')
+                                    listing_photos = get_redis_object_attr(redis_listing_photos_id)
+                                    photos_updated = proxy_client.update_listing(item_listed_title, photos=listing_photos)
+
+                                if photos_updated and not brand_updated:
+                                    listing_brand = get_redis_object_attr(redis_listing_id, 'brand')
+                                    brand_updated = proxy_client.update_listing(item_listed_title, brand=listing_brand)
+
+                                if photos_updated and brand_updated and not categories_size_updated:
+                                    listing_category = get_redis_object_attr(redis_listing_id, 'category')
+                                    listing_subcategory = get_redis_object_attr(redis_listing_id, 'subcategory')
+                                    listing_size = get_redis_object_attr(redis_listing_id, 'size')
+                                    categories_size_updated = proxy_client.update_listing(item_listed_title,
+                                                                                          category=listing_category,
+                                                                                          subcategory=listing_subcategory,
+                                                                                          size=listing_size)
+
+                                if photos_updated and brand_updated and categories_size_updated and not prices_updated:
+                                    listing_original_price = get_redis_object_attr(redis_listing_id, 'original_price')
+                                    listing_listing_price = get_redis_object_attr(redis_listing_id, 'listing_price')
+                                    listing_brand = get_redis_object_attr(redis_listing_id, 'brand')
+                                    prices_updated = proxy_client.update_listing(item_listed_title,
+                                                                                 original_price=listing_original_price,
+                                                                                 listing_price=listing_listing_price)
+
+                                if photos_updated and brand_updated and categories_size_updated and prices_updated and not other_updated:
+                                    listing_description = get_redis_object_attr(redis_listing_id, 'description')
+                                    listing_title = get_redis_object_attr(redis_listing_id, 'title')
+                                    listing_cover_photo = get_redis_object_attr(redis_listing_id, 'cover_photo')
+                                    other_updated = proxy_client.update_listing(item_listed_title,
+                                                                                description=listing_description,
+                                                                                title=listing_title,
+                                                                                cover_photo=listing_cover_photo)
+
+                                item_updated = categories_size_updated and prices_updated and other_updated and photos_updated and brand_updated
+                                update_attempts += 1
+
+                                log_to_redis(str(logger_id), {'level': 'DEBUG',
+                                                              'message': f'Category Updated: {categories_size_updated} Prices Updated: {prices_updated} Other Updated: {other_updated} Photos Updated: {photos_updated} Brand Updated: {brand_updated} Item Updated: {item_updated}'})
+
+                        if update_attempts >= 4:
+                            state.update_redis_object(redis_campaign_id, {'status': '5'})
+                            log_to_redis(str(logger_id), {'level': 'ERROR',
+                                                          'message': f'Could not update item after {update_attempts} attempts. Restarting Campaign.'})
+                        elif not item_listed_title and listing_found:
+                            item_updated = True
+                            log_to_redis(str(logger_id), {'level': 'WARNING', 'message': f'{listing_title} already listed, not re listing'})
+                        elif not item_updated:
+                            state.update_redis_object(redis_campaign_id, {'status': '5'})
+                            log_to_redis(str(logger_id), {'level': 'ERROR', 'message': f'This item was not updated properly, restarting.'})
+
+        if waiting_for_window:
+            requeue_at_next_window(campaign_id, registration_proxy_id, state, run)
+            return
+
+        if state.posh_user_status != PoshUser.INACTIVE:
+            state.update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
+
+        if not was_registered:
+            count_registration(redis_registration_proxy_id)
+
+        remove_proxy_connection(campaign_id, registration_proxy_id)
 
-                if registration_attempts >= 2:
-                    update_redis_object(redis_campaign_id, {'status': '5'})
-                    log_to_redis(str(logger_id), {'level': 'ERROR', 'message': f'Could not register after {registration_attempts} attempts. Restarting Campaign.'})
+    now = datetime.datetime.now(pytz.utc)
+    if state.is_registered and now < end_time and state.is_running() and state.in_window(now):
+        with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, state.get_redis_object_attr, state.update_redis_object, wait_function=state.wait, profile=settings.CHROME_PROFILE_BY_MODE.get(Campaign.ADVANCED_SHARING)) as no_proxy_client:
+            posh_user_status = state.posh_user_status
+            campaign_status = state.campaign_status
+            while now < end_time and state.in_window(now) and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
+                campaign_delay = state.delay
+
+                listing_titles = no_proxy_client.get_all_listings()
+                if listing_titles:
+                    if listing_titles['shareable_listings']:
+                        for listing_title in listing_titles['shareable_listings']:
+                            if '[FKE]' in listing_title:
+                                state.update_redis_object(redis_campaign_id, {'status': '5'})
+                                break
+                            else:
+                                pre_share_time = time.time()
+                                no_proxy_client.share_item(listing_title)
 
-                posh_user_profile_updated = int(get_redis_object_attr(redis_posh_user_id, 'profile_updated'))
-                while posh_user_is_registered and not posh_user_profile_updated and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
-                    proxy_client.update_profile()
-                    posh_user_is_registered = int(get_redis_object_attr(redis_posh_user_id, 'is_registered'))
-                    posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-                    campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-                    posh_user_profile_updated = int(get_redis_object_attr(redis_posh_user_id, 'profile_updated'))
-
-                if posh_user_is_registered:
-                    listing_title = get_redis_object_attr(redis_listing_id, 'title')
-                    listing_found = proxy_client.check_listing(listing_title)
-                    update_attempts = 0
-                    photos_updated = False
-                    categories_size_updated = False
-                    prices_updated = False
-                    other_updated = False
-                    brand_updated = False
-                    item_updated = False
-                    item_listed_title = None
-                    while not listing_found and posh_user_status != PoshUser.INACTIVE and campaign_status == '1' and not item_updated and update_attempts < 4:
-                        posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-                        campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-                        if not item_listed_title:
-                            item_listed_title = proxy_client.list_item()
-
-                        if item_listed_title:
-                            # redis_listing_photos_id = get_redis_object_attr(redis_listing_id, 'photos')
-                            # listing_photos = get_redis_object_attr(redis_listing_photos_id)
-                            # listing_brand = get_redis_object_attr(redis_listing_id, 'brand')
-                            # listing_description = get_redis_object_attr(redis_listing_id, 'description')
-                            # listing_category = get_redis_object_attr(redis_listing_id, 'category')
-                            # listing_subcategory = get_redis_object_attr(redis_listing_id, 'subcategory')
-                            # listing_size = get_redis_object_attr(redis_listing_id, 'size')
-                            # listing_title = get_redis_object_attr(redis_listing_id, 'title')
-                            # listing_cover_photo = get_redis_object_attr(redis_listing_id, 'cover_photo')
-                            # listing_original_price = get_redis_object_attr(redis_listing_id, 'original_price')
-                            # listing_listing_price = get_redis_object_attr(redis_listing_id, 'listing_price')
-                            # item_updated = proxy_client.update_listing(item_listed_title,
-                            #                                            description=listing_description,
-                            #                                            title=listing_title,
-                            #                                            cover_photo=listing_cover_photo,
-                            #                                            photos=listing_photos,
-                            #                                            brand=listing_brand,
-                            #                                            category=listing_category,
-                            #                                            subcategory=listing_subcategory,
-                            #                                            size=listing_size,
-                            #                                            original_price = listing_original_price,
-                            #                                            listing_price=listing_listing_price
-                            #                                            )
-                            # update_attempts += 1
-                            if not photos_updated:
-                                redis_listing_photos_id = get_redis_object_attr(redis_listing_id, 'photos')
-                                listing_photos = get_redis_object_attr(redis_listing_photos_id)
-                                photos_updated = proxy_client.update_listing(item_listed_title, photos=listing_photos)
-
-                            if photos_updated and not brand_updated:
-                                listing_brand = get_redis_object_attr(redis_listing_id, 'brand')
-                                brand_updated = proxy_client.update_listing(item_listed_title, brand=listing_brand)
-
-                            if photos_updated and brand_updated and not categories_size_updated:
-                                listing_category = get_redis_object_attr(redis_listing_id, 'category')
-                                listing_subcategory = get_redis_object_attr(redis_listing_id, 'subcategory')
-                                listing_size = get_redis_object_attr(redis_listing_id, 'size')
-                                categories_size_updated = proxy_client.update_listing(item_listed_title,
-                                                                                      category=listing_category,
-                                                                                      subcategory=listing_subcategory,
-                                                                                      size=listing_size)
-
-                            if photos_updated and brand_updated and categories_size_updated and not prices_updated:
-                                listing_original_price = get_redis_object_attr(redis_listing_id, 'original_price')
-                                listing_listing_price = get_redis_object_attr(redis_listing_id, 'listing_price')
-                                listing_brand = get_redis_object_attr(redis_listing_id, 'brand')
-                                prices_updated = proxy_client.update_listing(item_listed_title,
-                                                                             original_price=listing_original_price,
-                                                                             listing_price=listing_listing_price)
-
-                            if photos_updated and brand_updated and categories_size_updated and prices_updated and not other_updated:
-                                listing_description = get_redis_object_attr(redis_listing_id, 'description')
-                                listing_title = get_redis_object_attr(redis_listing_id, 'title')
-                                listing_cover_photo = get_redis_object_attr(redis_listing_id, 'cover_photo')
-                                other_updated = proxy_client.update_listing(item_listed_title,
-                                                                            description=listing_description,
-                                                                            title=listing_title,
-                                                                            cover_photo=listing_cover_photo)
-
-                            item_updated = categories_size_updated and prices_updated and other_updated and photos_updated and brand_updated
-                            update_attempts += 1
-
-                            log_to_redis(str(logger_id), {'level': 'DEBUG',
-                                                          'message': f'Category Updated: {categories_size_updated} Prices Updated: {prices_updated} Other Updated: {other_updated} Photos Updated: {photos_updated} Brand Updated: {brand_updated} Item Updated: {item_updated}'})
-
-                    if update_attempts >= 4:
-                        update_redis_object(redis_campaign_id, {'status': '5'})
-                        log_to_redis(str(logger_id), {'level': 'ERROR',
-                                                      'message': f'Could not update item after {update_attempts} attempts. Restarting Campaign.'})
-                    elif not item_listed_title and listing_found:
-                        item_updated = True
-                        log_to_redis(str(logger_id), {'level': 'WARNING', 'message': f'{listing_title} already listed, not re listing'})
-                    elif not item_updated:
-                        update_redis_object(redis_campaign_id, {'status': '5'})
-                        log_to_redis(str(logger_id), {'level': 'ERROR', 'message': f'This item was not updated properly, restarting.'})
+                                no_proxy_client.check_offers(redis_listing_id=redis_listing_id)
+                                no_proxy_client.check_comments(listing_title=listing_title)
+                                if not run['sent_offer'] and now > end_time.replace(hour=11, minute=0, second=0):
+                                    run['sent_offer'] = no_proxy_client.send_offer_to_likers(
+                                        redis_listing_id=redis_listing_id)
 
-    if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
-        update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
+                                positive_negative = 1 if random.random() < 0.5 else -1
+                                deviation = random.randint(0, max_deviation) * positive_negative
+                                post_share_time = time.time()
+                                elapsed_time = round(post_share_time - pre_share_time, 2)
+                                sleep_amount = (campaign_delay - elapsed_time) + deviation
 
-    registered_accounts = get_redis_object_attr(redis_registration_proxy_id, 'registered_accounts')
-    total_registered = int(registered_accounts) + 1 if registered_accounts else 1
-    update_redis_object(redis_registration_proxy_id, {'registered_accounts': str(total_registered)})
+                                log_to_redis(str(logger_id), {'level': 'DEBUG',
+                                                              'message': f"Delay: {campaign_delay} Elapsed Time: {elapsed_time} Sleep Amount: {sleep_amount} Deviation: {deviation}"})
 
-    remove_proxy_connection(campaign_id, registration_proxy_id)
+                                state.report_command_usage(logger)
 
-    if int(get_redis_object_attr(redis_posh_user_id, 'is_registered')):
-        with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object) as no_proxy_client:
-            posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-            campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-            while now < end_time and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
+                                if elapsed_time < sleep_amount and no_proxy_client.sleep(sleep_amount, interruptible=True):
+                                    break
+                    elif not listing_titles['shareable_listings'] and listing_titles['sold_listings'] and not listing_titles['reserved_listings']:
+                        log_to_redis(str(logger_id), {'level': 'WARNING', 'message': f"There are only sold listings in this account, stopping the campaign."})
+                        state.update_redis_object(redis_campaign_id, {'status': '3'})
+
+                posh_user_status = state.posh_user_status
+                campaign_status = state.campaign_status
                 now = datetime.datetime.now(pytz.utc)
-                posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-                campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-                campaign_delay = int(get_redis_object_attr(redis_campaign_id, 'delay'))
-                campaign_times = get_redis_object_attr(redis_campaign_id, 'times').split(',')
-                # This inner loop is to run the task for the given hour
-                while now.strftime('%I %p') in campaign_times and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
-                    now = datetime.datetime.now(pytz.utc)
-                    posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-                    campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
 
-                    listing_titles = no_proxy_client.get_all_listings()
-                    if listing_titles:
-                        if listing_titles['shareable_listings']:
-                            for listing_title in listing_titles['shareable_listings']:
-                                if '[FKE]' in listing_title:
-                                    update_redis_object(redis_campaign_id, {'status': '5'})
-                                    break
-                                else:
-                                    pre_share_time = time.time()
-                                    no_proxy_client.share_item(listing_title)
-
-                                    no_proxy_client.check_offers(redis_listing_id=redis_listing_id)
-                                    no_proxy_client.check_comments(listing_title=listing_title)
-                                    if not sent_offer and now > end_time.replace(hour=11, minute=0, second=0):
-                                        sent_offer = no_proxy_client.send_offer_to_likers(
-                                            redis_listing_id=redis_listing_id)
-
-                                    positive_negative = 1 if random.random() < 0.5 else -1
-                                    deviation = random.randint(0, max_deviation) * positive_negative
-                                    post_share_time = time.time()
-                                    elapsed_time = round(post_share_time - pre_share_time, 2)
-                                    sleep_amount = (campaign_delay - elapsed_time) + deviation
-
-                                    log_to_redis(str(logger_id), {'level': 'DEBUG',
-                                                                  'message': f"Delay: {campaign_delay} Elapsed Time: {elapsed_time} Sleep Amount: {sleep_amount} Deviation: {deviation}"})
-
-                                    if elapsed_time < sleep_amount:
-                                        no_proxy_client.sleep(sleep_amount)
-                        elif not listing_titles['shareable_listings'] and listing_titles['sold_listings'] and not listing_titles['reserved_listings']:
-                            log_to_redis(str(logger_id), {'level': 'WARNING', 'message': f"There are only sold listings in this account, stopping the campaign."})
-                            update_redis_object(redis_campaign_id, {'status': '3'})
-
-                if logged_hour_message:
-                        logged_hour_message = False
-
-                if not logged_hour_message and campaign_status == '1' and posh_user_status == PoshUser.RUNNING:
-                    log_to_redis(str(logger_id), {'level': 'WARNING', 'message': f"This campaign is not set to run at {now.astimezone(pytz.timezone('US/Eastern')).strftime('%I %p')}, sleeping..."})
-                    logged_hour_message = True
+    if state.is_registered and datetime.datetime.now(pytz.utc) < end_time and state.is_running():
+        state.report_command_usage(logger, force=True)
+        pause_campaign(campaign_id, state, run)
+        state.close()
+        return
 
-    if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
-        update_redis_object(redis_posh_user_id, {'status': PoshUser.IDLE})
+    state.refresh()
+    if state.posh_user_status != PoshUser.INACTIVE:
+        state.update_redis_object(redis_posh_user_id, {'status': PoshUser.IDLE})
 
+    state.report_command_usage(logger, force=True)
+    state.close()
+    end_run(campaign_id)
     log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Ended'})
 
-    campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
+    campaign_status = state.campaign_status
     if campaign_status == '5':  # or campaign_status == '1'
-        restart_task.delay(get_redis_object_attr(redis_campaign_id, 'id'))
+        restart_task.delay(state.get(redis_campaign_id, 'id'))
     else:
-        update_redis_object(redis_campaign_id, {'status': '2'})
+        state.update_redis_object(redis_campaign_id, {'status': '2'})
 
 
 @shared_task
-def aging(campaign_id):
-    redis_campaign_id, redis_posh_user_id, logger_id, *other = initialize_campaign(campaign_id)
-    logged_hour_message = False
-    max_deviation = round(int(get_redis_object_attr(redis_campaign_id, 'delay')) / 2)
+def aging(campaign_id, resumed=False, run_id=None):
+    run = begin_run(campaign_id, 'aging', resumed, run_id=run_id)
+    if not run:
+        return
+
+    redis_campaign_id, redis_posh_user_id, logger_id = run['redis_campaign_id'], run['redis_posh_user_id'], run['logger_id']
+    state = CampaignState(redis_campaign_id, redis_posh_user_id, get_redis_object_attr, update_redis_object)
+    state.listen()
+    logger = Logger(logger_id, log_to_redis)
+    max_deviation = round(state.delay / 2)
     now = datetime.datetime.now(pytz.utc)
-    end_time = now + datetime.timedelta(days=1)
+    end_time = run['end_time']
 
-    if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
-        update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
+    if not resumed:
+        if state.posh_user_status != PoshUser.INACTIVE:
+            state.update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
 
-    log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
+        log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
 
-    with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object) as client:
-        client.check_logged_in()
-        posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-        campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-        while now < end_time and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
-            now = datetime.datetime.now(pytz.utc)
-            posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-            campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
-            campaign_delay = int(get_redis_object_attr(redis_campaign_id, 'delay'))
-            campaign_times = get_redis_object_attr(redis_campaign_id, 'times').split(',')
-            # This inner loop is to run the task for the given hour
-            while now.strftime('%I %p') in campaign_times and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
-                now = datetime.datetime.now(pytz.utc)
+    if now < end_time and state.is_running() and state.in_window(now):
+        with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, state.get_redis_object_attr, state.update_redis_object, wait_function=state.wait, profile=settings.CHROME_PROFILE_BY_MODE.get(Campaign.AGING)) as client:
+            client.check_logged_in()
+            posh_user_status = state.posh_user_status
+            campaign_status = state.campaign_status
+            while now < end_time and state.in_window(now) and posh_user_status != PoshUser.INACTIVE and campaign_status == '1':
+                campaign_delay = state.delay
                 pre_action_time = time.time()
 
                 if random.random() < .80:
@@ -706,29 +1104,135 @@ def aging(campaign_id):
                 elapsed_time = round(post_action_time - pre_action_time, 2)
                 sleep_amount = (campaign_delay - elapsed_time) + deviation
 
+                state.report_command_usage(logger)
+
                 if elapsed_time < sleep_amount:
-                    client.sleep(sleep_amount)
+                    client.sleep(sleep_amount, interruptible=True)
 
-                if logged_hour_message:
-                    logged_hour_message = False
+                posh_user_status = state.posh_user_status
+                campaign_status = state.campaign_status
+                now = datetime.datetime.now(pytz.utc)
 
-            if not logged_hour_message and campaign_status == '1' and posh_user_status == PoshUser.RUNNING:
-                log_message = f"This campaign is not set to run at {now.astimezone(pytz.timezone('US/Eastern')).strftime('%I %p')}, sleeping..."
-                log_to_redis(str(logger_id), {'level': 'WARNING', 'message': log_message})
-                logged_hour_message = True
+    state.report_command_usage(logger, force=True)
 
-    log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Ended'})
+    if datetime.datetime.now(pytz.utc) < end_time and state.is_running():
+        pause_campaign(campaign_id, state, run)
+        state.close()
+        return
 
-    posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
-    campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
+    finish_campaign(campaign_id, state, run)
 
-    update_redis_object(redis_campaign_id, {'status': '2'})
 
-    if posh_user_status != PoshUser.INACTIVE:
-        update_redis_object(redis_posh_user_id, {'status': PoshUser.IDLE})
+def share_next_listing(client, state, run, now):
+    """One step of a basic sharing campaign: shares the next listing of the current pass, starting a new pass when the
+    last one is done"""
+    if not run.get('pending_listings'):
+        listing_titles = client.get_all_listings()
+        if listing_titles:
+            if listing_titles['shareable_listings']:
+                run['pending_listings'] = list(listing_titles['shareable_listings'])
+            elif listing_titles['sold_listings'] and not listing_titles['reserved_listings']:
+                log_to_redis(str(run['logger_id']), {'level': 'WARNING', 'message': f"There are only sold listings in this account, stopping the campaign."})
+                state.update_redis_object(state.redis_campaign_id, {'status': '3'})
+
+    if run.get('pending_listings'):
+        listing_title = run['pending_listings'].pop(0)
+        client.share_item(listing_title)
+        client.check_offers(listing_title=listing_title)
+        client.check_comments(listing_title=listing_title)
+        if not run['sent_offer'] and now > run['end_time'].replace(hour=11, minute=0, second=0):
+            run['sent_offer'] = client.send_offer_to_likers(listing_title=listing_title)
 
-    if campaign_status == '1' or campaign_status == '5':
-        restart_task.delay(campaign_id)
+
+def age_account(client, state, run, now):
+    """One step of an aging campaign"""
+    client.check_logged_in()
+
+    if random.random() < .80:
+        client.follow_random_follower()
+
+    if random.random() < .30:
+        client.follow_random_user()
+
+    if random.random() < .10:
+        client.check_news()
+
+    if random.random() < .60:
+        client.go_through_feed()
+
+
+def run_campaign_step(campaign_id, mode, task, resumed, run_id, action):
+    """Runs a single action of the campaign in its own short task and schedules the task again once the campaign's
+    delay has passed, so no worker is held while the campaign waits. Everything the next step needs is kept in the
+    campaign's run in redis, the next step carries the run's id so it is dropped if the campaign is restarted before
+    it is due. The client is parked in the process between steps, see ParkedClients."""
+    run = begin_run(campaign_id, task.name.split('.')[-1], resumed, run_id=run_id)
+    if not run:
+        return
+
+    redis_campaign_id, redis_posh_user_id, logger_id = run['redis_campaign_id'], run['redis_posh_user_id'], run['logger_id']
+    state = CampaignState(redis_campaign_id, redis_posh_user_id, get_redis_object_attr, update_redis_object)
+    now = datetime.datetime.now(pytz.utc)
+    parked_clients = get_parked_clients()
+    client_key = (campaign_id, run.get('run_id'))
+    client = parked_clients.take(client_key) if parked_clients else None
+
+    if not resumed:
+        if state.posh_user_status != PoshUser.INACTIVE:
+            state.update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
+
+        log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
+
+    if now < run['end_time'] and state.is_running() and state.in_window(now):
+        campaign_delay = state.delay
+        max_deviation = round(campaign_delay / 2)
+        pre_action_time = time.time()
+
+        if client:
+            client.get_redis_object_attr = state.get_redis_object_attr
+            client.update_redis_object = state.update_redis_object
+        else:
+            client = PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, state.get_redis_object_attr, state.update_redis_object, profile=settings.CHROME_PROFILE_BY_MODE.get(mode))
+            client.open()
+
+        try:
+            action(client, state, run, now)
+        except Exception:
+            client.close()
+            raise
+
+        if parked_clients:
+            parked_clients.park(client_key, client)
+        else:
+            client.close()
+
+        positive_negative = 1 if random.random() < 0.5 else -1
+        deviation = random.randint(0, max_deviation) * positive_negative
+        elapsed_time = round(time.time() - pre_action_time, 2)
+        sleep_amount = (campaign_delay - elapsed_time) + deviation
+
+        scheduler.save_run(campaign_id, run)
+        task.apply_async((campaign_id, True, run.get('run_id')), countdown=max(sleep_amount, 0))
+        return
+
+    if client:
+        client.close()
+
+    if now < run['end_time'] and state.is_running():
+        pause_campaign(campaign_id, state, run)
+        return
+
+    finish_campaign(campaign_id, state, run)
+
+
+@shared_task
+def basic_sharing_step(campaign_id, resumed=False, run_id=None):
+    run_campaign_step(campaign_id, Campaign.BASIC_SHARING, basic_sharing_step, resumed, run_id, share_next_listing)
+
+
+@shared_task
+def aging_step(campaign_id, resumed=False, run_id=None):
+    run_campaign_step(campaign_id, Campaign.AGING, aging_step, resumed, run_id, age_account)
 
 
 @shared_task
@@ -741,7 +1245,8 @@ def list_item(campaign_id, registration_proxy_id):
 
     log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
 
-    with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object, redis_registration_proxy_id) as proxy_client:
+    was_registered = int(get_redis_object_attr(redis_posh_user_id, 'is_registered'))
+    with lease_heartbeat(campaign_id, registration_proxy_id), PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object, redis_registration_proxy_id) as proxy_client:
         posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
         campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
         posh_user_is_registered = int(get_redis_object_attr(redis_posh_user_id, 'is_registered'))
@@ -788,9 +1293,10 @@ def list_item(campaign_id, registration_proxy_id):
     if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
         update_redis_object(redis_posh_user_id, {'status': PoshUser.RUNNING})
 
-    registered_accounts = get_redis_object_attr(redis_registration_proxy_id, 'registered_accounts')
-    total_registered = int(registered_accounts) + 1 if registered_accounts else 1
-    update_redis_object(redis_registration_proxy_id, {'registered_accounts': str(total_registered)})
+    if not was_registered:
+        count_registration(redis_registration_proxy_id)
+
+    remove_proxy_connection(campaign_id, registration_proxy_id)
 
     if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
         update_redis_object(redis_posh_user_id, {'status': PoshUser.IDLE})
@@ -813,7 +1319,8 @@ def register_posh_user(campaign_id, registration_proxy_id):
 
     log_to_redis(str(logger_id), {'level': 'INFO', 'message': 'Campaign Started'})
 
-    with PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object, redis_registration_proxy_id) as proxy_client:
+    was_registered = int(get_redis_object_attr(redis_posh_user_id, 'is_registered'))
+    with lease_heartbeat(campaign_id, registration_proxy_id), PoshMarkClient(redis_posh_user_id, redis_campaign_id, logger_id, log_to_redis, get_redis_object_attr, update_redis_object, redis_registration_proxy_id) as proxy_client:
         posh_user_status = get_redis_object_attr(redis_posh_user_id, 'status')
         campaign_status = get_redis_object_attr(redis_campaign_id, 'status')
         posh_user_is_registered = int(get_redis_object_attr(redis_posh_user_id, 'is_registered'))
@@ -840,9 +1347,8 @@ def register_posh_user(campaign_id, registration_proxy_id):
 
     remove_proxy_connection(campaign_id, registration_proxy_id)
 
-    registered_accounts = get_redis_object_attr(redis_registration_proxy_id, 'registered_accounts')
-    total_registered = int(registered_accounts) + 1 if registered_accounts else 1
-    update_redis_object(redis_registration_proxy_id, {'registered_accounts': str(total_registered)})
+    if not was_registered:
+        count_registration(redis_registration_proxy_id)
 
     if get_redis_object_attr(redis_posh_user_id, 'status') != PoshUser.INACTIVE:
         update_redis_object(redis_posh_user_id, {'status': PoshUser.IDLE})
@@ -866,6 +1372,8 @@ def restart_task(campaign_id):
         if old_posh_user.status == PoshUser.INACTIVE:
             campaign.status = '2'
             campaign.save()
+        elif settings.CAMPAIGN_STEP_TASKS:
+            basic_sharing_step.delay(campaign_id)
         else:
             basic_sharing.delay(campaign_id, False)
     elif campaign.mode == Campaign.ADVANCED_SHARING:
@@ -888,9 +1396,13 @@ def restart_task(campaign_id):
         else:
             campaign.status = '2'
             campaign.save()
-    elif campaign.mode == Campaign.REGISTER or campaign.mode == Campaign.LIST_ITEM or campaign.mode == Campaign.AGING:
+    elif campaign.mode == Campaign.REGISTER or campaign.mode == Campaign.LIST_ITEM:
         campaign.status = '4'
         campaign.save()
         start_campaign.delay(campaign_id, True)
+    elif campaign.mode == Campaign.AGING:
+        campaign.status = '4'
+        campaign.save()
+        start_campaign.delay(campaign_id, False)
 
     db.connections.close_all()
@@ -3,9 +3,18 @@ import re
 
 from django import template
 from django.template.defaultfilters import stringfilter
-from poshmark.models import PoshUser, LogEntry, Listing, Log
+from poshmark.loaders import get_loader
+from poshmark.models import PoshUser, LogEntry, Listing
 
 register = template.Library()
+LOCAL_TZ = pytz.timezone('US/Eastern')
+
+
+def format_log_message(timestamp, level_name, message):
+    """Formats a log message the way the action log page displays it"""
+    timestamp_str = timestamp.astimezone(LOCAL_TZ).strftime('%Y-%m-%d %I:%M:%S %p')
+
+    return f'{timestamp_str} [{level_name}] {message}'
 
 
 @register.filter
@@ -61,20 +70,19 @@ def log_entry_return(log_entry):
         LogEntry.DEBUG: 'DEBUG',
         LogEntry.NOTSET: 'NOTSET',
     }
-    local_tz = pytz.timezone('US/Eastern')
-    timestamp = log_entry.timestamp
-    localized_timestamp = timestamp.astimezone(local_tz)
-    timestamp_str = localized_timestamp.strftime('%Y-%m-%d %I:%M:%S %p')
 
-    return f'{timestamp_str} [{log_levels[log_entry.level]}] {log_entry.message}'
+    return format_log_message(log_entry.timestamp, log_levels[log_entry.level], log_entry.message)
 
 
-@register.filter
-def action_log_return(campaign):
-    log = Log.objects.filter(campaign=campaign).order_by('created_date').last()
-    log_id = log.id if log else None
-
-    return log_id
+def log_entry_display(log_entry):
+    """Everything the action log page needs to show an entry, computed once so pages can be rendered or sent as JSON
+    without running the filters per entry in the template"""
+    return {
+        'id': log_entry.id,
+        'level': log_entry.level,
+        'message': log_entry_return(log_entry),
+        'css_class': level_color_return(log_entry.level),
+    }
 
 
 @register.filter
@@ -155,14 +163,15 @@ def logger_type_return(logger_type):
 @register.filter
 def get_username(posh_user_id):
     """Given a Posh User ID will return the username"""
-    return PoshUser.objects.get(id=posh_user_id).username
+    posh_user = get_loader(PoshUser).load(posh_user_id)
+
+    return posh_user.username if posh_user else ''
 
 
 @register.filter
 def listings_return(listing_ids):
     """Given a string of Listing ids it will return a list of Listing objects"""
-    listing_ids = listing_ids.split(',')
-    return [Listing.objects.get(id=listing_id) for listing_id in listing_ids]
+    return get_loader(Listing).load_many(listing_ids.split(','))
 
 
 @register.filter
@@ -1,3 +1,156 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import User
+from . import tasks
+from .models import Campaign, Listing, Log, LogEntry, PoshProxy, PoshUser
+from .proxy_leases import ProxyLeases
+
+
+class ActionLogQueryCountTests(TestCase):
+    """The action log page and its groups cost the same number of queries however many logs and entries there are"""
+    def setUp(self):
+        self.user = User.objects.create_user('logs', 'password')
+        self.client.force_login(self.user)
+        self.campaigns = 0
+        self.registrations = 0
+
+    def add_logs(self, campaigns, registrations, logs_per_group, entries_per_log):
+        now = timezone.now()
+
+        for _ in range(campaigns):
+            self.campaigns += 1
+            campaign = Campaign.objects.create(
+                user=self.user, title=f'Campaign {self.campaigns}', status='2', times='', delay=60
+            )
+            self.add_group(dict(campaign=campaign, description=campaign.title), logs_per_group, entries_per_log, now)
+
+        for _ in range(registrations):
+            self.registrations += 1
+            self.add_group(dict(description=f'Registration {self.registrations}'), logs_per_group, entries_per_log, now)
+
+    def add_group(self, fields, logs, entries_per_log, now):
+        for index in range(logs):
+            log = Log.objects.create(user=self.user, created_date=now - datetime.timedelta(minutes=index), **fields)
+            LogEntry.objects.bulk_create([
+                LogEntry(level=LogEntry.INFO, logger=log, timestamp=now, message=f'Entry {entry}')
+                for entry in range(entries_per_log)
+            ])
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+
+        return len(queries)
+
+    def test_page_queries_do_not_grow_with_logs(self):
+        url = reverse('view-action-logs')
+        self.add_logs(campaigns=2, registrations=2, logs_per_group=2, entries_per_log=2)
+        expected = self.count_queries(url)
+
+        self.add_logs(campaigns=10, registrations=10, logs_per_group=5, entries_per_log=20)
+        with self.assertNumQueries(expected):
+            self.client.get(url)
+
+    def test_group_queries_do_not_grow_with_logs(self):
+        url = reverse('action-log-group')
+        self.add_logs(campaigns=1, registrations=1, logs_per_group=2, entries_per_log=2)
+        expected = self.count_queries(url, type='Campaign', title='Campaign 1')
+
+        self.add_logs(campaigns=5, registrations=5, logs_per_group=30, entries_per_log=10)
+        with self.assertNumQueries(expected):
+            self.client.get(url, {'type': 'Campaign', 'title': 'Campaign 1'})
+        with self.assertNumQueries(expected):
+            self.client.get(url, {'type': 'Registration', 'title': 'Registration 3', 'page': 2})
+
+
+class CampaignListQueryCountTests(TestCase):
+    """The campaigns page costs the same number of queries however many campaigns there are"""
+    def setUp(self):
+        self.user = User.objects.create_user('campaigns', 'password')
+        self.client.force_login(self.user)
+        self.campaigns = 0
+
+    def add_campaigns(self, count):
+        """Adds campaigns with and without a posh user, logs and listings"""
+        for _ in range(count):
+            self.campaigns += 1
+            posh_user = None
+            if self.campaigns % 2:
+                posh_user = PoshUser.objects.create(
+                    user=self.user, username=f'posh{self.campaigns}', status=PoshUser.IDLE
+                )
+            campaign = Campaign.objects.create(
+                user=self.user, posh_user=posh_user, title=f'Campaign {self.campaigns}',
+                status='1' if self.campaigns % 3 else '2', times='', delay=60
+            )
+
+            if self.campaigns % 3:
+                for _ in range(2):
+                    Log.objects.create(campaign=campaign, user=self.user, created_date=timezone.now())
+            if self.campaigns % 4:
+                Listing.objects.create(
+                    user=self.user, campaign=campaign, title=f'Listing {self.campaigns}', size='M', brand='Brand',
+                    category='Men', subcategory='Pants', description='', original_price=30, listing_price=15
+                )
+
+    def test_queries_do_not_grow_with_campaigns(self):
+        url = reverse('view-campaigns')
+        self.add_campaigns(4)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['object_list']), 4)
+
+        self.add_campaigns(40)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['object_list']), 44)
+
+
+@override_settings(CAMPAIGN_STEP_TASKS=False)
+class AgingRestartLeaseTests(TestCase):
+    """Aging doesn't use a proxy, restarting an aging campaign must not leave a proxy lease behind"""
+    def setUp(self):
+        self.user = User.objects.create_user('aging', 'password')
+        self.posh_user = PoshUser.objects.create(
+            user=self.user, username='aging', status=PoshUser.RUNNING, is_registered=True
+        )
+        self.campaign = Campaign.objects.create(
+            user=self.user, posh_user=self.posh_user, title='Aging', mode=Campaign.AGING, status='1', times='', delay=60
+        )
+        self.proxy = PoshProxy.objects.create(enabled=True, ip='127.0.0.1', port=8080)
+        self.leases = ProxyLeases()
+
+    def tearDown(self):
+        self.leases.dequeue(self.campaign.id)
+        self.leases.release(self.proxy.id, self.campaign.id)
+
+    def assertNoLease(self):
+        self.assertEqual(self.leases.active_leases(self.proxy.id), 0)
+        self.assertFalse(self.leases.dequeue(self.campaign.id))
+
+    @mock.patch.object(tasks.aging, 'delay')
+    @mock.patch.object(tasks.start_campaign, 'delay', side_effect=tasks.start_campaign)
+    def test_restart_leaves_no_lease(self, start_campaign, aging):
+        tasks.restart_task(self.campaign.id)
+
+        start_campaign.assert_called_once_with(self.campaign.id, False)
+        aging.assert_called_once_with(self.campaign.id)
+        self.assertNoLease()
+
+    @mock.patch.object(tasks.aging, 'delay')
+    def test_granted_lease_is_released_on_dispatch(self, aging):
+        Campaign.objects.filter(id=self.campaign.id).update(status='4')
+        tasks.start_campaign(self.campaign.id, True)
+
+        aging.assert_called_once_with(self.campaign.id)
+        self.assertNoLease()
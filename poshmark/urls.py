@@ -26,10 +26,12 @@ urlpatterns = [
     path('generate-posh-user-info/', posh_views.GeneratePoshUserInfo.as_view(), name='generate-posh-user-info'),
     path('view-action-logs/', posh_views.ActionLogListView.as_view(template_name='poshmark/view_action_logs.html'),
          name='view-action-logs'),
+    path('action-log-group/', posh_views.GetActionLogGroup.as_view(), name='action-log-group'),
     path('view-action-logs/details/<int:logger_id>/',
          posh_views.LogEntryListView.as_view(template_name='poshmark/view_action_log_details.html'),
          name='view-action-log-details'),
-    path('get-log-entries/<int:logger_id>/<str:datetime>/', posh_views.GetLogEntries.as_view(), name='get-log-entries'),
+    path('live-log-entries/<int:logger_id>/', posh_views.LiveLogEntries.as_view(), name='live-log-entries'),
+    path('log-entries/<int:logger_id>/', posh_views.GetLogEntryPage.as_view(), name='log-entries'),
     path(
         'view-listings/',
         posh_views.ListingListView.as_view(template_name='poshmark/view_listings.html'),
@@ -1,13 +1,17 @@
 import datetime
+import json
 import pytz
+import re
+import time
 
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
+from django.db.models import Count, Max, OuterRef, Q, Subquery
 from django.templatetags.static import static
 from django.urls import reverse_lazy
-from django.http import JsonResponse
-from django.shortcuts import render, redirect, reverse
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect, reverse
 from django.views import View
 from django.views.generic.edit import DeleteView
 from django.views.generic.list import ListView
@@ -15,8 +19,12 @@ from django.views.generic.list import ListView
 from .models import PoshUser, Log, LogEntry, Listing, Campaign, User
 from .forms import CreateListing, CreateCampaign, CreateBasicCampaignForm, EditCampaignForm,\
     EditListingForm
-from .tasks import generate_posh_users, start_campaign, update_redis_object, assign_posh_users
-from poshmark.templatetags.custom_filters import log_entry_return
+from . import redis_store
+from .loaders import get_loader
+from .proxy_leases import ProxyLeases
+from .scheduler import CampaignTimers
+from .tasks import generate_posh_users, start_campaign, update_redis_object, assign_posh_users, get_log_tail_cursor
+from poshmark.templatetags.custom_filters import LOCAL_TZ, format_log_message, log_entry_display
 
 
 @login_required
@@ -223,83 +231,229 @@ class GeneratePoshUserInfo(View, LoginRequiredMixin):
         return JsonResponse(data=data, status=200)
 
 
-class ActionLogListView(ListView, LoginRequiredMixin):
+def visible_logs(user):
+    """The logs a user may read, their own unless they can view every user's"""
+    if user.has_module_perms('can_view_all_users'):
+        return Log.objects.all()
+
+    return Log.objects.filter(user=user)
+
+
+def filter_action_logs(request):
+    """The logs the action log page shows for the selected user and description search"""
+    description = request.GET.get('description', '')
+    username_select = request.GET.get('username_select', '')
+    logs = visible_logs(request.user)
+
+    if username_select:
+        logs = logs.filter(user__username=username_select)
+    else:
+        logs = logs.filter(user=request.user)
+
+    if description:
+        logs = logs.filter(description__icontains=description)
+
+    return logs
+
+
+class ActionLogListView(LoginRequiredMixin, ListView):
     model = Log
     login_url = '/login/'
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super(ActionLogListView, self).get_context_data(**kwargs)
-        context['usernames'] = [user.username for user in User.objects.exclude(id=self.request.user.id)]
+        context['usernames'] = User.objects.exclude(id=self.request.user.id).values_list('username', flat=True)
 
         return context
 
     def get_queryset(self):
-        description = self.request.GET.get('description', '')
-        username_select = self.request.GET.get('username_select', '')
-        logs = Log.objects.order_by('-created_date')
+        """Groups the logs in the database, campaign logs by campaign title and registration logs by description, so
+        the page costs the same few queries however many logs there are. The logs of a group are loaded page by page
+        when it is opened."""
+        logs = filter_action_logs(self.request)
+
+        campaign_groups = logs.filter(campaign__isnull=False).values('campaign__title').annotate(
+            total=Count('id'), latest=Max('created_date')
+        ).order_by('-latest')
+        registration_groups = logs.filter(campaign__isnull=True).values('description').annotate(
+            total=Count('id'), latest=Max('created_date')
+        ).order_by('-latest')
+
+        return {
+            'Campaign': [
+                {'title': group['campaign__title'], 'total': group['total'], 'latest': group['latest']}
+                for group in campaign_groups
+            ],
+            'Email Registration': [
+                {'title': group['description'], 'total': group['total'], 'latest': group['latest']}
+                for group in registration_groups
+            ],
+        }
 
-        if username_select:
-            logs = logs.filter(user__username=username_select)
+
+class GetActionLogGroup(LoginRequiredMixin, View):
+    login_url = '/login/'
+
+    def get(self, *args, **kwargs):
+        log_type = self.request.GET.get('type')
+        title = self.request.GET.get('title', '')
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            return HttpResponseBadRequest('Invalid page')
+        if page < 1:
+            return HttpResponseBadRequest('Invalid page')
+        logs = filter_action_logs(self.request)
+
+        if log_type == 'Campaign':
+            logs = logs.filter(campaign__title=title)
         else:
-            logs = logs.filter(user=self.request.user)
+            logs = logs.filter(campaign__isnull=True, description=title)
 
-        if description:
-            logs = logs.filter(description__icontains=description)
+        start = (page - 1) * settings.ACTION_LOG_GROUP_PAGE_SIZE
+        page_logs = list(
+            logs.order_by('-created_date', '-id')
+            .values('id', 'description', 'created_date')[start:start + settings.ACTION_LOG_GROUP_PAGE_SIZE + 1]
+        )
+        has_next = len(page_logs) > settings.ACTION_LOG_GROUP_PAGE_SIZE
 
-        all_logs = {
-            'Campaign': {},
-            'Email Registration': {},
+        data = {
+            'logs': [
+                {
+                    'url': reverse('view-action-log-details', args=[log['id']]),
+                    'description': log['description'],
+                    'date_created': log['created_date'].astimezone(LOCAL_TZ).strftime('%m-%d-%Y'),
+                    'time_created': log['created_date'].astimezone(LOCAL_TZ).strftime('%I:%M:%S %p'),
+                }
+                for log in page_logs[:settings.ACTION_LOG_GROUP_PAGE_SIZE]
+            ],
+            'next_page': page + 1 if has_next else None,
         }
 
-        for log in logs:
-            if log.campaign:
-                organized_logs = all_logs['Campaign']
-                if log.campaign.title not in organized_logs.keys():
-                    organized_logs[log.campaign.title] = [log]
-                else:
-                    organized_logs[log.campaign.title].append(log)
-            else:
-                organized_logs = all_logs['Email Registration']
-                if log.description not in organized_logs.keys():
-                    organized_logs[log.description] = [log]
-                else:
-                    organized_logs[log.description].append(log)
+        return JsonResponse(data=data, status=200)
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+
+def encode_log_entry_cursor(log_entry):
+    """Cursors are the entry's microseconds since the epoch and its id, exact so that the keyset seek never skips"""
+    microseconds = (log_entry.timestamp - EPOCH) // datetime.timedelta(microseconds=1)
+
+    return f'{microseconds}-{log_entry.id}'
+
 
-        return all_logs
+def decode_log_entry_cursor(cursor):
+    """Raises ValueError for anything encode_log_entry_cursor couldn't have made"""
+    microseconds, log_entry_id = cursor.split('-')
 
+    return EPOCH + datetime.timedelta(microseconds=int(microseconds)), int(log_entry_id)
 
-class LogEntryListView(ListView, LoginRequiredMixin):
+
+def get_log_entry_page(logger_id, before=None):
+    """Returns the newest page of a logger's entries older than the before cursor, oldest first, along with the cursor
+    of the page before it (None when this is the first page). Seeks on the (logger, timestamp, id) index so every page
+    costs the same no matter how long the log is."""
+    log_entries = LogEntry.objects.filter(logger=logger_id).order_by('-timestamp', '-id')
+
+    if before:
+        timestamp, log_entry_id = decode_log_entry_cursor(before)
+        log_entries = log_entries.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=log_entry_id))
+
+    page = list(log_entries[:settings.LOG_ENTRIES_PAGE_SIZE + 1])
+    has_older = len(page) > settings.LOG_ENTRIES_PAGE_SIZE
+    page = page[:settings.LOG_ENTRIES_PAGE_SIZE]
+    page.reverse()
+
+    return page, encode_log_entry_cursor(page[0]) if has_older else None
+
+
+class LogEntryListView(LoginRequiredMixin, ListView):
     model = LogEntry
     login_url = '/login/'
 
     def get_queryset(self):
-        log_entries = LogEntry.objects.filter(logger=self.kwargs['logger_id']).order_by('timestamp')
+        self.logger = get_object_or_404(visible_logs(self.request.user), id=self.kwargs['logger_id'])
+        self.log_entries, self.older_cursor = get_log_entry_page(self.kwargs['logger_id'])
+
+        return [log_entry_display(log_entry) for log_entry in self.log_entries]
 
-        return log_entries
+    def get_context_data(self, **kwargs):
+        context = super(LogEntryListView, self).get_context_data(**kwargs)
+        last_entry = self.log_entries[-1] if self.log_entries else None
 
+        context['logger'] = self.logger
+        context['logger_id'] = self.kwargs['logger_id']
+        context['older_cursor'] = self.older_cursor
+        context['tail_cursor'] = get_log_tail_cursor(self.kwargs['logger_id'], last_entry.timestamp if last_entry else None)
+
+        return context
 
-class GetLogEntries(View, LoginRequiredMixin):
+
+class GetLogEntryPage(LoginRequiredMixin, View):
     login_url = '/login/'
 
     def get(self, *args, **kwargs):
-        timestamp_str = self.kwargs['datetime']
-        logger_id = self.kwargs["logger_id"]
-        timestamp = datetime.datetime.strptime(timestamp_str, '%Y-%m-%d %I:%M:%S.%f %p').replace(tzinfo=pytz.utc)
-        log_entries = LogEntry.objects.filter(logger=logger_id, timestamp__gt=timestamp).order_by("timestamp")
-
-        if log_entries:
-            log_entry_messages = [log_entry_return(log_entry) for log_entry in log_entries]
-            last_timestamp = log_entries.last().timestamp.strftime('%Y-%m-%d %I:%M:%S.%f %p')
-            data = {
-                'log_entry_messages': log_entry_messages,
-                'new_url': reverse('get-log-entries', args=[logger_id, last_timestamp])
-            }
-        else:
-            data = {}
+        get_object_or_404(visible_logs(self.request.user), id=self.kwargs['logger_id'])
+        try:
+            log_entries, older_cursor = get_log_entry_page(self.kwargs['logger_id'], self.request.GET.get('before'))
+        except (ValueError, OverflowError):
+            return HttpResponseBadRequest('Invalid cursor')
+        data = {
+            'log_entries': [log_entry_display(log_entry) for log_entry in log_entries],
+            'older_cursor': older_cursor,
+        }
 
         return JsonResponse(data=data, status=200)
 
 
+# The position in a logger's redis tail to stream from, an entry id or $ for new entries only
+TAIL_CURSOR_PATTERN = re.compile(r'\d+(-\d+)?|\$')
+
+
+class LiveLogEntries(LoginRequiredMixin, View):
+    """Streams a logger's new messages as server sent events, read straight from its redis tail. Each connection lasts
+    LOG_TAIL_CONNECTION_SECONDS, then the browser reconnects and resumes from the last event id it received."""
+    login_url = '/login/'
+
+    def get(self, *args, **kwargs):
+        logger_id = get_object_or_404(visible_logs(self.request.user), id=self.kwargs['logger_id']).id
+        cursor = self.request.headers.get('Last-Event-ID') or self.request.GET.get('cursor') or '$'
+        if not TAIL_CURSOR_PATTERN.fullmatch(cursor):
+            return HttpResponseBadRequest('Invalid cursor')
+
+        response = StreamingHttpResponse(self.events(logger_id, cursor), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+
+        return response
+
+    @staticmethod
+    def events(logger_id, cursor):
+        r = redis_store.get_redis(redis_store.LOG_DB)
+        stream = redis_store.log_tail_stream(logger_id)
+        deadline = time.time() + settings.LOG_TAIL_CONNECTION_SECONDS
+
+        yield 'retry: 1000\n\n'
+
+        while time.time() < deadline:
+            block = min(settings.LOG_TAIL_KEEPALIVE_SECONDS, deadline - time.time())
+            response = r.xread({stream: cursor}, count=settings.LOG_TAIL_MAXLEN, block=max(int(block * 1000), 1))
+
+            if not response:
+                yield ': keepalive\n\n'
+                continue
+
+            for entry_id, fields in response[0][1]:
+                cursor = entry_id
+                timestamp = datetime.datetime.fromtimestamp(float(fields['timestamp']), pytz.utc)
+                data = {
+                    'level': fields['level'],
+                    'message': format_log_message(timestamp, fields['level'], fields['message']),
+                }
+
+                yield f'id: {entry_id}\ndata: {json.dumps(data)}\n\n'
+
+
 class SearchUserNames(View, LoginRequiredMixin):
     def get(self, *args, **kwargs):
         search = self.request.GET.get('q')
@@ -324,19 +478,17 @@ class GetListingInformation(View, LoginRequiredMixin):
     def get(self, *args, **kwargs):
         listing_ids = self.request.GET.get('listing_ids', '').split(',')
         data = {}
-        if listing_ids:
-            for listing_id in listing_ids:
-                if listing_id:
-                    listing_info = []
-                    listing = Listing.objects.get(id=int(listing_id))
 
-                    listing_info.append(static('poshmark/images/listing.jpg'))
-                    listing_info.append(listing.title)
-                    listing_info.append(listing.listing_price)
-                    listing_info.append(listing.original_price)
-                    listing_info.append(listing.size)
+        for listing in get_loader(Listing).load_many(listing_ids):
+            listing_info = []
 
-                    data[listing_id] = listing_info
+            listing_info.append(static('poshmark/images/listing.jpg'))
+            listing_info.append(listing.title)
+            listing_info.append(listing.listing_price)
+            listing_info.append(listing.original_price)
+            listing_info.append(listing.size)
+
+            data[str(listing.id)] = listing_info
 
         return JsonResponse(data, status=200, safe=False)
 
@@ -353,12 +505,18 @@ class StopCampaign(View, LoginRequiredMixin):
                 logger.warning('Stop signal received')
 
                 update_redis_object(campaign.redis_id, {'status': '3'})
+                # A campaign waiting for its next window is woken up so it can stop right away
+                CampaignTimers().wake(campaign.id)
+                stopped_campaigns.append(campaign_id)
+            elif campaign.status == '4' and ProxyLeases().dequeue(campaign.id):
+                # Still waiting for a proxy, nothing has run yet so it goes straight back to idle
+                Campaign.objects.filter(id=campaign.id, status='4').update(status='2')
                 stopped_campaigns.append(campaign_id)
 
         if stopped_campaigns:
             data['success'] = ','.join(stopped_campaigns)
         else:
-            data['error'] = 'Campaign could no be stopped: Status not "RUNNING"'
+            data['error'] = 'Campaign could no be stopped: Status not "RUNNING" or waiting for a proxy'
 
         return JsonResponse(data=data, status=200, safe=False)
 
@@ -437,28 +595,19 @@ class CampaignListView(ListView, LoginRequiredMixin):
     login_url = '/login/'
 
     def get_context_data(self, *, object_list=None, **kwargs):
-        search = self.request.GET.get('search', '')
-        username_select = self.request.GET.get('username_select', '')
-        campaigns = Campaign.objects.filter(status='1')
-
-        if search:
-            campaigns = campaigns.filter(Q(title__icontains=search) | Q(posh_user__username__icontains=search))
-
-        if username_select:
-            campaigns = campaigns.filter(user__username=username_select)
-        else:
-            campaigns = campaigns.filter(user=self.request.user)
-
         context = super(CampaignListView, self).get_context_data(**kwargs)
-        context['usernames'] = [user.username for user in User.objects.exclude(id=self.request.user.id)]
-        context['total_running'] = len(campaigns)
+        context['usernames'] = User.objects.exclude(id=self.request.user.id).values_list('username', flat=True)
+        context['total_running'] = self.campaigns.filter(status='1').count()
+        context['total_campaigns'] = self.campaigns.count()
 
         return context
 
     def get_queryset(self):
+        """Loads each campaign with its posh user and the id of its latest log in the same query, so the page costs
+        a fixed number of queries however many campaigns there are"""
         search = self.request.GET.get('search', '')
         username_select = self.request.GET.get('username_select', '')
-        campaigns = Campaign.objects.order_by('status')
+        campaigns = Campaign.objects.all()
 
         if username_select:
             campaigns = campaigns.filter(user__username=username_select)
@@ -468,7 +617,12 @@ class CampaignListView(ListView, LoginRequiredMixin):
         if search:
             campaigns = campaigns.filter(Q(title__icontains=search) | Q(posh_user__username__icontains=search))
 
-        return campaigns
+        self.campaigns = campaigns
+        latest_logs = Log.objects.filter(campaign=OuterRef('pk')).order_by('-created_date', '-id')
+
+        return campaigns.select_related('posh_user').annotate(
+            latest_log_id=Subquery(latest_logs.values('id')[:1])
+        ).order_by('status')
 
 
 class CreateBasicCampaign(View, LoginRequiredMixin):